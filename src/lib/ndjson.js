@@ -0,0 +1,21 @@
+// src/lib/ndjson.js
+// Read an NDJSON response (an API route called with staged=true) in the browser,
+// calling onMessage with each parsed message as soon as its line arrives.
+export async function readNdjson(response, onMessage) {
+	if (!response.ok) {
+		throw new Error(await response.text());
+	}
+	const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+	let pending = '';
+	for (;;) {
+		const { value, done } = await reader.read();
+		if (done) break;
+		pending += value;
+		const lines = pending.split('\n');
+		pending = lines.pop();
+		for (const line of lines) {
+			if (line.trim()) onMessage(JSON.parse(line));
+		}
+	}
+	if (pending.trim()) onMessage(JSON.parse(pending));
+}
@@ -0,0 +1,30 @@
+// src/lib/server/frames.js
+// Read exercise_stream.py --binary output (see frame_protocol.py): a 24-byte
+// big-endian header ("MMF1", rep_count u32, frame_index u32, timestamp f64,
+// length u32) followed by `length` JPEG bytes, per frame. Frames are handed to
+// onFrame whole, however the pipe splits the bytes.
+const MAGIC = 'MMF1';
+const HEADER_SIZE = 24;
+
+export function readFrames(pythonProcess, onFrame) {
+	let buffered = Buffer.alloc(0);
+	pythonProcess.stdout.on('data', (data) => {
+		buffered = buffered.length ? Buffer.concat([buffered, data]) : data;
+		while (buffered.length >= HEADER_SIZE) {
+			if (buffered.toString('latin1', 0, 4) !== MAGIC) {
+				console.error('Corrupt frame stream: bad magic.');
+				pythonProcess.kill();
+				return;
+			}
+			const length = buffered.readUInt32BE(20);
+			if (buffered.length < HEADER_SIZE + length) break;
+			onFrame({
+				rep_count: buffered.readUInt32BE(4),
+				frame_index: buffered.readUInt32BE(8),
+				timestamp: buffered.readDoubleBE(12),
+				jpeg: buffered.subarray(HEADER_SIZE, HEADER_SIZE + length)
+			});
+			buffered = buffered.subarray(HEADER_SIZE + length);
+		}
+	});
+}
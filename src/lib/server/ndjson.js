@@ -0,0 +1,39 @@
+// src/lib/server/ndjson.js
+// Forward a Python script's NDJSON stdout to the client line by line as it arrives.
+// Cancelling the response (the client went away) kills the script; onClose
+// runs once the script has exited either way (e.g. to delete an upload).
+export function ndjsonResponse(pythonProcess, onClose = async () => {}) {
+	let pending = '';
+	let cancelled = false;
+	// Decode as a stream so a multibyte character split across chunks stays intact.
+	pythonProcess.stdout.setEncoding('utf8');
+	const stream = new ReadableStream({
+		start(controller) {
+			pythonProcess.stdout.on('data', (data) => {
+				pending += data;
+				const lines = pending.split('\n');
+				pending = lines.pop();
+				for (const line of lines) {
+					if (line.trim() && !cancelled) controller.enqueue(`${line}\n`);
+				}
+			});
+			pythonProcess.stderr.on('data', (data) => {
+				console.error('Python stderr:', data.toString());
+			});
+			pythonProcess.on('close', async () => {
+				if (!cancelled) {
+					if (pending.trim()) controller.enqueue(`${pending}\n`);
+					controller.close();
+				}
+				await onClose();
+			});
+		},
+		cancel() {
+			cancelled = true;
+			pythonProcess.kill();
+		}
+	});
+	return new Response(stream, {
+		headers: { 'Content-Type': 'application/x-ndjson', 'Cache-Control': 'no-cache' }
+	});
+}
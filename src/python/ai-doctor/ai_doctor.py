@@ -3,19 +3,36 @@ import os
 import sys
 import io
 import json
-import base64
-import requests
+import time
 from PIL import Image
-import fitz  # PyMuPDF
+try:
+    import pymupdf as fitz  # PyMuPDF >= 1.24.3; importing "fitz" there prints a deprecation notice on stdout
+except ImportError:
+    import fitz  # PyMuPDF
 from dotenv import load_dotenv
-from deep_translator import GoogleTranslator
-from gtts import gTTS
-import tempfile
+# Gemini calls go through the shared gateway (pooled client, retries, metrics).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm-gateway"))
+from gateway import generate, image_part, GatewayError
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import write_ndjson, pop_flag
+# Translation goes through the shared layer (sentence cache, chunking, pluggable backend).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "translation"))
+from translation import translate
+# Speech goes through the shared module (in-memory, per-sentence, cached audio).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "speech"))
+from speech import synthesize_base64
+from staged import write_staged
+# --no-cache forces a fresh Gemini call instead of a cached response.
+BYPASS_CACHE = pop_flag("--no-cache")
+# --staged writes NDJSON: the text as soon as it exists, then the audio as a
+# follow-up message (see speech/staged.py).
+STAGED = pop_flag("--staged")
+# Bump when the prompt changes so cached responses for the old prompt are not reused.
+PROMPT_VERSION = "ai-doctor-v1"
 
 # Load environment variables
 load_dotenv()
 API_KEY = os.getenv("GEMINI_API_KEY")
-API_URL = "https://generativelanguage.googleapis.com/v1/models/gemini-1.5-flash:generateContent"
 
 # Define the system prompt
 system_prompt = """You have to act as a professional doctor, i know you are not but this is for learning purpose. 
@@ -41,37 +58,18 @@ def load_xray(file_path):
     else:
         raise ValueError("Unsupported file format. Please upload PNG, JPEG, or PDF files.")
 
-def image_to_base64(image):
-    """Convert a PIL image to a base64-encoded PNG string."""
+def image_to_png_bytes(image):
+    """Encode a PIL image as PNG bytes."""
     img_byte_arr = io.BytesIO()
     image.save(img_byte_arr, format='PNG')
-    return base64.b64encode(img_byte_arr.getvalue()).decode("utf-8")
+    return img_byte_arr.getvalue()
 
 def get_gemini_inference(image):
     """Call Gemini API with the system prompt and the image (in Base64)."""
-    image_data = image_to_base64(image)
-    headers = {"Content-Type": "application/json"}
-    data = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {"text": system_prompt},
-                    {
-                        "inlineData": {
-                            "mimeType": "image/png",
-                            "data": image_data
-                        }
-                    }
-                ]
-            }
-        ]
-    }
     try:
-        response = requests.post(f"{API_URL}?key={API_KEY}", headers=headers, json=data)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return generate([system_prompt, image_part(image_to_png_bytes(image))], api_key=API_KEY,
+                        template=PROMPT_VERSION, bypass_cache=BYPASS_CACHE)
+    except GatewayError as e:
         print(f"Error during API request: {e}", file=sys.stderr)
         return {"error": str(e)}
 
@@ -91,18 +89,12 @@ def extract_useful_info(response_json):
 def translate_to_hindi(text):
     """Translate English text to Hindi."""
     try:
-        return GoogleTranslator(source="en", target="hi").translate(text)
+        return translate(text)
     except Exception as e:
         return f"Error translating text: {str(e)}"
 
-def text_to_speech(text, lang):
-    """Generate TTS audio from text using gTTS and return the path of the saved mp3 file."""
-    tts = gTTS(text=text, lang=lang)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-        tts.save(temp_audio.name)
-        return temp_audio.name
-
 if __name__ == "__main__":
+    started = time.perf_counter()
     # Expect at least two arguments: file path and language code ("en" or "hi")
     if len(sys.argv) < 2:
         print("No file path provided.", file=sys.stderr)
@@ -118,33 +110,43 @@ if __name__ == "__main__":
     
     inference_json = get_gemini_inference(xray_image)
     if "error" in inference_json:
+        if STAGED:
+            write_ndjson({"type": "error", "error": f"API Error: {inference_json['error']}"})
         print(f"API Error: {inference_json['error']}", file=sys.stderr)
         sys.exit(1)
     useful_info = extract_useful_info(inference_json)
+    if STAGED:
+        # English text goes out now; translation and speech follow as separate messages.
+        try:
+            _, latency = write_staged(useful_info, "hi" if language == "hi" else "en", write_ndjson,
+                                      "inference", translate_to_hindi, started)
+        except Exception as e:
+            write_ndjson({"type": "error", "error": f"Error generating audio: {e}"})
+            print(f"Error generating audio: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps({"latency": latency}), file=sys.stderr)
+        sys.exit(0)
+
     if language == "hi":
         useful_info = translate_to_hindi(useful_info)
         audio_lang = "hi"
     else:
         audio_lang = "en"
-    # Generate TTS audio file and then read its content as Base64
-    audio_file = text_to_speech(useful_info, audio_lang)
+    # Generate TTS audio in memory as Base64
     try:
-        with open(audio_file, "rb") as af:
-            audio_bytes = af.read()
-        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+        audio_base64, audio_mime, speech_stats = synthesize_base64(useful_info, audio_lang)
     except Exception as e:
-        print(f"Error reading audio file: {e}", file=sys.stderr)
+        print(f"Error generating audio: {e}", file=sys.stderr)
         sys.exit(1)
-    finally:
-        # Clean up the temporary audio file
-        try:
-            os.unlink(audio_file)
-        except Exception:
-            pass
+    print(json.dumps({"speech": speech_stats}), file=sys.stderr)
 
     # Prepare a JSON result with inference text and audio content
     result = {
         "inference": useful_info,
-        "audio": audio_base64
+        "audio": audio_base64,
+        "audio_mime": audio_mime
     }
     print(json.dumps(result))
+    # Nothing is readable before the single JSON result, so first text and total coincide.
+    total_ms = round((time.perf_counter() - started) * 1000, 2)
+    print(json.dumps({"latency": {"first_text_ms": total_ms, "total_ms": total_ms}}), file=sys.stderr)
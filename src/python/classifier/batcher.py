@@ -0,0 +1,124 @@
+"""
+Dynamic micro-batching for classifier inference.
+
+Concurrent callers submit one preprocessed image each; a single worker thread
+per model collects them for up to `max_wait_ms` (or until `max_batch_size`
+items are queued), runs one batched predict and hands each caller its own
+result.
+"""
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+class MicroBatcher:
+    def __init__(self, predict_batch, max_batch_size=32, max_wait_ms=10, stats_window=1000):
+        """
+        predict_batch: callable taking a list of items and returning a list of
+        results in the same order.
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+
+        # Metrics
+        self.batch_sizes = deque(maxlen=stats_window)
+        self.wait_times_ms = deque(maxlen=stats_window)
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, item):
+        """Queue an item and return a Future resolving to its result."""
+        future = Future()
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("Batcher is closed.")
+            self.queue.append((item, future, time.perf_counter()))
+            self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+            self.cond.notify()
+        return future
+
+    def predict(self, item, timeout=None):
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(item).result(timeout=timeout)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.worker.join()
+
+    def _collect(self):
+        """Wait for the first item, then fill the batch until it is full or the window expires."""
+        with self.cond:
+            while not self.queue and not self.closed:
+                self.cond.wait()
+            if not self.queue:
+                return []
+            deadline = self.queue[0][2] + self.max_wait
+            while len(self.queue) < self.max_batch_size and not self.closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            count = min(len(self.queue), self.max_batch_size)
+            return [self.queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            started = time.perf_counter()
+            # Skip items whose caller already cancelled; the rest can no longer
+            # be cancelled, so resolving them below can't raise.
+            live = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            results, error = [], None
+            if live:
+                try:
+                    results = list(self.predict_batch([item for item, _, _ in live]))
+                    if len(results) != len(live):
+                        error = RuntimeError(f"predict_batch returned {len(results)} results for {len(live)} items.")
+                except Exception as e:
+                    results, error = [], e
+            # Delivered outside the try so one caller's future can't fail the batch or the
+            # worker; items past a short result list get the error.
+            for i, (_, future, _) in enumerate(live):
+                if i < len(results):
+                    future.set_result(results[i])
+                else:
+                    future.set_exception(error)
+            with self.cond:
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes.append(len(batch))
+                self.wait_times_ms.extend((started - enqueued) * 1000 for _, _, enqueued in batch)
+
+    def metrics(self):
+        with self.cond:
+            sizes = list(self.batch_sizes)
+            waits = sorted(self.wait_times_ms)
+            summary = {
+                "batches": self.batches,
+                "items": self.items,
+                "queue_depth": len(self.queue),
+                "max_queue_depth": self.max_queue_depth,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+        if sizes:
+            summary["avg_batch_size"] = round(sum(sizes) / len(sizes), 2)
+        if waits:
+            summary["wait_ms"] = {
+                "p50": round(waits[len(waits) // 2], 2),
+                "p99": round(waits[min(len(waits) - 1, int(len(waits) * 0.99))], 2),
+                "max": round(waits[-1], 2),
+            }
+        return summary
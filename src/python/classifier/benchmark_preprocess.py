@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for classifier image preprocessing.
+
+Compares the original PIL convert/resize + img_to_array + expand_dims +
+preprocess_input chain with preprocessing.py decoding into a reusable batch
+buffer. Reports milliseconds per image and the NumPy memory allocated per
+image (via tracemalloc; PIL's internal decode buffers are not traced).
+
+With --parity the model is also run on the full decode and on the JPEG draft
+decode of the same images, reporting top-1 agreement and the largest
+probability difference; CLASSIFIER_JPEG_DRAFT should only be enabled when
+these hold on representative images.
+
+Usage:
+    python src/python/classifier/benchmark_preprocess.py <image_dir | glob | manifest> <brain|skin>
+        [--repeat 3] [--limit 200] [--parity]
+"""
+import json
+import time
+import argparse
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+import preprocessing
+from bulk_classify import iter_image_paths
+
+def legacy_preprocess(image_path, model_type):
+    """The pre-optimization path, kept here only as the benchmark baseline."""
+    target_size = preprocessing.TARGET_SIZES[model_type]
+    img = Image.open(image_path).convert('RGB')
+    img = img.resize(target_size)
+    img_array = np.asarray(img, dtype=np.float32)  # keras img_to_array
+    img_array = np.expand_dims(img_array, axis=0)
+    if preprocessing.SCALE_TO_UNIT[model_type]:
+        img_array /= 127.5  # keras preprocess_input (mode="tf")
+        img_array -= 1.0
+    return img_array
+
+def run(label, fn, paths, repeat):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(paths)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    images = len(paths) * repeat
+    return {
+        "path": label,
+        "ms_per_image": round(elapsed * 1000 / images, 3),
+        "peak_traced_mb": round(peak / 1e6, 2),
+        "retained_mb": round(sum(stat.size for stat in snapshot.statistics("filename")) / 1e6, 2),
+    }
+
+def benchmark(paths, model_type, repeat=3, batch_size=32):
+    buffer = preprocessing.BatchBuffer(model_type, capacity=batch_size)
+
+    def legacy(batch_paths):
+        for image_path in batch_paths:
+            legacy_preprocess(image_path, model_type)
+
+    def buffered(batch_paths):
+        for i in range(0, len(batch_paths), batch_size):
+            buffer.decode(batch_paths[i:i + batch_size])
+
+    def buffered_draft(batch_paths):
+        for i in range(0, len(batch_paths), batch_size):
+            buffer.decode(batch_paths[i:i + batch_size], draft=True)
+
+    # Warm the page cache and the buffer on both decode paths before timing.
+    buffered(paths)
+    buffered_draft(paths)
+    return [
+        run("legacy", legacy, paths, repeat),
+        run("buffer", buffered, paths, repeat),
+        run("buffer+draft", buffered_draft, paths, repeat),
+    ]
+
+def draft_parity(paths, model_type, batch_size=32):
+    """Compare model outputs on full vs. draft JPEG decodes of the same images."""
+    import classifier
+    model = classifier.get_brain_model()[0] if model_type == "brain" else classifier.get_skin_model()
+    buffer = preprocessing.BatchBuffer(model_type, capacity=batch_size)
+    full, draft = [], []
+    for i in range(0, len(paths), batch_size):
+        batch_paths = paths[i:i + batch_size]
+        full.append(model.predict(buffer.decode(batch_paths), verbose=0))
+        draft.append(model.predict(buffer.decode(batch_paths, draft=True), verbose=0))
+    full, draft = np.concatenate(full), np.concatenate(draft)
+    return {
+        "top1_agreement": round(float(np.mean(full.argmax(axis=1) == draft.argmax(axis=1))), 4),
+        "max_abs_prob_diff": round(float(np.abs(full - draft).max()), 6),
+        "mean_abs_prob_diff": round(float(np.abs(full - draft).mean()), 6),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark classifier preprocessing paths.")
+    parser.add_argument("images", help="Image directory, glob or manifest")
+    parser.add_argument("model_type", choices=["brain", "skin"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--parity", action="store_true", help="Also compare predictions on full vs. draft decodes")
+    args = parser.parse_args()
+
+    paths = [p for _, p in zip(range(args.limit), iter_image_paths(args.images))]
+    report = {"images": len(paths), "results": benchmark(paths, args.model_type, args.repeat)}
+    if args.parity:
+        report["draft_parity"] = draft_parity(paths, args.model_type)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Bulk classification of image archives.
+
+Accepts a directory (searched recursively), a glob pattern or a manifest file
+(one image path per line) and streams one JSON object per image as JSON lines.
+Images are decoded and resized in a process pool; the preprocessed arrays feed
+a bounded queue that is drained into batched model.predict calls.
+
+Completed paths are appended to a checkpoint file after each batch, so an
+interrupted run picks up where it stopped when started again with the same
+checkpoint. Images that fail to decode are recorded as errors and counted as
+done; a batch whose predict call fails gets an error record per image but is
+not checkpointed, so the next run retries it.
+
+Usage (run from the repository root, like classifier.py):
+    python src/python/classifier/bulk_classify.py <dir | glob | manifest> <brain|skin>
+        [--output results.jsonl] [--checkpoint run.ckpt] [--workers N]
+        [--batch-size 32] [--queue-size 128]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+_DONE = object()
+
+# ----------------- Input Discovery -----------------
+def iter_image_paths(source):
+    """Yield image paths from a directory, glob pattern or manifest file."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    yield os.path.join(root, name)
+    elif os.path.isfile(source):
+        with open(source, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+    else:
+        yield from sorted(glob.iglob(source, recursive=True))
+
+def load_checkpoint(checkpoint_path):
+    """Return the set of paths already completed by a previous run."""
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+# ----------------- Worker Side -----------------
+def preprocess_worker(args):
+    """Decode and resize one image inside a pool process."""
+    image_path, model_type = args
+    import classifier  # imported lazily so each worker loads it once
+    try:
+        return image_path, classifier.preprocess_image(image_path, model_type), None
+    except Exception as e:
+        return image_path, None, str(e)
+
+# ----------------- Pipeline -----------------
+def run_bulk(source, model_type, output, checkpoint_path=None, workers=None,
+             batch_size=32, queue_size=128):
+    """Classify every image from source, writing JSON lines to output. Returns run stats."""
+    import classifier
+
+    done = load_checkpoint(checkpoint_path)
+    pending = queue.Queue(maxsize=queue_size)
+    stats = {"processed": 0, "errors": 0, "skipped": 0}
+    producer_errors = []
+
+    if model_type == "brain":
+        model, class_labels = classifier.get_brain_model()
+        def predict_batch(arrays):
+            return classifier.predict_brain_batch(model, arrays, class_labels)
+    else:
+        classifier.get_skin_model()
+        predict_batch = classifier.predict_skin_batch
+
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+
+    def flush(batch):
+        if not batch:
+            return
+        try:
+            results = predict_batch([array for _, array in batch])
+        except Exception as e:
+            # A failed predict only costs this batch. Its paths are left out of
+            # the checkpoint so a resumed run retries them.
+            print(f"Batch of {len(batch)} failed: {e}", file=sys.stderr)
+            for image_path, _ in batch:
+                write_error(image_path, f"Prediction failed: {e}", completed=False)
+            return
+        for (image_path, _), result in zip(batch, results):
+            output.write(json.dumps({"path": image_path, **result}) + "\n")
+        output.flush()
+        if checkpoint:
+            checkpoint.write("".join(image_path + "\n" for image_path, _ in batch))
+            checkpoint.flush()
+        stats["processed"] += len(batch)
+
+    def write_error(image_path, error, completed=True):
+        output.write(json.dumps({"path": image_path, "error": error}) + "\n")
+        output.flush()
+        if checkpoint and completed:
+            checkpoint.write(image_path + "\n")
+            checkpoint.flush()
+        stats["errors"] += 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def produce():
+            # Blocks on pending.put() once queue_size images are in flight.
+            try:
+                for image_path in iter_image_paths(source):
+                    if image_path in done:
+                        stats["skipped"] += 1
+                        continue
+                    pending.put(pool.submit(preprocess_worker, (image_path, model_type)))
+            except Exception as e:
+                producer_errors.append(e)
+            finally:
+                pending.put(_DONE)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        start = time.perf_counter()
+        batch = []
+        try:
+            while True:
+                future = pending.get()
+                if future is _DONE:
+                    break
+                image_path, array, error = future.result()
+                if error is not None:
+                    write_error(image_path, error)
+                    continue
+                batch.append((image_path, array))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            flush(batch)
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        producer.join()
+    if producer_errors:
+        raise producer_errors[0]
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["images_per_s"] = round((stats["processed"] + stats["errors"]) / elapsed, 2) if elapsed > 0 else None
+    return stats
+
+# ----------------- Main Entry Point -----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify a directory, glob or manifest of images.")
+    parser.add_argument("source", help="Directory, glob pattern or manifest file of image paths")
+    parser.add_argument("model_type", choices=["brain", "skin"])
+    parser.add_argument("--output", help="JSON-lines output file (appended to); defaults to stdout")
+    parser.add_argument("--checkpoint", help="File of completed paths used to resume a run")
+    parser.add_argument("--workers", type=int, default=None, help="Preprocessing processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--queue-size", type=int, default=128, help="Max preprocessed images in flight")
+    args = parser.parse_args()
+
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        summary = run_bulk(args.source, args.model_type, out, args.checkpoint, args.workers,
+                           args.batch_size, args.queue_size)
+    finally:
+        if args.output:
+            out.close()
+    print(json.dumps(summary), file=sys.stderr)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Offline temperature-scaling calibration for the classifier models.
+
+Runs a model over a labeled validation directory laid out as one
+sub-directory per class (named after the label, or its integer index), fits
+the temperature T that minimizes negative log-likelihood of softmax(log(p) / T)
+and stores it next to the model as <model>.calibration.json. Serving reads the
+file once at startup (see postprocessing.py), so calibration adds no per-request work.
+
+Usage (run from the repository root, like classifier.py):
+    python src/python/classifier/calibrate.py <validation_dir> <brain|skin> [--batch-size 32]
+"""
+import os
+import json
+import time
+import argparse
+import numpy as np
+
+import classifier
+import preprocessing
+import postprocessing
+from bulk_classify import IMAGE_EXTENSIONS
+
+def load_labeled_samples(validation_dir, labels):
+    """Return (paths, class indices) for every image under a per-class directory."""
+    label_index = {str(label): i for i, label in enumerate(labels)}
+    paths, targets = [], []
+    for class_dir in sorted(os.listdir(validation_dir)):
+        full_dir = os.path.join(validation_dir, class_dir)
+        if not os.path.isdir(full_dir):
+            continue
+        if class_dir in label_index:
+            target = label_index[class_dir]
+        elif class_dir.isdigit() and (not labels or int(class_dir) < len(labels)):
+            target = int(class_dir)
+        else:
+            raise ValueError(f"Directory '{class_dir}' does not match any class label.")
+        for name in sorted(os.listdir(full_dir)):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(full_dir, name))
+                targets.append(target)
+    return paths, np.array(targets, dtype=np.int64)
+
+def collect_probabilities(model, model_type, paths, batch_size=32):
+    """Raw (uncalibrated) model outputs for every path."""
+    buffer = preprocessing.BatchBuffer(model_type, capacity=batch_size)
+    outputs = []
+    for i in range(0, len(paths), batch_size):
+        batch = buffer.decode(paths[i:i + batch_size])
+        outputs.append(np.array(model.predict(batch, verbose=0), dtype=np.float32))
+    return np.concatenate(outputs, axis=0)
+
+def negative_log_likelihood(probabilities, targets, temperature):
+    scaled = postprocessing.apply_temperature(probabilities, temperature)
+    return float(-np.mean(np.log(np.clip(scaled[np.arange(len(targets)), targets], 1e-12, 1.0))))
+
+def expected_calibration_error(probabilities, targets, bins=15):
+    confidences = probabilities.max(axis=1)
+    correct = probabilities.argmax(axis=1) == targets
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    bin_ids = np.clip(np.digitize(confidences, edges[1:-1]), 0, bins - 1)
+    conf_sums = np.bincount(bin_ids, weights=confidences, minlength=bins)
+    acc_sums = np.bincount(bin_ids, weights=correct.astype(np.float64), minlength=bins)
+    return float(np.abs(conf_sums - acc_sums).sum() / max(len(targets), 1))
+
+def fit_temperature(probabilities, targets, low=0.05, high=20.0, iterations=60):
+    """Golden-section search for the NLL-minimizing temperature over log(T)."""
+    ratio = (np.sqrt(5) - 1) / 2
+    a, b = np.log(low), np.log(high)
+    nll = lambda log_t: negative_log_likelihood(probabilities, targets, float(np.exp(log_t)))
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    fc, fd = nll(c), nll(d)
+    for _ in range(iterations):
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - ratio * (b - a)
+            fc = nll(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + ratio * (b - a)
+            fd = nll(d)
+    return float(np.exp((a + b) / 2))
+
+def calibrate(validation_dir, model_type, batch_size=32):
+    if model_type == "brain":
+        model, labels = classifier.get_brain_model()
+        h5_path = classifier.BRAIN_MODEL_PATH
+    else:
+        model = classifier.get_skin_model()
+        labels = classifier.load_skin_labels() or []
+        h5_path = classifier.SKIN_MODEL_PATH
+
+    paths, targets = load_labeled_samples(validation_dir, labels)
+    if not paths:
+        raise ValueError("No labeled images found.")
+    probabilities = collect_probabilities(model, model_type, paths, batch_size)
+
+    temperature = fit_temperature(probabilities, targets)
+    calibrated = postprocessing.apply_temperature(probabilities, temperature)
+    report = {
+        "temperature": round(temperature, 5),
+        "samples": len(paths),
+        "backend": classifier.BACKEND,
+        "accuracy": round(float((probabilities.argmax(axis=1) == targets).mean()), 4),
+        "nll_before": round(negative_log_likelihood(probabilities, targets, 1.0), 5),
+        "nll_after": round(negative_log_likelihood(probabilities, targets, temperature), 5),
+        "ece_before": round(expected_calibration_error(probabilities, targets), 5),
+        "ece_after": round(expected_calibration_error(calibrated, targets), 5),
+        "fitted_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(postprocessing.calibration_path(h5_path), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit a softmax temperature on a labeled validation set.")
+    parser.add_argument("validation_dir", help="Directory with one sub-directory of images per class")
+    parser.add_argument("model_type", choices=["brain", "skin"])
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    print(json.dumps(calibrate(args.validation_dir, args.model_type, args.batch_size), indent=2))
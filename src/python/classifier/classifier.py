@@ -1,134 +1,231 @@
+import io
 import sys
 import json
 import os
 import logging
 import numpy as np
 from PIL import Image
-from tensorflow.keras.preprocessing import image  # for image.img_to_array
-from tensorflow.keras.applications.inception_resnet_v2 import preprocess_input
-import tensorflow as tf
+import preprocessing
+import postprocessing
 
-# Suppress TensorFlow/Keras logs
+# Suppress TensorFlow/Keras logs (must be set before TensorFlow is imported)
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-tf.get_logger().setLevel(logging.ERROR)
-
-# ----------------- Custom Layer Definition -----------------
-class CustomScaleLayer(tf.keras.layers.Layer):
-    def __init__(self, scale=1.0, **kwargs):
-        """Initialize the layer with an initial scale value."""
-        super(CustomScaleLayer, self).__init__(**kwargs)
-        self.initial_scale = scale
-
-    def build(self, input_shape):
-        self.scale = self.add_weight(
-            name='scale',
-            shape=(1,),
-            initializer=tf.keras.initializers.Constant(self.initial_scale),
-            trainable=True
-        )
-        super(CustomScaleLayer, self).build(input_shape)
-
-    def call(self, inputs):
-        return inputs * self.scale
-
-    def get_config(self):
-        config = super(CustomScaleLayer, self).get_config()
-        config.update({'scale': self.initial_scale})
-        return config
+
+# ----------------- Backend Selection -----------------
+# "keras" loads the original .h5 models. "tflite", "tflite-float16" and
+# "tflite-int8" load the models written by export_models.py and never import
+# TensorFlow when tflite_runtime is installed.
+BACKEND = os.getenv("CLASSIFIER_BACKEND", "keras").lower()
+MODELS_DIR = "src/python/classifier/models"
+BRAIN_MODEL_PATH = f"{MODELS_DIR}/best_model.h5"
+SKIN_MODEL_PATH = f"{MODELS_DIR}/Skin_disease_model.h5"
+# Number of ranked labels returned alongside the top-1 prediction.
+TOP_K = int(os.getenv("CLASSIFIER_TOP_K", "3"))
+
+def tflite_path(h5_path, backend):
+    """Map an .h5 model path to the exported TFLite file for a tflite backend."""
+    variant = backend.split("-", 1)[1] if "-" in backend else None
+    stem = os.path.splitext(h5_path)[0]
+    return f"{stem}.{variant}.tflite" if variant else f"{stem}.tflite"
+
+def load_model_file(h5_path, backend=BACKEND, custom_objects=None):
+    """Load a classifier model with the requested backend."""
+    if backend.startswith("tflite"):
+        from tflite_backend import TFLiteModel
+        return TFLiteModel(tflite_path(h5_path, backend))
+    if backend != "keras":
+        raise ValueError(f"Unknown classifier backend '{backend}'.")
+    import tensorflow as tf
+    tf.get_logger().setLevel(logging.ERROR)
+    return tf.keras.models.load_model(h5_path, custom_objects=custom_objects)
+
+def model_version(model_type, backend=BACKEND):
+    """
+    Identify the exact model file, calibration, top-k and decode mode in use, so cached
+    predictions are invalidated when any of them changes.
+    """
+    h5_path = BRAIN_MODEL_PATH if model_type == "brain" else SKIN_MODEL_PATH
+    path = h5_path if backend == "keras" else tflite_path(h5_path, backend)
+    suffix = f"T{get_temperature(model_type)}:k{TOP_K}" + (":draft" if preprocessing.JPEG_DRAFT else "")
+    try:
+        stat = os.stat(path)
+        return f"{backend}:{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)}:{suffix}"
+    except OSError:
+        return f"{backend}:{os.path.basename(path)}:{suffix}"
+
+def skin_custom_objects():
+    from custom_layers import CustomScaleLayer
+    return {"CustomScaleLayer": CustomScaleLayer}
 
 # ----------------- Model & Label Loaders -----------------
 def load_class_labels():
-    with open("src/python/classifier/models/class_labels.json", "r") as f:
+    with open(f"{MODELS_DIR}/class_labels.json", "r") as f:
         return json.load(f)
 
-def load_brain_model():
-    return tf.keras.models.load_model("src/python/classifier/models/best_model.h5")
+def load_skin_labels():
+    """
+    Skin class names from skin_class_labels.json (a JSON list indexed by class),
+    if present. It ships with the model files; write_skin_labels.py builds it
+    from the training set's class folders.
+    """
+    try:
+        with open(f"{MODELS_DIR}/skin_class_labels.json", "r") as f:
+            return json.load(f)
+    except OSError:
+        return None
+
+SKIN_LABELS = None
+def get_skin_labels(num_classes):
+    """Skin labels padded with "Skin Class {i}" for any class missing from the label file."""
+    global SKIN_LABELS
+    if SKIN_LABELS is None or len(SKIN_LABELS) < num_classes:
+        labels = load_skin_labels() or []
+        if len(labels) < num_classes:
+            print(f"Warning: {MODELS_DIR}/skin_class_labels.json names {len(labels)} of {num_classes} skin classes; "
+                  f"run write_skin_labels.py to create it.", file=sys.stderr)
+        SKIN_LABELS = list(labels) + [f"Skin Class {i}" for i in range(len(labels), num_classes)]
+    return SKIN_LABELS
+
+# Temperatures fitted by calibrate.py are read once per model.
+TEMPERATURES = {}
+def get_temperature(model_type):
+    if model_type not in TEMPERATURES:
+        h5_path = BRAIN_MODEL_PATH if model_type == "brain" else SKIN_MODEL_PATH
+        TEMPERATURES[model_type] = postprocessing.load_temperature(h5_path)
+    return TEMPERATURES[model_type]
+
+def load_brain_model(backend=BACKEND):
+    return load_model_file(BRAIN_MODEL_PATH, backend)
+
+def load_skin_model(backend=BACKEND):
+    if backend != "keras":
+        return load_model_file(SKIN_MODEL_PATH, backend)
+    model = load_model_file(SKIN_MODEL_PATH, backend, custom_objects=skin_custom_objects())
+    # Recompile using the suggested loss function.
+    model.compile(loss="sparse_categorical_crossentropy", optimizer="adam")
+    return model
+
+# The brain model and its labels are cached the same way as the skin model so a
+# long-lived process (see classifier_server.py) only pays the load cost once.
+BRAIN_MODEL = None
+CLASS_LABELS = None
+def get_brain_model():
+    global BRAIN_MODEL, CLASS_LABELS
+    if BRAIN_MODEL is None:
+        BRAIN_MODEL = load_brain_model()
+    if CLASS_LABELS is None:
+        CLASS_LABELS = load_class_labels()
+    return BRAIN_MODEL, CLASS_LABELS
 
 # We'll load the skin model once and reuse it.
 SKIN_MODEL = None
 def get_skin_model():
     global SKIN_MODEL
     if SKIN_MODEL is None:
-        from tensorflow.keras.models import load_model
-        custom_objects = {"CustomScaleLayer": CustomScaleLayer}
-        SKIN_MODEL = load_model("src/python/classifier/models/Skin_disease_model.h5", custom_objects=custom_objects)
-        # Recompile using the suggested loss function.
-        SKIN_MODEL.compile(loss="sparse_categorical_crossentropy", optimizer="adam")
+        SKIN_MODEL = load_skin_model()
     return SKIN_MODEL
 
+def stack_batch(img_arrays):
+    """Join (1, H, W, C) arrays into one batch; a single image is passed through without a copy."""
+    return img_arrays[0] if len(img_arrays) == 1 else np.concatenate(img_arrays)
+
 # ----------------- Brain Tumor Functions -----------------
 def load_and_preprocess_brain_image(img, target_size=(256, 256)):
-    """Convert image to RGB, resize, convert to array, and expand dims for prediction."""
-    img = img.convert('RGB')
-    img = img.resize(target_size)
-    img_array = image.img_to_array(img)
-    img_array = np.expand_dims(img_array, axis=0)
+    """Convert image to RGB, resize and decode it into a (1, H, W, C) float32 array for prediction."""
+    img_array = np.empty((1, target_size[1], target_size[0], 3), dtype=np.float32)
+    preprocessing.decode_into(img, img_array[0], target_size, draft=preprocessing.JPEG_DRAFT)
     return img_array
 
 def predict_brain_image(model, img, class_labels):
     """Use the brain model to predict the class label and confidence."""
-    img_array = load_and_preprocess_brain_image(img)
-    prediction = model.predict(img_array, verbose=0)
-    predicted_class_index = np.argmax(prediction, axis=1)[0]
-    predicted_class_label = class_labels[predicted_class_index]
-    return predicted_class_label, float(np.max(prediction))
+    result = predict_brain_batch(model, [load_and_preprocess_brain_image(img)], class_labels)[0]
+    return result["prediction"], result["confidence"]
+
+def predict_brain_batch(model, img_arrays, class_labels, k=None):
+    """
+    Run a single predict over a list of preprocessed (1, H, W, C) brain arrays.
+    Returns one {"prediction", "confidence", "top_k"} dict per image.
+    """
+    predictions = model.predict(stack_batch(img_arrays), verbose=0)
+    return postprocessing.format_results(
+        predictions, class_labels, TOP_K if k is None else k, get_temperature("brain"))
 
 # ----------------- Skin Disease Functions -----------------
 def prepare_skin_image(img_path, target_size=(224, 224)):
     """
     Open the image from the given path, convert it to RGB,
-    resize to the target size, convert it to an array, expand dims, and preprocess.
+    resize to the target size, decode it into an array, and preprocess in place.
     This normally produces a 4D tensor of shape (batch, height, width, channels).
     """
-    img = Image.open(img_path).convert('RGB')
-    img = img.resize(target_size)
-    img_array = image.img_to_array(img)
-    img_array = np.expand_dims(img_array, axis=0)  # Expected shape: (1, H, W, C)
-    img_array = preprocess_input(img_array)
-    return img_array
+    img_array = np.empty((1, target_size[1], target_size[0], 3), dtype=np.float32)
+    preprocessing.decode_into(img_path, img_array[0], target_size, draft=preprocessing.JPEG_DRAFT)
+    return preprocessing.preprocess_input(img_array)
 
 def force_to_rank4(x):
     """
     If x is a tensor (or numpy array) of rank 5 (i.e. shape (batch, time, H, W, C)),
     force it to rank 4 by taking the first time step:
        new_x = x[:, 0, ...]
-    This function works whether x is a tf.Tensor or a numpy array.
+    Both tf.Tensor and numpy arrays support this slice directly, so numpy
+    inputs no longer round-trip through TensorFlow.
     """
-    if isinstance(x, tf.Tensor):
-        if x.shape.rank == 5:
-            x = x[:, 0, ...]
-    else:
-        # Convert to tensor, slice, and convert back.
-        x_tensor = tf.convert_to_tensor(x)
-        if x_tensor.shape.rank == 5:
-            x_tensor = x_tensor[:, 0, ...]
-        x = x_tensor.numpy()
+    if len(x.shape) == 5:
+        x = x[:, 0, ...]
     return x
 
-def predict_skin_image(img_path):
+def predict_skin(img_path):
+    """Wrapper returning a formatted result (with top-k labels) for skin disease."""
+    return predict_skin_batch([preprocess_image(img_path, "skin")])[0]
+
+def predict_skin_batch(img_arrays, k=None):
     """
-    Prepare the image and make a prediction using the skin model.
-    If the input tensor has an extra (time) dimension (rank 5),
-    force it to rank 4 by taking the first time step.
-    Returns the predicted class index and the prediction array.
+    Run a single predict over a list of preprocessed (1, H, W, C) skin arrays.
+    Returns one {"prediction", "confidence", "top_k"} dict per image.
     """
     model = get_skin_model()
-    img_array = prepare_skin_image(img_path)
-    
-    # Check if the image array has 5 dimensions; if so, force it to rank 4.
+    predictions = model.predict(stack_batch(img_arrays), verbose=0)
+    labels = get_skin_labels(predictions.shape[1])
+    return postprocessing.format_results(
+        predictions, labels, TOP_K if k is None else k, get_temperature("skin"))
+
+def preprocess_image(image_path, model_type):
+    """Return the (1, H, W, C) input array the given model expects for an image path or file object."""
+    if model_type == "brain":
+        return load_and_preprocess_brain_image(Image.open(image_path))
+    img_array = prepare_skin_image(image_path)
     if img_array.ndim == 5:
         img_array = force_to_rank4(img_array)
-    
-    predictions = model.predict(img_array, verbose=0)
-    class_idx = int(np.argmax(predictions[0]))
-    return class_idx, predictions[0]
+    return img_array
 
-def predict_skin(img_path):
-    """Wrapper returning a formatted result for skin disease."""
-    class_idx, prediction_array = predict_skin_image(img_path)
-    confidence = float(np.max(prediction_array))
-    label = f"Skin Class {class_idx}"  # Replace with a proper mapping if available.
-    return {"prediction": label, "confidence": confidence}
+def classify_image(image_path, model_type):
+    """
+    Run the requested model on an image path and return the result dict.
+    Results are looked up in the prediction cache first when it is enabled (see prediction_cache.py).
+    """
+    from prediction_cache import get_cache
+
+    model_type = model_type.lower()
+    if model_type not in ("brain", "skin"):
+        return {"error": "Invalid model type. Use 'brain' or 'skin'."}
+
+    cache = get_cache()
+    if cache is None:
+        return _run_model(image_path, model_type)
+
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+    key = cache.make_key(image_bytes, model_version(model_type))
+    result = cache.get(key)
+    if result is None:
+        result = _run_model(io.BytesIO(image_bytes), model_type)
+        cache.put(key, result)
+    return result
+
+def _run_model(image_file, model_type):
+    if model_type == "brain":
+        model, class_labels = get_brain_model()
+        return predict_brain_batch(model, [preprocess_image(image_file, "brain")], class_labels)[0]
+    return predict_skin(image_file)
 
 # ----------------- Main Entry Point -----------------
 if __name__ == "__main__":
@@ -140,16 +237,7 @@ if __name__ == "__main__":
     model_type = sys.argv[2].lower()
 
     try:
-        if model_type == "brain":
-            model = load_brain_model()
-            class_labels = load_class_labels()
-            img = Image.open(image_path)
-            prediction_label, confidence = predict_brain_image(model, img, class_labels)
-            result = {"prediction": prediction_label, "confidence": confidence}
-        elif model_type == "skin":
-            result = predict_skin(image_path)
-        else:
-            result = {"error": "Invalid model type. Use 'brain' or 'skin'."}
+        result = classify_image(image_path, model_type)
     except Exception as e:
         result = {"error": str(e)}
 
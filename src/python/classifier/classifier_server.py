@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Long-lived classifier service.
+
+Loads the brain and skin models once at startup and keeps them warm so each
+prediction only pays for preprocessing and a forward pass, instead of a full
+Python/TensorFlow cold start per upload.
+
+Usage (run from the repository root, like classifier.py):
+    python src/python/classifier/classifier_server.py [--host 127.0.0.1] [--port 5005]
+        [--max-batch-size 32] [--max-wait-ms 10]
+
+Requests are preprocessed on their own handler thread and then micro-batched
+per model (see batcher.py) so concurrent uploads share one predict call.
+
+Endpoints:
+    GET  /health   -> model load times and request latency stats
+    POST /predict  -> body {"image_path": "...", "model_type": "brain" | "skin"}
+"""
+import io
+import sys
+import json
+import time
+import threading
+import argparse
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import classifier
+from batcher import MicroBatcher
+from prediction_cache import get_cache
+
+MODEL_TYPES = ("brain", "skin")
+
+# ----------------- Latency Stats -----------------
+class LatencyStats:
+    """Thread-safe request counter with a rolling window of recent latencies."""
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+
+    def record(self, latency_ms, ok=True):
+        with self.lock:
+            self.latencies.append(latency_ms)
+            self.count += 1
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            values = sorted(self.latencies)
+            count, errors = self.count, self.errors
+        summary = {"requests": count, "errors": errors}
+        if values:
+            summary["latency_ms"] = {
+                "avg": round(sum(values) / len(values), 2),
+                "p50": round(values[len(values) // 2], 2),
+                "p99": round(values[min(len(values) - 1, int(len(values) * 0.99))], 2),
+                "max": round(values[-1], 2),
+            }
+        return summary
+
+# ----------------- Model Warm-up -----------------
+LOAD_TIMES = {}
+STATS = {model_type: LatencyStats() for model_type in MODEL_TYPES}
+# One batcher per model; its worker thread is the only caller of model.predict.
+BATCHERS = {}
+MODEL_VERSIONS = {}
+
+def warm_up_models(max_batch_size=32, max_wait_ms=10):
+    """Load both models once, record how long each took and start their batchers."""
+    start = time.perf_counter()
+    brain_model, class_labels = classifier.get_brain_model()
+    LOAD_TIMES["brain"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    classifier.get_skin_model()
+    LOAD_TIMES["skin"] = round(time.perf_counter() - start, 3)
+
+    for model_type in MODEL_TYPES:
+        MODEL_VERSIONS[model_type] = classifier.model_version(model_type)
+
+    BATCHERS["brain"] = MicroBatcher(
+        lambda arrays: classifier.predict_brain_batch(brain_model, arrays, class_labels),
+        max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    BATCHERS["skin"] = MicroBatcher(
+        classifier.predict_skin_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+def cached_predict(image_path, model_type):
+    """Serve from the prediction cache when possible, otherwise decode and batch."""
+    cache = get_cache(default_enabled=True)
+    if cache is None:
+        return dict(BATCHERS[model_type].predict(classifier.preprocess_image(image_path, model_type)))
+
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+    key = cache.make_key(image_bytes, MODEL_VERSIONS[model_type])
+    result = cache.get(key)
+    if result is not None:
+        result["cached"] = True
+        return result
+    img_array = classifier.preprocess_image(io.BytesIO(image_bytes), model_type)
+    result = dict(BATCHERS[model_type].predict(img_array))
+    cache.put(key, result)
+    return result
+
+def predict(image_path, model_type):
+    """Run a single prediction against the warm models, recording latency."""
+    start = time.perf_counter()
+    ok = True
+    try:
+        result = cached_predict(image_path, model_type)
+    except Exception as e:
+        ok = False
+        result = {"error": str(e)}
+    latency_ms = (time.perf_counter() - start) * 1000
+    STATS[model_type].record(latency_ms, ok=ok and "error" not in result)
+    result["latency_ms"] = round(latency_ms, 2)
+    return result
+
+def health():
+    cache = get_cache(default_enabled=True)
+    return {
+        "status": "ok" if len(LOAD_TIMES) == len(MODEL_TYPES) else "loading",
+        "backend": classifier.BACKEND,
+        "models": {
+            model_type: {
+                "load_time_s": LOAD_TIMES.get(model_type),
+                **STATS[model_type].snapshot(),
+                "batching": BATCHERS[model_type].metrics() if model_type in BATCHERS else None,
+            }
+            for model_type in MODEL_TYPES
+        },
+        "cache": cache.stats() if cache is not None else None,
+    }
+
+# ----------------- HTTP Handler -----------------
+class ClassifierHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, health())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            image_path = payload["image_path"]
+            model_type = str(payload.get("model_type", "brain")).lower()
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": f"Invalid request body: {e}"})
+            return
+        if model_type not in MODEL_TYPES:
+            self._send_json(400, {"error": "Invalid model type. Use 'brain' or 'skin'."})
+            return
+        self._send_json(200, predict(image_path, model_type))
+
+    def log_message(self, format, *args):
+        # Keep stdout clean; access logs go to stderr only.
+        print(format % args, file=sys.stderr)
+
+# ----------------- Main Entry Point -----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve classifier predictions from warm models.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    warm_up_models(args.max_batch_size, args.max_wait_ms)
+    print(json.dumps({"event": "ready", "load_time_s": LOAD_TIMES}), file=sys.stderr, flush=True)
+
+    server = ThreadingHTTPServer((args.host, args.port), ClassifierHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Accuracy-parity and performance report across classifier backends.
+
+For every backend whose model file exists, reports model size, load time and
+mean per-image latency, and compares predictions on a sample set against the
+original Keras model (top-1 agreement and max absolute probability difference).
+
+Usage (run from the repository root, like classifier.py):
+    python src/python/classifier/compare_backends.py <sample_dir | glob | manifest> <brain|skin>
+        [--backends keras,tflite,tflite-float16,tflite-int8] [--limit 200]
+"""
+import os
+import json
+import time
+import argparse
+import numpy as np
+
+import classifier
+from bulk_classify import iter_image_paths
+
+def backend_model_path(model_type, backend):
+    h5_path = classifier.BRAIN_MODEL_PATH if model_type == "brain" else classifier.SKIN_MODEL_PATH
+    return h5_path if backend == "keras" else classifier.tflite_path(h5_path, backend)
+
+def run_backend(model_type, backend, inputs):
+    """Load one backend, run every input through it and return (probabilities, metrics)."""
+    start = time.perf_counter()
+    if model_type == "brain":
+        model = classifier.load_brain_model(backend)
+    else:
+        model = classifier.load_skin_model(backend)
+    load_time = time.perf_counter() - start
+
+    outputs = []
+    start = time.perf_counter()
+    for img_array in inputs:
+        outputs.append(np.asarray(model.predict(img_array, verbose=0))[0])
+    elapsed = time.perf_counter() - start
+
+    path = backend_model_path(model_type, backend)
+    metrics = {
+        "model_path": path,
+        "size_mb": round(os.path.getsize(path) / 1e6, 2),
+        "load_time_s": round(load_time, 3),
+        "latency_ms_per_image": round(elapsed * 1000 / max(len(inputs), 1), 2),
+    }
+    return np.stack(outputs) if outputs else np.empty((0, 0)), metrics
+
+def compare_backends(sample_source, model_type, backends, limit=200):
+    paths = [p for _, p in zip(range(limit), iter_image_paths(sample_source))]
+    inputs = [classifier.preprocess_image(p, model_type) for p in paths]
+
+    report = {"model_type": model_type, "samples": len(inputs), "backends": {}}
+    reference = None
+    for backend in backends:
+        if not os.path.exists(backend_model_path(model_type, backend)):
+            report["backends"][backend] = {"error": "model file not found; run export_models.py"}
+            continue
+        probabilities, metrics = run_backend(model_type, backend, inputs)
+        if backend == "keras":
+            reference = probabilities
+        elif reference is not None and len(inputs):
+            agree = np.argmax(probabilities, axis=1) == np.argmax(reference, axis=1)
+            metrics["top1_agreement"] = round(float(agree.mean()), 4)
+            metrics["max_abs_prob_diff"] = round(float(np.abs(probabilities - reference).max()), 5)
+        report["backends"][backend] = metrics
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare classifier backends for parity and speed.")
+    parser.add_argument("samples", help="Image directory, glob or manifest")
+    parser.add_argument("model_type", choices=["brain", "skin"])
+    parser.add_argument("--backends", default="keras,tflite,tflite-float16,tflite-int8",
+                        help="Comma-separated; keras should come first to serve as the reference")
+    parser.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",")]
+    print(json.dumps(compare_backends(args.samples, args.model_type, backends, args.limit), indent=2))
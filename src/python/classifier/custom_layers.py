@@ -0,0 +1,26 @@
+"""Custom Keras layers needed to deserialize the .h5 classifier models."""
+import tensorflow as tf
+
+# ----------------- Custom Layer Definition -----------------
+class CustomScaleLayer(tf.keras.layers.Layer):
+    def __init__(self, scale=1.0, **kwargs):
+        """Initialize the layer with an initial scale value."""
+        super(CustomScaleLayer, self).__init__(**kwargs)
+        self.initial_scale = scale
+
+    def build(self, input_shape):
+        self.scale = self.add_weight(
+            name='scale',
+            shape=(1,),
+            initializer=tf.keras.initializers.Constant(self.initial_scale),
+            trainable=True
+        )
+        super(CustomScaleLayer, self).build(input_shape)
+
+    def call(self, inputs):
+        return inputs * self.scale
+
+    def get_config(self):
+        config = super(CustomScaleLayer, self).get_config()
+        config.update({'scale': self.initial_scale})
+        return config
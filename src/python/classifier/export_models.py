@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Export the Keras classifier models to TFLite.
+
+Writes next to each .h5 model:
+    best_model.tflite / Skin_disease_model.tflite                  (--quantize none)
+    best_model.float16.tflite / Skin_disease_model.float16.tflite  (--quantize float16)
+    best_model.int8.tflite / Skin_disease_model.int8.tflite        (--quantize int8)
+
+int8 quantization needs a directory of representative images to calibrate
+activation ranges (--samples). Select an exported model at serving time with
+CLASSIFIER_BACKEND=tflite | tflite-float16 | tflite-int8.
+
+Usage (run from the repository root, like classifier.py):
+    python src/python/classifier/export_models.py [--models brain,skin]
+        [--quantize none|float16|int8] [--samples <image_dir>] [--num-samples 100]
+"""
+import os
+import sys
+import json
+import argparse
+
+import classifier
+from bulk_classify import iter_image_paths
+
+QUANTIZATIONS = ("none", "float16", "int8")
+
+def representative_dataset(model_type, sample_dir, num_samples):
+    """Yield preprocessed single-image batches for int8 calibration."""
+    def generator():
+        for i, image_path in enumerate(iter_image_paths(sample_dir)):
+            if i >= num_samples:
+                break
+            yield [classifier.preprocess_image(image_path, model_type).astype("float32")]
+    return generator
+
+def export_model(model_type, quantization="none", sample_dir=None, num_samples=100):
+    """Convert one Keras model to TFLite and return the written path."""
+    import tensorflow as tf
+
+    if model_type == "brain":
+        model = classifier.load_brain_model("keras")
+        h5_path = classifier.BRAIN_MODEL_PATH
+    else:
+        model = classifier.load_skin_model("keras")
+        h5_path = classifier.SKIN_MODEL_PATH
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if not sample_dir:
+            raise ValueError("int8 quantization needs --samples for calibration.")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(model_type, sample_dir, num_samples)
+
+    backend = "tflite" if quantization == "none" else f"tflite-{quantization}"
+    out_path = classifier.tflite_path(h5_path, backend)
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    return out_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export classifier models to TFLite.")
+    parser.add_argument("--models", default="brain,skin")
+    parser.add_argument("--quantize", choices=QUANTIZATIONS, default="none")
+    parser.add_argument("--samples", help="Image directory, glob or manifest used for int8 calibration")
+    parser.add_argument("--num-samples", type=int, default=100)
+    args = parser.parse_args()
+
+    exported = {}
+    for model_type in args.models.split(","):
+        try:
+            path = export_model(model_type.strip(), args.quantize, args.samples, args.num_samples)
+            exported[model_type] = {"path": path, "size_mb": round(os.path.getsize(path) / 1e6, 2)}
+        except Exception as e:
+            exported[model_type] = {"error": str(e)}
+    print(json.dumps(exported, indent=2))
+    if any("error" in entry for entry in exported.values()):
+        sys.exit(1)
@@ -0,0 +1,65 @@
+"""
+Vectorized post-processing of classifier outputs.
+
+Turns a (N, C) batch of softmax outputs into top-k label/probability lists in
+one pass, optionally applying a temperature fitted offline by calibrate.py.
+"""
+import os
+import json
+import numpy as np
+
+def calibration_path(h5_path):
+    """The calibration file stored alongside a model, e.g. best_model.calibration.json."""
+    return f"{os.path.splitext(h5_path)[0]}.calibration.json"
+
+def load_temperature(h5_path):
+    """Return the fitted temperature for a model, or 1.0 when it has not been calibrated."""
+    try:
+        with open(calibration_path(h5_path), "r") as f:
+            return float(json.load(f)["temperature"])
+    except (OSError, KeyError, ValueError):
+        return 1.0
+
+def apply_temperature(probabilities, temperature):
+    """
+    Temperature-scale softmax outputs: softmax(log(p) / T). The models end in a
+    softmax, so log-probabilities stand in for the logits up to a constant.
+    """
+    if temperature == 1.0:
+        return probabilities
+    logits = np.log(np.clip(probabilities, 1e-12, 1.0)) / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    scaled = np.exp(logits)
+    scaled /= scaled.sum(axis=1, keepdims=True)
+    return scaled
+
+def top_k(probabilities, k):
+    """Return (indices, values) of the k most probable classes per row, sorted descending."""
+    probabilities = np.asarray(probabilities)
+    k = min(k, probabilities.shape[1])
+    rows = np.arange(probabilities.shape[0])[:, None]
+    if k < probabilities.shape[1]:
+        candidates = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(k), (probabilities.shape[0], k))
+    order = np.argsort(-probabilities[rows, candidates], axis=1)
+    indices = candidates[rows, order]
+    return indices, probabilities[rows, indices]
+
+def format_results(probabilities, labels, k=3, temperature=1.0):
+    """
+    Build one result dict per row: the top-1 "prediction"/"confidence" kept for
+    existing callers plus a "top_k" list of {"label", "confidence"}.
+    """
+    probabilities = apply_temperature(np.asarray(probabilities, dtype=np.float32), temperature)
+    indices, values = top_k(probabilities, max(k, 1))
+    results = []
+    for row_indices, row_values in zip(indices.tolist(), values.tolist()):
+        ranked = [{"label": labels[i], "confidence": v}
+                  for i, v in zip(row_indices, row_values)]
+        results.append({
+            "prediction": ranked[0]["label"],
+            "confidence": ranked[0]["confidence"],
+            "top_k": ranked[:k],
+        })
+    return results
@@ -0,0 +1,156 @@
+"""
+Content-addressed cache for classifier predictions.
+
+Results are keyed by the SHA-256 of the raw image bytes plus the model
+version, so re-uploads of the same file skip decoding and inference entirely.
+Two tiers are used: an in-process LRU dict and a SQLite table that survives
+restarts and is shared between processes.
+
+The cache is on by default in classifier_server.py and off for one-shot
+classifier.py runs unless CLASSIFIER_CACHE=1.
+
+Configuration (environment variables):
+    CLASSIFIER_CACHE              "1" enables the cache, "0" disables it (default: see above)
+    CLASSIFIER_CACHE_DB           SQLite file (default: the shared cache file, see common/data_paths.py)
+    CLASSIFIER_CACHE_MEMORY_ITEMS in-memory entries (default 1024)
+    CLASSIFIER_CACHE_DISK_ITEMS   SQLite entries (default 100000)
+    CLASSIFIER_CACHE_EVICTION     "lru" or "fifo" for the SQLite tier (default "lru")
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from data_paths import cache_db_path
+
+EVICTION_POLICIES = ("lru", "fifo")
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+class PredictionCache:
+    def __init__(self, db_path=None, memory_items=1024, disk_items=100000, eviction="lru"):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{eviction}'. Use 'lru' or 'fifo'.")
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self.eviction = eviction
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self.db = None
+        self.disk_count = 0
+        if disk_items > 0:
+            self.db = sqlite3.connect(db_path or cache_db_path(), check_same_thread=False)
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS classifier_prediction_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_classifier_cache_last_access "
+                "ON classifier_prediction_cache (last_access)")
+            self.db.commit()
+            (self.disk_count,) = self.db.execute("SELECT COUNT(*) FROM classifier_prediction_cache").fetchone()
+
+    @staticmethod
+    def make_key(image_bytes, model_version):
+        return f"{model_version}:{hash_bytes(image_bytes)}"
+
+    def get(self, key):
+        """Return the cached result dict for key, or None."""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return dict(self.memory[key])
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT result FROM classifier_prediction_cache WHERE cache_key = ?", (key,)).fetchone()
+                if row:
+                    if self.eviction == "lru":
+                        self.db.execute(
+                            "UPDATE classifier_prediction_cache SET last_access = ? WHERE cache_key = ?",
+                            (time.time(), key))
+                        self.db.commit()
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.counters["disk_hits"] += 1
+                    return dict(result)
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key, result):
+        """Store a successful result in both tiers."""
+        if "error" in result:
+            return
+        with self.lock:
+            self._remember(key, result)
+            if self.db is None:
+                return
+            now = time.time()
+            self.db.execute(
+                "INSERT OR REPLACE INTO classifier_prediction_cache (cache_key, result, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)", (key, json.dumps(result), now, now))
+            # Puts follow misses, so counting each as new overestimates only on races.
+            self.disk_count += 1
+            if self.disk_count > self.disk_items:
+                self._evict_disk()
+            self.db.commit()
+
+    def _remember(self, key, result):
+        self.memory[key] = dict(result)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Trim the table to 90% of disk_items, so the next eviction is a batch of puts away."""
+        (count,) = self.db.execute("SELECT COUNT(*) FROM classifier_prediction_cache").fetchone()
+        excess = count - int(self.disk_items * 0.9)
+        self.disk_count = count
+        if count > self.disk_items:
+            order = "last_access" if self.eviction == "lru" else "created_at"
+            self.db.execute(
+                f"DELETE FROM classifier_prediction_cache WHERE cache_key IN ("
+                f"SELECT cache_key FROM classifier_prediction_cache ORDER BY {order} LIMIT ?)", (excess,))
+            self.counters["evictions"] += excess
+            self.disk_count -= excess
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+            counters["memory_items"] = len(self.memory)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        counters["hit_rate"] = round((lookups - counters["misses"]) / lookups, 4) if lookups else None
+        return counters
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+def get_cache(default_enabled=False):
+    """
+    Return the process-wide cache configured from the environment, or None if
+    disabled. default_enabled applies when CLASSIFIER_CACHE is unset.
+    """
+    global _CACHE
+    if os.getenv("CLASSIFIER_CACHE", "1" if default_enabled else "0") == "0":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = PredictionCache(
+                db_path=os.getenv("CLASSIFIER_CACHE_DB"),
+                memory_items=int(os.getenv("CLASSIFIER_CACHE_MEMORY_ITEMS", "1024")),
+                disk_items=int(os.getenv("CLASSIFIER_CACHE_DISK_ITEMS", "100000")),
+                eviction=os.getenv("CLASSIFIER_CACHE_EVICTION", "lru").lower(),
+            )
+        return _CACHE
@@ -0,0 +1,73 @@
+"""
+Low-copy image preprocessing for the classifier models.
+
+Images are decoded straight into float32 slots of a preallocated array: the
+resized uint8 pixels are cast directly into the slot and Inception-ResNet-v2
+scaling is applied in place.
+
+JPEG draft mode (the decoder itself downsamples by a power of two, never
+below the target size) is faster but gives slightly different pixels from
+the full decode the models were trained on, so it is off unless enabled.
+Check prediction parity on your own images with
+benchmark_preprocess.py --parity before turning it on.
+
+Configuration (environment variables):
+    CLASSIFIER_JPEG_DRAFT   "1" to decode JPEGs in draft mode when serving (default "0")
+"""
+import os
+import numpy as np
+from PIL import Image
+
+# (width, height) as PIL expects; arrays are (height, width, 3).
+TARGET_SIZES = {"brain": (256, 256), "skin": (224, 224)}
+# Only the skin model was trained with Inception-ResNet-v2 scaling; the brain
+# model takes raw 0-255 pixels.
+SCALE_TO_UNIT = {"brain": False, "skin": True}
+JPEG_DRAFT = os.getenv("CLASSIFIER_JPEG_DRAFT", "0") == "1"
+
+def preprocess_input(x):
+    """Inception-ResNet-v2 preprocessing, in place: scale pixels from [0, 255] to [-1, 1]."""
+    x /= 127.5
+    x -= 1.0
+    return x
+
+def decode_into(source, out, target_size, draft=False):
+    """
+    Decode an image path, file object or PIL image into `out`, an (H, W, 3)
+    float32 array, without any full-size float intermediate.
+    """
+    img = source if isinstance(source, Image.Image) else Image.open(source)
+    if draft and img.format == "JPEG":
+        # Only possible before the pixels are loaded; PIL keeps the size >= target.
+        img.draft("RGB", target_size)
+    img = img.convert("RGB")
+    if img.size != target_size:
+        img = img.resize(target_size)
+    np.copyto(out, np.asarray(img), casting="unsafe")
+    return out
+
+class BatchBuffer:
+    """A reusable (capacity, H, W, 3) float32 buffer for one model's batches."""
+
+    def __init__(self, model_type, capacity=32):
+        self.model_type = model_type
+        self.target_size = TARGET_SIZES[model_type]
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        width, height = self.target_size
+        self.buffer = np.empty((capacity, height, width, 3), dtype=np.float32)
+
+    def _reserve(self, count):
+        if count > len(self.buffer):
+            self._allocate(count)
+        return self.buffer[:count]
+
+    def decode(self, sources, draft=False):
+        """Decode and preprocess images straight into the buffer; returns a view of the filled rows."""
+        batch = self._reserve(len(sources))
+        for slot, source in zip(batch, sources):
+            decode_into(source, slot, self.target_size, draft=draft)
+        if SCALE_TO_UNIT[self.model_type]:
+            preprocess_input(batch)
+        return batch
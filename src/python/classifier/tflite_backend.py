@@ -0,0 +1,52 @@
+"""
+TFLite inference backend for the classifier models.
+
+Uses the standalone `tflite_runtime` package when it is installed so serving
+does not need to import TensorFlow at all; falls back to `tf.lite` otherwise.
+TFLiteModel mimics the small part of the Keras API the classifier uses
+(`model.predict(batch, verbose=0)`), so the predict functions work unchanged.
+"""
+import numpy as np
+
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow as tf
+    Interpreter = tf.lite.Interpreter
+
+class TFLiteModel:
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.batch_size = int(self.input_details["shape"][0])
+
+    def _resize_for(self, batch_size):
+        if batch_size != self.batch_size:
+            shape = list(self.input_details["shape"])
+            shape[0] = batch_size
+            self.interpreter.resize_tensor_input(self.input_details["index"], shape)
+            self.interpreter.allocate_tensors()
+            self.input_details = self.interpreter.get_input_details()[0]
+            self.output_details = self.interpreter.get_output_details()[0]
+            self.batch_size = batch_size
+
+    def predict(self, batch, verbose=0):
+        """Run a forward pass over a (N, H, W, C) float batch and return float probabilities."""
+        self._resize_for(batch.shape[0])
+        dtype = self.input_details["dtype"]
+        if dtype != np.float32:
+            # Fully integer-quantized input: map floats onto the quantized grid.
+            scale, zero_point = self.input_details["quantization"]
+            batch = np.round(batch / scale + zero_point)
+            info = np.iinfo(dtype)
+            batch = np.clip(batch, info.min, info.max)
+        self.interpreter.set_tensor(self.input_details["index"], batch.astype(dtype, copy=False))
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_details["index"])
+        if output.dtype != np.float32:
+            scale, zero_point = self.output_details["quantization"]
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
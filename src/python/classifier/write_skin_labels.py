@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Write models/skin_class_labels.json from the skin model's training set.
+
+Keras directory loaders (image_dataset_from_directory, flow_from_directory)
+number classes by their sub-directory names in sorted order, so the sorted
+class folders of the training directory are the model's labels by index.
+The count is checked against the model's output size before anything is
+written; --no-check skips loading the model.
+
+Usage (run from the repository root, like classifier.py):
+    python src/python/classifier/write_skin_labels.py <training_dir> [--no-check]
+"""
+import os
+import json
+import argparse
+
+import classifier
+
+def class_names(training_dir):
+    """Class sub-directory names in the order Keras assigns class indices."""
+    return sorted(name for name in os.listdir(training_dir)
+                  if os.path.isdir(os.path.join(training_dir, name)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the skin model's class label file.")
+    parser.add_argument("training_dir", help="Training directory with one sub-directory per class")
+    parser.add_argument("--no-check", action="store_true", help="Don't compare the count with the model's outputs")
+    args = parser.parse_args()
+
+    labels = class_names(args.training_dir)
+    if not args.no_check:
+        num_classes = classifier.load_skin_model("keras").output_shape[-1]
+        if len(labels) != num_classes:
+            raise SystemExit(f"{args.training_dir} has {len(labels)} class folders but the skin model has {num_classes} outputs.")
+    path = f"{classifier.MODELS_DIR}/skin_class_labels.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(labels, f, indent=2, ensure_ascii=False)
+    print(json.dumps({"labels": path, "classes": len(labels)}))
@@ -0,0 +1,43 @@
+"""
+Command-line helpers shared by the scripts: "--key=value" option parsing,
+removing flags from sys.argv before positional arguments are read, and
+newline-delimited JSON output for the routes that stream a script's stdout.
+
+Scripts import this module by adding its directory to sys.path:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+    from cli_flags import parse_flags
+"""
+import sys
+import json
+
+def parse_flags(argv):
+    """Return {"key": "value"} for each "--key=value" argument; bare flags and positionals are ignored."""
+    flags = {}
+    for arg in argv:
+        if arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            flags[key] = value
+    return flags
+
+def pop_flag(flag, argv=sys.argv):
+    """Remove a boolean flag (e.g. "--no-cache") from argv so positional parsing is unaffected."""
+    if flag in argv:
+        argv.remove(flag)
+        return True
+    return False
+
+def pop_option(name, default=None, argv=sys.argv):
+    """Remove a "--name=value" option from argv and return its value (default when absent)."""
+    prefix = f"--{name}="
+    for arg in argv:
+        if arg.startswith(prefix):
+            argv.remove(arg)
+            return arg[len(prefix):]
+    return default
+
+def write_ndjson(payload, stream=None):
+    """Write one newline-delimited JSON message and flush it so the route sees it immediately."""
+    stream = stream or sys.stdout
+    stream.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    stream.flush()
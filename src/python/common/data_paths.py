@@ -0,0 +1,30 @@
+"""
+Where the Python features keep their local SQLite data (caches and lab
+history).
+
+Everything goes under one gitignored directory, src/server/data/ by
+default, resolved from this file rather than the working directory, so the
+routes (which spawn scripts from the project root) and the resident servers
+use the same files and nothing lands in a tracked database.
+
+Configuration (environment variables):
+    APP_DATA_DIR  data directory (default "src/server/data")
+
+Scripts import this module by adding its directory to sys.path:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+    from data_paths import cache_db_path
+"""
+import os
+
+DATA_DIR = os.getenv("APP_DATA_DIR") or os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "data"))
+
+def data_path(name):
+    """Path of a file in the data directory, creating the directory if needed."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+def cache_db_path():
+    """The SQLite file shared by the prediction, response, translation and speech caches."""
+    return data_path("cache.sqlite")
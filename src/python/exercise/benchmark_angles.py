@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Per-frame cost of the rep-counting angle math.
+
+Compares the original calculate_angle (three fresh np.arrays and attribute
+access per call) with rep_counter's live per-frame path (RepCounter.update)
+and its array path, per frame and batched over a whole sequence. Uses
+synthetic landmark objects shaped like MediaPipe's, so no camera or model
+is needed.
+
+Usage:
+    python benchmark_angles.py [frames]
+"""
+import sys
+import json
+import time
+from collections import namedtuple
+import numpy as np
+
+from rep_counter import RepCounter, landmarks_to_array, NUM_LANDMARKS
+
+Landmark = namedtuple("Landmark", "x y z visibility")
+
+def legacy_calculate_angle(a, b, c):
+    """The original per-call implementation, kept here as the baseline."""
+    a = np.array([a.x, a.y])
+    b = np.array([b.x, b.y])
+    c = np.array([c.x, c.y])
+    ba = a - b
+    bc = c - b
+    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
+    return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = np.random.default_rng(0)
+    arrays = rng.random((frames, NUM_LANDMARKS, 2), dtype=np.float32)
+    landmark_lists = [[Landmark(float(x), float(y), 0.0, 1.0) for x, y in frame] for frame in arrays]
+    counter = RepCounter("Bench Press")
+
+    def legacy():
+        for lms in landmark_lists:
+            legacy_calculate_angle(lms[11], lms[13], lms[15])
+
+    def per_frame_gathered():
+        for lms in landmark_lists:
+            counter.frame_signal(lms)
+
+    def per_frame_from_objects():
+        buffer = np.empty((NUM_LANDMARKS, 2), dtype=np.float32)
+        for lms in landmark_lists:
+            counter.signal(landmarks_to_array(lms, buffer))
+
+    def per_frame_from_array():
+        for frame in arrays:
+            counter.signal(frame)
+
+    def batched():
+        counter.signal(arrays)
+
+    results = {}
+    for name, fn in (("legacy_calculate_angle", legacy),
+                     ("live_per_frame_gathered_joints", per_frame_gathered),
+                     ("vectorized_per_frame_incl_conversion", per_frame_from_objects),
+                     ("vectorized_per_frame_array", per_frame_from_array),
+                     ("vectorized_batched_sequence", batched)):
+        results[name] = {"us_per_frame": round(timed(fn) * 1e6 / frames, 3)}
+    print(json.dumps({"frames": frames, "results": results}, indent=2))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Throughput benchmark for the exercise frame output modes.
+
+JPEG-encodes frames from a sample video once, then measures for each mode
+the cost of writing them (base64 + json.dumps vs. header + raw bytes), the
+cost of parsing them back as the Node side would, and bytes per frame.
+
+Usage:
+    python benchmark_output.py <video_file> [max_frames]
+"""
+import io
+import sys
+import json
+import time
+import base64
+import cv2
+
+from frame_protocol import JsonFrameWriter, BinaryFrameWriter, read_frame
+
+def load_encoded_frames(video_path, max_frames):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        ok, buffer = cv2.imencode('.jpg', frame)
+        if ok:
+            frames.append(buffer)
+    cap.release()
+    return frames
+
+def bench_json(frames):
+    sink = io.StringIO()
+    writer = JsonFrameWriter(sink)
+    start = time.perf_counter()
+    for i, buffer in enumerate(frames):
+        writer.write(0, i, 0.0, buffer)
+    write_s = time.perf_counter() - start
+    data = sink.getvalue()
+
+    start = time.perf_counter()
+    for line in data.splitlines():
+        base64.b64decode(json.loads(line)["frame"])
+    read_s = time.perf_counter() - start
+    return write_s, read_s, len(data.encode("utf-8"))
+
+def bench_binary(frames):
+    sink = io.BytesIO()
+    writer = BinaryFrameWriter(sink)
+    start = time.perf_counter()
+    for i, buffer in enumerate(frames):
+        writer.write(0, i, 0.0, buffer)
+    write_s = time.perf_counter() - start
+    data = sink.getvalue()
+
+    reader = io.BytesIO(data)
+    start = time.perf_counter()
+    while read_frame(reader) is not None:
+        pass
+    read_s = time.perf_counter() - start
+    return write_s, read_s, len(data)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python benchmark_output.py <video_file> [max_frames]", file=sys.stderr)
+        sys.exit(1)
+    frames = load_encoded_frames(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 500)
+    if not frames:
+        print("No frames could be read from the video.", file=sys.stderr)
+        sys.exit(1)
+    jpeg_bytes = sum(len(f) for f in frames)
+
+    report = {"frames": len(frames), "avg_jpeg_kb": round(jpeg_bytes / len(frames) / 1024, 1), "modes": {}}
+    for mode, bench in (("json", bench_json), ("binary", bench_binary)):
+        write_s, read_s, total_bytes = bench(frames)
+        report["modes"][mode] = {
+            "write_fps": round(len(frames) / write_s, 1),
+            "read_fps": round(len(frames) / read_s, 1),
+            "write_us_per_frame": round(write_s * 1e6 / len(frames), 1),
+            "read_us_per_frame": round(read_s * 1e6 / len(frames), 1),
+            "bytes_per_frame": round(total_bytes / len(frames)),
+            "mb_per_s_at_20fps": round(total_bytes / len(frames) * 20 / 1e6, 2),
+        }
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Accuracy and speed of adaptive-resolution ROI inference vs. the full frame.
+
+Runs every video twice through pose + RepCounter, once on full frames (the
+current path) and once through RoiTracker at each requested inference size,
+and reports per-video rep counts, rep-count agreement with the full-frame
+path and pose FPS (frames processed per second of decode+pose+counting; no
+output encoding or pacing).
+
+An optional labels JSON ({"video.mp4": 12, ...}, keyed by file name) adds
+each path's absolute error against the true rep count.
+
+Usage:
+    python benchmark_roi.py <exercise_type> <video> [<video> ...] [--sizes=256,384] [--labels=labels.json]
+"""
+import os
+import sys
+import json
+import time
+
+import cv2
+import mediapipe as mp
+
+from rep_counter import RepCounter
+from roi import RoiTracker
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+mp_pose = mp.solutions.pose
+
+def run_video(video_path, exercise_type, inference_size=None):
+    cap = cv2.VideoCapture(video_path)
+    counter = RepCounter(exercise_type)
+    tracker = RoiTracker(inference_size) if inference_size else None
+    frames = 0
+    started = time.perf_counter()
+    # The ROI crop shifts every frame, which MediaPipe's tracking mode can't
+    # follow, so with a tracker each crop is a fresh detection (see roi.py).
+    with mp_pose.Pose(static_image_mode=tracker is not None,
+                      min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if tracker:
+                landmarks = tracker.process(pose, frame)
+            else:
+                results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                landmarks = results.pose_landmarks.landmark if results.pose_landmarks else None
+            if landmarks:
+                counter.update(landmarks)
+            frames += 1
+    elapsed = time.perf_counter() - started
+    cap.release()
+    result = {"rep_count": counter.rep_count, "frames": frames,
+              "fps": round(frames / elapsed, 2) if elapsed > 0 else None}
+    if tracker:
+        result["cropped_ratio"] = tracker.stats()["cropped_ratio"]
+    return result
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) < 2:
+        print("Usage: python benchmark_roi.py <exercise_type> <video> [<video> ...] "
+              "[--sizes=256,384] [--labels=labels.json]", file=sys.stderr)
+        sys.exit(1)
+    flags = parse_flags(sys.argv[1:])
+    sizes = [int(size) for size in flags.get("sizes", "256").split(",")]
+    labels = {}
+    if "labels" in flags:
+        with open(flags["labels"], "r", encoding="utf-8") as f:
+            labels = json.load(f)
+
+    exercise_type, videos = args[0], args[1:]
+    per_video = []
+    for video_path in videos:
+        entry = {"video": video_path, "full_frame": run_video(video_path, exercise_type)}
+        for size in sizes:
+            entry[f"roi_{size}"] = run_video(video_path, exercise_type, size)
+        label = labels.get(os.path.basename(video_path))
+        if label is not None:
+            entry["label"] = label
+        per_video.append(entry)
+
+    modes = ["full_frame"] + [f"roi_{size}" for size in sizes]
+    summary = {}
+    for mode in modes:
+        runs = [entry[mode] for entry in per_video]
+        total_frames = sum(run["frames"] for run in runs)
+        total_time = sum(run["frames"] / run["fps"] for run in runs if run["fps"])
+        summary[mode] = {
+            "fps": round(total_frames / total_time, 2) if total_time else None,
+            "rep_agreement": round(sum(entry[mode]["rep_count"] == entry["full_frame"]["rep_count"]
+                                       for entry in per_video) / len(per_video), 3),
+        }
+        labelled = [entry for entry in per_video if "label" in entry]
+        if labelled:
+            summary[mode]["mean_abs_error"] = round(
+                sum(abs(entry[mode]["rep_count"] - entry["label"]) for entry in labelled) / len(labelled), 3)
+        if mode != "full_frame" and summary["full_frame"]["fps"] and summary[mode]["fps"]:
+            summary[mode]["speedup"] = round(summary[mode]["fps"] / summary["full_frame"]["fps"], 2)
+
+    print(json.dumps({"exercise_type": exercise_type, "summary": summary, "videos": per_video}, indent=2))
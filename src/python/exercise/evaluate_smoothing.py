@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Rep-count error vs. pose FPS, with and without landmark smoothing.
+
+Pose runs once per labeled video at its full frame rate; lower sampling
+rates are then simulated by keeping every Nth frame's landmarks (the same
+grid offline_analysis --stride uses). For each stride the raw and One-Euro
+smoothed (smoothing.py) landmark streams are counted and compared with the
+labels, alongside the pose CPU time each rate would cost per second of video.
+
+The labels JSON maps video file names (resolved next to the labels file) to
+true rep counts, as in benchmark_roi.py: {"squat_01.mp4": 12, ...}
+
+Before any video is evaluated, a synthetic constant-velocity track checks
+that the smoother's speed estimate holds steady at the true speed (a stale
+estimate turns the One-Euro filter into a fixed low-pass); --check runs only
+that.
+
+Usage:
+    python evaluate_smoothing.py <exercise_type> <labels.json> [--strides=1,2,3,5,8] [--beta=0.5] [--min-cutoff=1.0]
+    python evaluate_smoothing.py --check
+"""
+import os
+import sys
+import json
+import time
+
+import numpy as np
+
+from offline_analysis import analyze_segment, count_reps, video_info
+from smoothing import LandmarkSmoother
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+def check_speed_estimate(velocity=0.6, fps=30.0, frames=90, tolerance=0.05, **params):
+    """
+    Feed every landmark moving at a constant `velocity` (normalized units/s)
+    through LandmarkSmoother and check its settled speed estimate is within
+    `tolerance` (relative) of the true speed. Returns the check as a dict;
+    raises AssertionError when it fails.
+    """
+    smoother = LandmarkSmoother(**params)
+    points = np.zeros((33, 2), dtype=np.float32)
+    estimates = []
+    for i in range(frames):
+        points[:, 0] = velocity * i / fps
+        smoother.filter(points, i / fps)
+        estimates.append(float(smoother.speed.mean()))
+    settled = estimates[frames // 2:]
+    error = max(abs(estimate - velocity) for estimate in settled) / velocity
+    result = {"true_speed": velocity, "estimated_speed": round(settled[-1], 4), "max_relative_error": round(error, 4)}
+    assert error <= tolerance, f"Smoother speed estimate drifted from the true speed: {result}"
+    return result
+
+def extract(video_path):
+    """Full-rate landmarks for a video plus the average pose cost per frame (ms)."""
+    fps, _ = video_info(video_path)
+    started = time.perf_counter()
+    samples = analyze_segment((video_path, 0, 0, float("inf"), 1))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return fps, samples, elapsed_ms / max(len(samples), 1)
+
+def evaluate(exercise_type, videos, strides, smooth_params=None):
+    rows = {stride: {"raw": [], "smoothed": [], "fps": [], "pose_ms_per_s": []} for stride in strides}
+    per_video = []
+    for video_path, label in videos:
+        fps, samples, pose_ms = extract(video_path)
+        entry = {"video": os.path.basename(video_path), "label": label, "fps": round(fps, 2),
+                 "pose_ms_per_frame": round(pose_ms, 2), "strides": {}}
+        for stride in strides:
+            sampled = [sample for sample in samples if sample[0] % stride == 0]
+            raw = len(count_reps(exercise_type, sampled, fps))
+            smoothed = len(count_reps(exercise_type, sampled, fps, smooth=True, smooth_params=smooth_params))
+            entry["strides"][stride] = {"raw": raw, "smoothed": smoothed}
+            rows[stride]["raw"].append(abs(raw - label))
+            rows[stride]["smoothed"].append(abs(smoothed - label))
+            rows[stride]["fps"].append(fps / stride)
+            rows[stride]["pose_ms_per_s"].append(pose_ms * fps / stride)
+        per_video.append(entry)
+
+    tradeoff = []
+    for stride in strides:
+        row = rows[stride]
+        tradeoff.append({
+            "stride": stride,
+            "pose_fps": round(float(np.mean(row["fps"])), 2),
+            "pose_cpu_ms_per_video_s": round(float(np.mean(row["pose_ms_per_s"])), 1),
+            "raw_mae": round(float(np.mean(row["raw"])), 3),
+            "raw_exact": round(float(np.mean(np.array(row["raw"]) == 0)), 3),
+            "smoothed_mae": round(float(np.mean(row["smoothed"])), 3),
+            "smoothed_exact": round(float(np.mean(np.array(row["smoothed"]) == 0)), 3),
+        })
+    return tradeoff, per_video
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--check" in sys.argv[1:]:
+        print(json.dumps({"speed_check": check_speed_estimate()}))
+        sys.exit(0)
+    if len(args) < 2:
+        print("Usage: python evaluate_smoothing.py <exercise_type> <labels.json> [--strides=1,2,3,5,8] "
+              "[--beta=0.5] [--min-cutoff=1.0]\n"
+              "       python evaluate_smoothing.py --check", file=sys.stderr)
+        sys.exit(1)
+    flags = parse_flags(sys.argv[1:])
+    strides = [int(stride) for stride in flags.get("strides", "1,2,3,5,8").split(",")]
+    smooth_params = {"min_cutoff": float(flags.get("min-cutoff", 1.0)), "beta": float(flags.get("beta", 0.5))}
+
+    exercise_type, labels_path = args[0], args[1]
+    with open(labels_path, "r", encoding="utf-8") as f:
+        labels = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(labels_path))
+    videos = [(os.path.join(base_dir, name), reps) for name, reps in labels.items()]
+
+    speed_check = check_speed_estimate(**smooth_params)
+    tradeoff, per_video = evaluate(exercise_type, videos, strides, smooth_params)
+    print(json.dumps({"exercise_type": exercise_type, "smoother": smooth_params, "speed_check": speed_check,
+                      "tradeoff": tradeoff, "videos": per_video}, indent=2))
@@ -1,85 +1,69 @@
 #!/usr/bin/env python
+import os
 import cv2
-import numpy as np
 import mediapipe as mp
 import json
-import base64
-import time
 import sys
+from frame_protocol import make_writer
+from rep_counter import RepCounter
+from pipeline import FramePipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
 
 # Initialize MediaPipe Pose and drawing utilities.
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
-def calculate_angle(a, b, c):
-    """Calculate the angle (in degrees) between three points using the cosine rule."""
-    a = np.array([a.x, a.y])
-    b = np.array([b.x, b.y])
-    c = np.array([c.x, c.y])
-    ba = a - b
-    bc = c - b
-    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-    angle = np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
-    return angle
-
-def process_webcam(exercise_type):
+def process_webcam(exercise_type, target_fps=10):
     cap = cv2.VideoCapture(0)  # Use webcam device 0
-    rep_count = 0
-    is_active = False
+    counter = RepCounter(exercise_type)
+    writer = make_writer("json")
 
     with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
+        def infer(frame):
             # Process frame
             frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             results = pose.process(frame_rgb)
 
             if results.pose_landmarks:
                 mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-                landmarks = results.pose_landmarks.landmark
-
-                # Example: Only implement Bench Press logic for brevity.
-                if exercise_type == "Bench Press":
-                    angle = calculate_angle(landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER],
-                                            landmarks[mp_pose.PoseLandmark.LEFT_ELBOW],
-                                            landmarks[mp_pose.PoseLandmark.LEFT_WRIST])
-                    if angle < 90 and not is_active:
-                        is_active = True
-                    elif angle > 160 and is_active:
-                        rep_count += 1
-                        is_active = False
-
-                # (Add additional exercise types as needed)
+                # Every exercise in rep_counter.EXERCISES is supported here.
+                counter.update(results.pose_landmarks.landmark)
+            return frame, counter.rep_count
 
+        def emit(frame_index, timestamp, result):
+            frame, rep_count = result
             # Overlay rep count on the frame.
             cv2.putText(frame, f"Reps: {rep_count}", (50, 50),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
-            # Encode the processed frame as JPEG.
+            # Encode the processed frame as JPEG and print it as a single JSON line.
             ret2, buffer = cv2.imencode('.jpg', frame)
-            if not ret2:
-                continue
-            jpg_as_text = base64.b64encode(buffer).decode('utf-8')
-
-            # Prepare the JSON data.
-            data = {
-                "rep_count": rep_count,
-                "frame": jpg_as_text
-            }
-            # Print the JSON as a single line (flush immediately)
-            print(json.dumps(data), flush=True)
+            if ret2:
+                writer.write(rep_count, frame_index, timestamp, buffer)
 
-            # Sleep briefly to control the frame rate (adjust as needed)
-            time.sleep(0.1)
+        # Capture, pose and encoding overlap (see pipeline.py); output is paced
+        # to target_fps instead of a fixed sleep.
+        pipeline = FramePipeline(cap.read, infer, emit, drop_frames=True, target_fps=target_fps)
+        try:
+            stats = pipeline.run()
+        finally:
+            cap.release()
 
-    cap.release()
+    print(json.dumps({"pipeline_stats": stats}), file=sys.stderr)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python exercise_realtime.py <exercise_type>", file=sys.stderr)
+        print("Usage: python exercise.py <exercise_type> [--fps=N]", file=sys.stderr)
         sys.exit(1)
     exercise_type = sys.argv[1]
-    process_webcam(exercise_type)
+    flags = parse_flags(sys.argv[2:])
+    try:
+        # 0 emits frames as fast as they are processed (see FramePipeline).
+        target_fps = float(flags.get("fps", 10))
+        if not target_fps >= 0:
+            raise ValueError
+    except ValueError:
+        print(f"--fps must be a non-negative number, got {flags['fps']!r}", file=sys.stderr)
+        sys.exit(1)
+    process_webcam(exercise_type, target_fps)
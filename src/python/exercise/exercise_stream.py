@@ -1,125 +1,115 @@
 #!/usr/bin/env python
+import os
 import sys
 import cv2
-import numpy as np
 import mediapipe as mp
 import json
-import base64
 import time
+from frame_protocol import make_writer
+from rep_counter import RepCounter
+from pipeline import FramePipeline
+from roi import RoiTracker, resize_for_output
+from smoothing import LandmarkSmoother
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
 
 # Initialize MediaPipe Pose and drawing utilities.
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
-def calculate_angle(a, b, c):
-    """Calculate the angle (in degrees) between three points using the cosine rule."""
-    a = np.array([a.x, a.y])
-    b = np.array([b.x, b.y])
-    c = np.array([c.x, c.y])
-    ba = a - b
-    bc = c - b
-    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-    angle = np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
-    return angle
-
-def process_stream(exercise_type, video_path=None):
+def process_stream(exercise_type, video_path=None, output_format="json", target_fps=20,
+                   inference_size=None, output_width=None, smooth=False):
     # If a video path is provided, use it; otherwise, use the webcam (device 0).
-    # Force the DirectShow backend by passing cv2.CAP_DSHOW.
-    cap = cv2.VideoCapture(video_path if video_path else 0, cv2.CAP_DSHOW)
-    rep_count = 0
-    is_active = False
-
-    with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            # Convert frame from BGR to RGB.
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = pose.process(frame_rgb)
+    # DirectShow is forced for the webcam only; files use the default backend,
+    # which (unlike CAP_DSHOW) can read them on every platform.
+    cap = cv2.VideoCapture(video_path) if video_path else cv2.VideoCapture(0, cv2.CAP_DSHOW)
+    # Thresholds and landmarks for each exercise live in rep_counter.EXERCISES.
+    counter = RepCounter(exercise_type)
+    # "json" keeps the base64 JSON-lines output; "binary" writes length-prefixed
+    # JPEG frames (see frame_protocol.py).
+    writer = make_writer(output_format)
+    # With an inference size, pose runs on a downscaled crop around the person
+    # tracked from the previous frame (see roi.py) instead of the full frame.
+    tracker = RoiTracker(inference_size) if inference_size else None
+    # Optional One-Euro filtering between pose and the rep logic (see smoothing.py).
+    smoother = LandmarkSmoother() if smooth else None
+    video_fps = (cap.get(cv2.CAP_PROP_FPS) or 30.0) if video_path else None
+    inferred_frames = 0
+
+    # The ROI crop shifts every frame, which MediaPipe's tracking mode can't
+    # follow, so with a tracker each crop is a fresh detection (see roi.py).
+    with mp_pose.Pose(static_image_mode=tracker is not None,
+                      min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
+        def infer(frame):
+            nonlocal inferred_frames
+            if tracker:
+                landmarks = tracker.process(pose, frame)
+            else:
+                # Convert frame from BGR to RGB.
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                results = pose.process(frame_rgb)
+                landmarks = results.pose_landmarks.landmark if results.pose_landmarks else None
 
             # Process landmarks and update rep count based on the selected exercise.
-            if results.pose_landmarks:
-                landmarks = results.pose_landmarks.landmark
-
-                if exercise_type == "Bench Press":
-                    angle = calculate_angle(
-                        landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER],
-                        landmarks[mp_pose.PoseLandmark.LEFT_ELBOW],
-                        landmarks[mp_pose.PoseLandmark.LEFT_WRIST]
-                    )
-                    if angle < 90 and not is_active:
-                        is_active = True
-                    elif angle > 160 and is_active:
-                        rep_count += 1
-                        is_active = False
-
-                elif exercise_type == "Bicep Curls":
-                    angle = calculate_angle(
-                        landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER],
-                        landmarks[mp_pose.PoseLandmark.LEFT_ELBOW],
-                        landmarks[mp_pose.PoseLandmark.LEFT_WRIST]
-                    )
-                    if angle < 45 and not is_active:
-                        is_active = True
-                    elif angle > 160 and is_active:
-                        rep_count += 1
-                        is_active = False
-
-                elif exercise_type == "Lateral Raises":
-                    angle = calculate_angle(
-                        landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER],
-                        landmarks[mp_pose.PoseLandmark.LEFT_ELBOW],
-                        landmarks[mp_pose.PoseLandmark.LEFT_WRIST]
-                    )
-                    if angle > 90 and not is_active:
-                        is_active = True
-                    elif angle < 40 and is_active:
-                        rep_count += 1
-                        is_active = False
-
-                elif exercise_type == "Squats":
-                    if landmarks[mp_pose.PoseLandmark.LEFT_HIP].y > landmarks[mp_pose.PoseLandmark.LEFT_KNEE].y:
-                        is_active = True
-                    elif landmarks[mp_pose.PoseLandmark.LEFT_HIP].y < landmarks[mp_pose.PoseLandmark.LEFT_KNEE].y and is_active:
-                        rep_count += 1
-                        is_active = False
-
-                elif exercise_type == "Push-ups":
-                    if landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER].y > landmarks[mp_pose.PoseLandmark.LEFT_ELBOW].y:
-                        is_active = True
-                    elif landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER].y < landmarks[mp_pose.PoseLandmark.LEFT_ELBOW].y and is_active:
-                        rep_count += 1
-                        is_active = False
-
-                elif exercise_type == "Shoulder Presses":
-                    if landmarks[mp_pose.PoseLandmark.LEFT_ELBOW].y > landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER].y:
-                        is_active = True
-                    elif landmarks[mp_pose.PoseLandmark.LEFT_ELBOW].y < landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER].y and is_active:
-                        rep_count += 1
-                        is_active = False
-
+            if landmarks and smoother:
+                # Video files use media time (every frame is processed); live
+                # sources use the wall clock, which accounts for dropped frames.
+                timestamp = inferred_frames / video_fps if video_fps else time.perf_counter()
+                counter.update(smoother.apply(landmarks, timestamp))
+            elif landmarks:
+                counter.update(landmarks)
+            inferred_frames += 1
+            return frame, counter.rep_count
+
+        def emit(frame_index, timestamp, result):
+            frame, rep_count = result
+            frame = resize_for_output(frame, output_width)
             # Overlay the rep count on the frame.
             cv2.putText(frame, f"Reps: {rep_count}", (50, 50),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
             # Encode the frame as JPEG.
             ret2, buffer = cv2.imencode('.jpg', frame)
-            if not ret2:
-                continue
-            jpg_as_text = base64.b64encode(buffer).decode('utf-8')
-            data = {"rep_count": rep_count, "frame": jpg_as_text}
-            # Print JSON object and flush immediately.
-            print(json.dumps(data), flush=True)
-            time.sleep(0.05)
-
-    cap.release()
+            if ret2:
+                writer.write(rep_count, frame_index, timestamp, buffer)
+
+        # Capture, pose inference and encoding run as overlapping stages (see
+        # pipeline.py). Live webcam frames are dropped when pose falls behind;
+        # uploaded videos process every frame.
+        pipeline = FramePipeline(cap.read, infer, emit,
+                                 drop_frames=video_path is None, target_fps=target_fps)
+        try:
+            stats = pipeline.run()
+        finally:
+            cap.release()
+
+    if tracker:
+        stats["roi"] = tracker.stats()
+    print(json.dumps({"pipeline_stats": stats}), file=sys.stderr)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python exercise_stream.py <exercise_type> [video_file_path]", file=sys.stderr)
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        print("Usage: python exercise_stream.py <exercise_type> [video_file_path] [--binary] [--fps=N]\n"
+              "           [--infer-size=N] [--output-width=N] [--smooth]\n"
+              "       python exercise_stream.py <exercise_type> <video_file_path> --analyze [--stride=N] [--workers=N] [--smooth]",
+              file=sys.stderr)
         sys.exit(1)
-    exercise_type = sys.argv[1]
-    video_path = sys.argv[2] if len(sys.argv) > 2 else None
-    process_stream(exercise_type, video_path)
+    exercise_type = args[0]
+    video_path = args[1] if len(args) > 1 else None
+    options = parse_flags(flags)
+    target_fps = float(options.get("fps", 20))
+    if "--analyze" in flags and video_path:
+        # Offline mode: no frames are emitted, only a final JSON summary.
+        from offline_analysis import analyze_video
+        summary = analyze_video(video_path, exercise_type,
+                                stride=int(options.get("stride", 1)),
+                                workers=int(options["workers"]) if "workers" in options else None,
+                                smooth="--smooth" in flags)
+        print(json.dumps(summary))
+        sys.exit(0)
+    process_stream(exercise_type, video_path, "binary" if "--binary" in flags else "json", target_fps,
+                   inference_size=int(options["infer-size"]) if "infer-size" in options else None,
+                   output_width=int(options["output-width"]) if "output-width" in options else None,
+                   smooth="--smooth" in flags)
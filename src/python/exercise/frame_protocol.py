@@ -0,0 +1,68 @@
+"""
+Output protocols for annotated exercise frames.
+
+JSON mode (the original): one line per frame,
+    {"rep_count": <int>, "frame": "<base64 jpeg>"}
+
+Binary mode: a stream of length-prefixed frames, each a fixed 24-byte
+big-endian header followed by the raw JPEG bytes:
+    magic        4s   b"MMF1"
+    rep_count    u32
+    frame_index  u32
+    timestamp    f64  seconds since the stream started
+    length       u32  number of JPEG bytes that follow
+"""
+import sys
+import json
+import base64
+import struct
+
+MAGIC = b"MMF1"
+HEADER = struct.Struct("!4sIIdI")
+HEADER_SIZE = HEADER.size
+
+def pack_header(rep_count, frame_index, timestamp, length):
+    return HEADER.pack(MAGIC, rep_count, frame_index, timestamp, length)
+
+def read_frame(stream):
+    """Read one binary frame; returns (rep_count, frame_index, timestamp, jpeg_bytes) or None at EOF."""
+    header = stream.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        return None
+    magic, rep_count, frame_index, timestamp, length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Corrupt frame stream: bad magic.")
+    payload = stream.read(length)
+    if len(payload) < length:
+        return None
+    return rep_count, frame_index, timestamp, payload
+
+class JsonFrameWriter:
+    """Writes the legacy base64 JSON-lines format."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, rep_count, frame_index, timestamp, jpeg):
+        jpg_as_text = base64.b64encode(jpeg).decode('utf-8')
+        self.stream.write(json.dumps({"rep_count": rep_count, "frame": jpg_as_text}) + "\n")
+        self.stream.flush()
+
+class BinaryFrameWriter:
+    """Writes length-prefixed binary frames to a byte stream."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout.buffer
+
+    def write(self, rep_count, frame_index, timestamp, jpeg):
+        jpeg = memoryview(jpeg).cast("B")
+        self.stream.write(pack_header(rep_count, frame_index, timestamp, len(jpeg)))
+        self.stream.write(jpeg)
+        self.stream.flush()
+
+def make_writer(output_format, stream=None):
+    if output_format == "binary":
+        return BinaryFrameWriter(stream)
+    if output_format == "json":
+        return JsonFrameWriter(stream)
+    raise ValueError(f"Unknown output format '{output_format}'. Use 'json' or 'binary'.")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""
+Offline analysis of uploaded exercise videos.
+
+Instead of streaming an annotated JPEG for every frame, this mode only
+produces a final JSON summary (rep count, per-rep timestamps, form stats).
+
+The video is split into segments that are processed in a process pool, each
+worker with its own mp_pose.Pose instance. Segments start `overlap` seconds
+early so pose tracking has warmed up by the segment's first real frame; the
+warm-up samples are discarded. Workers return landmarks only; the rep state
+machine then runs once over the merged, time-ordered landmarks, so reps that
+span a segment boundary are counted exactly as in a sequential pass.
+With --smooth, the merged landmarks are One-Euro filtered (smoothing.py)
+before counting, which keeps counts stable at large strides.
+
+Usage:
+    python offline_analysis.py <exercise_type> <video_file> [--stride=N] [--workers=N]
+        [--segment-seconds=S] [--overlap-seconds=S] [--smooth]
+"""
+import os
+import sys
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from rep_counter import RepCounter
+from smoothing import smooth_sequence
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+def video_info(video_path):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return fps, frame_count
+
+def plan_segments(frame_count, fps, segment_seconds=30, overlap_seconds=2):
+    """Return (warmup_start, start, end) frame ranges covering the whole video."""
+    if frame_count <= 0:
+        # Unknown length (some containers don't report it): one sequential pass.
+        return [(0, 0, float("inf"))]
+    segment_frames = max(int(segment_seconds * fps), 1)
+    overlap_frames = int(overlap_seconds * fps)
+    segments = []
+    for start in range(0, frame_count, segment_frames):
+        end = min(start + segment_frames, frame_count)
+        segments.append((max(start - overlap_frames, 0), start, end))
+    return segments
+
+def analyze_segment(args):
+    """
+    Worker: run pose on frames [warmup_start, end) with the given stride and
+    return [(frame_index, landmarks (33, 4) array or None)] for frames >= start.
+    """
+    video_path, warmup_start, start, end, stride = args
+    import mediapipe as mp
+
+    cap = cv2.VideoCapture(video_path)
+    if warmup_start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, warmup_start)
+    samples = []
+    with mp.solutions.pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
+        frame_index = warmup_start
+        while frame_index < end:
+            # Sample on a global grid so segment boundaries don't shift the stride.
+            if frame_index % stride:
+                if not cap.grab():
+                    break
+                frame_index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if frame_index >= start:
+                landmarks = None
+                if results.pose_landmarks:
+                    landmarks = np.array([[lm.x, lm.y, lm.z, lm.visibility]
+                                          for lm in results.pose_landmarks.landmark], dtype=np.float32)
+                samples.append((frame_index, landmarks))
+            frame_index += 1
+    cap.release()
+    return samples
+
+def count_reps(exercise_type, samples, fps, smooth=False, smooth_params=None):
+    """
+    Run the rep state machine over time-ordered samples and return per-rep
+    events. smooth_params are LandmarkSmoother keyword arguments.
+    """
+    counter = RepCounter(exercise_type)
+    detected = [(frame_index, landmarks) for frame_index, landmarks in samples if landmarks is not None]
+    if counter.definition is None or not detected:
+        return []
+
+    points = np.stack([landmarks[:, :2] for _, landmarks in detected])
+    if smooth:
+        points = smooth_sequence(points, [frame_index / fps for frame_index, _ in detected], **(smooth_params or {}))
+    # The metric for every sampled frame in one vectorized call.
+    signal = counter.signal(points)
+    reps, rep_started = [], None
+    for (frame_index, _), value in zip(detected, signal.tolist()):
+        timestamp = frame_index / fps
+        event = counter.step(value)
+        if event == "started":
+            rep_started = timestamp
+        elif event == "completed":
+            start_s = rep_started if rep_started is not None else timestamp
+            reps.append({"rep": counter.rep_count, "start_s": round(start_s, 3), "end_s": round(timestamp, 3),
+                         "duration_s": round(timestamp - start_s, 3)})
+            rep_started = None
+    return reps
+
+def analyze_video(video_path, exercise_type, stride=1, workers=None, segment_seconds=30, overlap_seconds=2,
+                  smooth=False):
+    started = time.perf_counter()
+    fps, frame_count = video_info(video_path)
+    segments = plan_segments(frame_count, fps, segment_seconds, overlap_seconds)
+    tasks = [(video_path, warmup, start, end, stride) for warmup, start, end in segments]
+
+    samples = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for segment_samples in pool.map(analyze_segment, tasks):
+            samples.extend(segment_samples)
+
+    reps = count_reps(exercise_type, samples, fps, smooth)
+    durations = np.array([rep["duration_s"] for rep in reps]) if reps else np.empty(0)
+    detected = sum(1 for _, landmarks in samples if landmarks is not None)
+    return {
+        "exercise_type": exercise_type,
+        "rep_count": len(reps),
+        "reps": reps,
+        "form": {
+            "avg_rep_duration_s": round(float(durations.mean()), 3) if len(durations) else None,
+            "rep_duration_std_s": round(float(durations.std()), 3) if len(durations) else None,
+            "pose_detected_ratio": round(detected / len(samples), 3) if samples else 0.0,
+        },
+        "video": {"fps": round(fps, 2), "frames": frame_count, "duration_s": round(max(frame_count, 0) / fps, 2)},
+        "processing": {
+            "stride": stride,
+            "smoothed": smooth,
+            "segments": len(segments),
+            "frames_analyzed": len(samples),
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        },
+    }
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) < 2:
+        print("Usage: python offline_analysis.py <exercise_type> <video_file> [--stride=N] [--workers=N] "
+              "[--segment-seconds=S] [--overlap-seconds=S] [--smooth]", file=sys.stderr)
+        sys.exit(1)
+    flags = parse_flags(sys.argv[1:])
+    summary = analyze_video(
+        args[1], args[0],
+        stride=int(flags.get("stride", 1)),
+        workers=int(flags["workers"]) if "workers" in flags else None,
+        segment_seconds=float(flags.get("segment-seconds", 30)),
+        overlap_seconds=float(flags.get("overlap-seconds", 2)),
+        smooth="--smooth" in sys.argv[1:],
+    )
+    print(json.dumps(summary))
@@ -0,0 +1,183 @@
+"""
+Pipelined frame engine for the exercise scripts.
+
+Splits the per-frame loop into three stages connected by bounded queues:
+
+    capture thread  --q-->  inference thread  --q-->  emit stage (caller's thread)
+    cap.read()              pose.process + reps       putText + imencode + write
+
+so that reading the next frame, running pose on the current one and encoding
+the previous one overlap. When inference falls behind a live source, the
+oldest queued frame is dropped instead of building latency. Output is paced
+to a target FPS with a deadline clock rather than a fixed sleep.
+"""
+import time
+import queue
+import threading
+from collections import deque
+
+_STOP = object()
+
+class StageStats:
+    """Per-stage latency counters (milliseconds) over a rolling window."""
+
+    def __init__(self, window=500):
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, ms):
+        self.recent.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def snapshot(self):
+        values = sorted(self.recent)
+        if not values:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2),
+            "p50_ms": round(values[len(values) // 2], 2),
+            "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            "max_ms": round(values[-1], 2),
+        }
+
+class FramePipeline:
+    def __init__(self, read_frame, infer, emit, queue_size=2, drop_frames=True, target_fps=20):
+        """
+        read_frame: callable returning (ok, frame), e.g. cap.read
+        infer:      callable(frame) -> result, run on the inference thread
+        emit:       callable(frame_index, timestamp, result), run on the caller's thread
+        drop_frames: drop the oldest queued frame when inference is behind (live
+                     sources); when False every frame is processed (video files).
+        target_fps: pace emitted frames to this rate; 0 or None emits as fast as possible.
+        """
+        self.read_frame = read_frame
+        self.infer = infer
+        self.emit = emit
+        self.drop_frames = drop_frames
+        self.frame_interval = 1.0 / target_fps if target_fps else 0.0
+        self.captured = queue.Queue(maxsize=queue_size)
+        self.inferred = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.errors = []
+
+        self.stats = {name: StageStats() for name in ("capture", "inference", "emit", "end_to_end")}
+        self.dropped = 0
+        self.start_time = None
+
+    def _put(self, q, item, allow_drop):
+        """Put an item, evicting the oldest one if allowed and the queue is full."""
+        while not self.stop_event.is_set():
+            try:
+                if allow_drop:
+                    q.put_nowait(item)
+                else:
+                    q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if allow_drop:
+                    try:
+                        q.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def _put_stop(self, q):
+        """Always deliver the stop marker; queued frames are only evicted for it once stopping."""
+        while True:
+            try:
+                q.put(_STOP, timeout=0.1)
+                return
+            except queue.Full:
+                if self.stop_event.is_set():
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _capture_loop(self):
+        frame_index = 0
+        try:
+            while not self.stop_event.is_set():
+                started = time.perf_counter()
+                ret, frame = self.read_frame()
+                if not ret:
+                    break
+                self.stats["capture"].record((time.perf_counter() - started) * 1000)
+                self._put(self.captured, (frame_index, started, frame), self.drop_frames)
+                frame_index += 1
+        except Exception as e:
+            self.errors.append(e)
+        finally:
+            self._put_stop(self.captured)
+
+    def _inference_loop(self):
+        try:
+            while True:
+                item = self.captured.get()
+                if item is _STOP:
+                    break
+                frame_index, captured_at, frame = item
+                started = time.perf_counter()
+                result = self.infer(frame)
+                self.stats["inference"].record((time.perf_counter() - started) * 1000)
+                self._put(self.inferred, (frame_index, captured_at, result), False)
+        except Exception as e:
+            self.errors.append(e)
+            self.stop_event.set()
+        finally:
+            self._put_stop(self.inferred)
+
+    def run(self):
+        """Run until the source is exhausted (or stop() is called); returns the stats report."""
+        self.start_time = time.perf_counter()
+        threads = [threading.Thread(target=self._capture_loop, daemon=True),
+                   threading.Thread(target=self._inference_loop, daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        emitted = 0
+        next_deadline = time.perf_counter()
+        try:
+            while True:
+                item = self.inferred.get()
+                if item is _STOP:
+                    break
+                frame_index, captured_at, result = item
+                if self.frame_interval:
+                    delay = next_deadline - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                        next_deadline += self.frame_interval
+                    else:
+                        # Running behind: don't try to catch up with a burst.
+                        next_deadline = time.perf_counter() + self.frame_interval
+                started = time.perf_counter()
+                self.emit(frame_index, captured_at - self.start_time, result)
+                finished = time.perf_counter()
+                self.stats["emit"].record((finished - started) * 1000)
+                self.stats["end_to_end"].record((finished - captured_at) * 1000)
+                emitted += 1
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join(timeout=1.0)
+        if self.errors:
+            raise self.errors[0]
+        return self.report(emitted)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def report(self, emitted):
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            "frames_emitted": emitted,
+            "frames_dropped": self.dropped,
+            "elapsed_s": round(elapsed, 3),
+            "achieved_fps": round(emitted / elapsed, 2) if elapsed > 0 else None,
+            "target_fps": round(1.0 / self.frame_interval, 2) if self.frame_interval else None,
+            "stages": {name: stats.snapshot() for name, stats in self.stats.items()},
+        }
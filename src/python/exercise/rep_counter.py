@@ -0,0 +1,142 @@
+"""
+Data-driven rep counting for the exercise scripts.
+
+Each exercise is a declarative entry in EXERCISES:
+
+    "metric":  "angle" -> joint angle (degrees) at the middle of a landmark triplet
+               "dy"    -> y(first) - y(second) for a landmark pair (image y grows downward)
+    "joints":  landmark names (mp_pose.PoseLandmark members)
+    "enter":   (op, threshold) that starts a rep (sets is_active)
+    "exit":    (op, threshold) that completes an active rep (counts it)
+    "hysteresis": optional margin added to both thresholds, pushing them apart,
+                  so values jittering around a single threshold can't double count
+
+Adding an exercise is a new entry here. All metrics for a frame (or for a
+whole (T, 33, 2) sequence of frames) are computed with one vectorized NumPy
+expression over a landmark array.
+"""
+import sys
+import numpy as np
+
+# MediaPipe Pose landmark indices (mp_pose.PoseLandmark), kept here so the
+# engine itself has no mediapipe dependency.
+LANDMARKS = {
+    "NOSE": 0, "LEFT_SHOULDER": 11, "RIGHT_SHOULDER": 12, "LEFT_ELBOW": 13, "RIGHT_ELBOW": 14,
+    "LEFT_WRIST": 15, "RIGHT_WRIST": 16, "LEFT_HIP": 23, "RIGHT_HIP": 24, "LEFT_KNEE": 25,
+    "RIGHT_KNEE": 26, "LEFT_ANKLE": 27, "RIGHT_ANKLE": 28,
+}
+NUM_LANDMARKS = 33
+
+EXERCISES = {
+    "Bench Press": {"metric": "angle", "joints": ("LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"),
+                    "enter": ("<", 90), "exit": (">", 160)},
+    "Bicep Curls": {"metric": "angle", "joints": ("LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"),
+                    "enter": ("<", 45), "exit": (">", 160)},
+    "Lateral Raises": {"metric": "angle", "joints": ("LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"),
+                       "enter": (">", 90), "exit": ("<", 40)},
+    # The dy exercises enter and exit at the same threshold, so they need a
+    # margin (normalized image height); the angle exercises are already far apart.
+    "Squats": {"metric": "dy", "joints": ("LEFT_HIP", "LEFT_KNEE"),
+               "enter": (">", 0), "exit": ("<", 0), "hysteresis": 0.02},
+    "Push-ups": {"metric": "dy", "joints": ("LEFT_SHOULDER", "LEFT_ELBOW"),
+                 "enter": (">", 0), "exit": ("<", 0), "hysteresis": 0.015},
+    "Shoulder Presses": {"metric": "dy", "joints": ("LEFT_ELBOW", "LEFT_SHOULDER"),
+                         "enter": (">", 0), "exit": ("<", 0), "hysteresis": 0.02},
+}
+
+def landmarks_to_array(landmarks, out=None):
+    """Copy a MediaPipe landmark list into an (N, 2) float32 array of (x, y)."""
+    if out is None:
+        out = np.empty((len(landmarks), 2), dtype=np.float32)
+    out[:] = [(lm.x, lm.y) for lm in landmarks]
+    return out
+
+def joint_angles(points, a, b, c):
+    """
+    Angles in degrees at b for index arrays (a, b, c), vectorized over any
+    leading axes: points is (..., 33, 2) and the result is (..., len(b)).
+    """
+    ba = points[..., a, :] - points[..., b, :]
+    bc = points[..., c, :] - points[..., b, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine = (ba * bc).sum(axis=-1) / (np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1))
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+def _threshold(op, value, margin):
+    """Shift a threshold by the hysteresis margin: "> t" becomes "> t + m", "< t" becomes "< t - m"."""
+    return value + margin if op == ">" else value - margin
+
+class RepCounter:
+    def __init__(self, exercise_type, definitions=EXERCISES):
+        self.exercise_type = exercise_type
+        self.definition = definitions.get(exercise_type)
+        if self.definition is None:
+            print(f"Unknown exercise type '{exercise_type}'; reps will not be counted.", file=sys.stderr)
+        else:
+            self.joint_list = [LANDMARKS[name] for name in self.definition["joints"]]
+            self.joints = np.array(self.joint_list, dtype=np.intp)
+            # Reused per frame so live updates only gather the joints they need.
+            self._frame = np.empty((len(self.joint_list), 2), dtype=np.float64)
+            margin = self.definition.get("hysteresis", 0)
+            enter_op, enter_value = self.definition["enter"]
+            exit_op, exit_value = self.definition["exit"]
+            self.enter = (enter_op, _threshold(enter_op, enter_value, margin))
+            self.exit = (exit_op, _threshold(exit_op, exit_value, margin))
+        self.rep_count = 0
+        self.is_active = False
+
+    def signal(self, points):
+        """The exercise metric for one (33, 2) frame or a (T, 33, 2) sequence."""
+        points = np.asarray(points, dtype=np.float32)
+        if self.definition["metric"] == "angle":
+            a, b, c = self.joints[0:1], self.joints[1:2], self.joints[2:3]
+            return joint_angles(points, a, b, c)[..., 0]
+        return points[..., self.joints[0], 1] - points[..., self.joints[1], 1]
+
+    def frame_signal(self, landmarks):
+        """
+        The metric for one MediaPipe landmark list. Only the exercise's joints
+        are gathered (into a reused buffer), which keeps the per-frame cost
+        below the old three-np.array calculate_angle.
+        """
+        frame = self._frame
+        frame[:] = [(landmarks[i].x, landmarks[i].y) for i in self.joint_list]
+        if self.definition["metric"] != "angle":
+            return frame[0, 1] - frame[1, 1]
+        ba = frame[0] - frame[1]
+        bc = frame[2] - frame[1]
+        denominator = np.sqrt((ba @ ba) * (bc @ bc))
+        if denominator == 0:
+            return float("nan")
+        return float(np.degrees(np.arccos(min(max(ba @ bc / denominator, -1.0), 1.0))))
+
+    @staticmethod
+    def _check(condition, value):
+        op, threshold = condition
+        return value < threshold if op == "<" else value > threshold
+
+    def step(self, value):
+        """
+        Advance the state machine with one metric value. Returns "started",
+        "completed" or None.
+        """
+        if self.definition is None:
+            return None
+        if not self.is_active and self._check(self.enter, value):
+            self.is_active = True
+            return "started"
+        if self.is_active and self._check(self.exit, value):
+            self.rep_count += 1
+            self.is_active = False
+            return "completed"
+        return None
+
+    def update(self, points):
+        """Feed one frame of landmarks ((33, 2) array or a MediaPipe landmark list); returns the rep count."""
+        if self.definition is None:
+            return self.rep_count
+        if isinstance(points, np.ndarray):
+            self.step(float(self.signal(points)))
+        else:
+            self.step(self.frame_signal(points))
+        return self.rep_count
@@ -0,0 +1,111 @@
+"""
+Adaptive-resolution pose inference for the exercise scripts.
+
+Instead of converting and running pose on every full-resolution frame,
+RoiTracker:
+
+  * crops the frame to the person's bounding box, tracked from the previous
+    frame's landmarks (plus a margin); the full frame is used until a pose is
+    found and again whenever it is lost,
+  * downscales the crop so its longest side is at most `inference_size`,
+  * runs cvtColor on that small image only, and
+  * maps the resulting landmarks back to normalized full-frame coordinates,
+    so RepCounter thresholds and drawing behave exactly as before.
+
+The crop moves from frame to frame, which breaks MediaPipe's own
+frame-to-frame tracking, so the pose estimator handed to process() must be
+created with static_image_mode=True; RoiTracker does the tracking instead.
+
+The annotated output resolution is independent of all this; see
+resize_for_output.
+"""
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+Landmark = namedtuple("Landmark", "x y z visibility")
+
+def resize_for_output(frame, output_width):
+    """Downscale a frame to output_width pixels wide (keeping aspect); never upscales."""
+    if not output_width or frame.shape[1] <= output_width:
+        return frame
+    height = int(round(frame.shape[0] * output_width / frame.shape[1]))
+    return cv2.resize(frame, (output_width, height), interpolation=cv2.INTER_AREA)
+
+class RoiTracker:
+    def __init__(self, inference_size=256, margin=0.25, min_visibility=0.5, min_visible=8, min_roi=0.2):
+        """
+        inference_size: longest side (pixels) of the image handed to pose.process
+        margin:         bounding box padding, as a fraction of the box size per side
+        min_visibility: landmarks below this visibility don't shape the box
+        min_visible:    fewer visible landmarks than this resets to the full frame
+        min_roi:        smallest crop side, as a fraction of the frame side
+        """
+        self.inference_size = inference_size
+        self.margin = margin
+        self.min_visibility = min_visibility
+        self.min_visible = min_visible
+        self.min_roi = min_roi
+        self.box = None  # (x0, y0, x1, y1) normalized frame coordinates
+        self.frames = 0
+        self.cropped_frames = 0
+
+    def prepare(self, frame):
+        """Return (rgb_input, region) where region = (x0, y0, w, h) in frame pixels."""
+        frame_h, frame_w = frame.shape[:2]
+        if self.box is None:
+            x0, y0, x1, y1 = 0, 0, frame_w, frame_h
+        else:
+            bx0, by0, bx1, by1 = self.box
+            x0, x1 = int(bx0 * frame_w), int(np.ceil(bx1 * frame_w))
+            y0, y1 = int(by0 * frame_h), int(np.ceil(by1 * frame_h))
+            self.cropped_frames += 1
+        self.frames += 1
+
+        crop = frame[y0:y1, x0:x1]
+        scale = self.inference_size / max(crop.shape[:2]) if self.inference_size else 1.0
+        if scale < 1.0:
+            size = (max(int(crop.shape[1] * scale), 1), max(int(crop.shape[0] * scale), 1))
+            crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB), (x0, y0, x1 - x0, y1 - y0)
+
+    def to_frame(self, landmarks, region, frame_shape):
+        """Map landmarks normalized to the region back to normalized frame coordinates."""
+        frame_h, frame_w = frame_shape[:2]
+        x0, y0, w, h = region
+        sx, sy = w / frame_w, h / frame_h
+        ox, oy = x0 / frame_w, y0 / frame_h
+        return [Landmark(ox + lm.x * sx, oy + lm.y * sy, lm.z * sx, lm.visibility) for lm in landmarks]
+
+    def update(self, landmarks):
+        """Track the next region from frame-normalized landmarks (None when no pose was found)."""
+        if landmarks is None:
+            self.box = None
+            return
+        visible = np.array([(lm.x, lm.y) for lm in landmarks if lm.visibility >= self.min_visibility])
+        if len(visible) < self.min_visible:
+            self.box = None
+            return
+        (x0, y0), (x1, y1) = visible.min(axis=0), visible.max(axis=0)
+        pad_x = max((x1 - x0) * self.margin, (self.min_roi - (x1 - x0)) / 2, 0)
+        pad_y = max((y1 - y0) * self.margin, (self.min_roi - (y1 - y0)) / 2, 0)
+        box = (max(x0 - pad_x, 0.0), max(y0 - pad_y, 0.0), min(x1 + pad_x, 1.0), min(y1 + pad_y, 1.0))
+        self.box = box if box[2] > box[0] and box[3] > box[1] else None
+
+    def process(self, pose, frame):
+        """
+        Run pose (a static_image_mode=True estimator) on the tracked region;
+        returns frame-normalized landmarks or None.
+        """
+        rgb, region = self.prepare(frame)
+        results = pose.process(rgb)
+        landmarks = None
+        if results.pose_landmarks:
+            landmarks = self.to_frame(results.pose_landmarks.landmark, region, frame.shape)
+        self.update(landmarks)
+        return landmarks
+
+    def stats(self):
+        return {"inference_size": self.inference_size, "frames": self.frames,
+                "cropped_ratio": round(self.cropped_frames / self.frames, 3) if self.frames else 0.0}
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+"""
+Long-running exercise session server.
+
+Hosts many concurrent exercise sessions over a local TCP socket. Each session
+keeps its own rep state (a RepCounter), while pose estimation draws on a
+bounded pool of warm mp_pose.Pose instances, so mediapipe is imported and its
+models loaded once for all users instead of once per spawned process.
+
+Pooled estimators run with static_image_mode=True: an estimator serves
+frames from different sessions back to back, so it must not carry tracking
+state from one user's frame into another's.
+
+Wire protocol (all integers big-endian). Client -> server messages are a
+5-byte header (type u8, length u32) followed by `length` payload bytes:
+    1 HELLO  JSON {"exercise_type": "Squats"}
+    2 FRAME  JPEG bytes
+    3 STATS  empty
+    4 BYE    empty
+Server -> client replies are JSON lines, e.g.
+    {"event": "ready", "session_id": 3}
+    {"frame_index": 12, "rep_count": 2, "latency_ms": 31.4}
+    {"frame_index": 13, "dropped": true}
+    {"error": "server busy"}
+
+Admission control: at most --max-sessions sessions are accepted (others get
+"server busy"), and a frame that cannot get an estimator within --max-wait-ms
+is dropped rather than queued, so a saturated pool sheds load instead of
+building latency.
+
+Usage:
+    python session_server.py [--host 127.0.0.1] [--port 5010] [--pool-size 4]
+        [--max-sessions 32] [--max-wait-ms 100]
+"""
+import sys
+import json
+import time
+import struct
+import asyncio
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import mediapipe as mp
+
+from rep_counter import RepCounter
+from pipeline import StageStats
+
+mp_pose = mp.solutions.pose
+
+MSG_HELLO, MSG_FRAME, MSG_STATS, MSG_BYE = 1, 2, 3, 4
+REQUEST_HEADER = struct.Struct("!BI")
+MAX_PAYLOAD = 16 * 1024 * 1024
+
+class RateMeter:
+    """Frames per second over a sliding time window."""
+
+    def __init__(self, window_s=5.0):
+        self.window_s = window_s
+        self.times = deque()
+
+    def tick(self):
+        now = time.monotonic()
+        self.times.append(now)
+        while self.times and now - self.times[0] > self.window_s:
+            self.times.popleft()
+
+    def fps(self):
+        if len(self.times) < 2:
+            return 0.0
+        span = self.times[-1] - self.times[0]
+        return round((len(self.times) - 1) / span, 2) if span > 0 else 0.0
+
+# ----------------- Pose Pool -----------------
+class PosePool:
+    """A fixed set of warm Pose estimators shared by all sessions."""
+
+    def __init__(self, size):
+        self.size = size
+        self.executor = ThreadPoolExecutor(max_workers=size)
+        self.idle = asyncio.Queue()
+        for _ in range(size):
+            self.idle.put_nowait(mp_pose.Pose(static_image_mode=True, min_detection_confidence=0.5))
+
+    async def run(self, fn, max_wait_s):
+        """Run fn(pose) on an idle estimator; raises asyncio.TimeoutError if none frees up in time."""
+        pose = await asyncio.wait_for(self.idle.get(), timeout=max_wait_s)
+        loop = asyncio.get_running_loop()
+        future = self.executor.submit(fn, pose)
+        # Return the estimator when the executor is done with it, not when the
+        # awaiting task finishes: a cancelled task leaves fn still running.
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self.idle.put_nowait, pose))
+        return await asyncio.wrap_future(future)
+
+    def busy(self):
+        return self.size - self.idle.qsize()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+# ----------------- Sessions -----------------
+class Session:
+    def __init__(self, session_id, exercise_type):
+        self.session_id = session_id
+        self.counter = RepCounter(exercise_type)
+        self.frames = 0
+        self.dropped = 0
+        self.latency = StageStats()
+        self.rate = RateMeter()
+        self.started = time.monotonic()
+
+    def stats(self):
+        return {
+            "session_id": self.session_id,
+            "exercise_type": self.counter.exercise_type,
+            "rep_count": self.counter.rep_count,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "fps": self.rate.fps(),
+            "latency": self.latency.snapshot(),
+            "age_s": round(time.monotonic() - self.started, 1),
+        }
+
+def estimate_landmarks(jpeg, pose):
+    """Decode a JPEG and run pose on it; returns a MediaPipe landmark list or None."""
+    frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+    results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    return results.pose_landmarks.landmark if results.pose_landmarks else None
+
+def parse_hello(payload):
+    """The decoded HELLO payload ({} when empty), or None when it is not valid JSON.
+
+    Valid JSON may still be a list, string or number; the caller checks for an object.
+    """
+    try:
+        return json.loads(payload or b"{}")
+    except ValueError:
+        return None
+
+class SessionServer:
+    def __init__(self, pool_size=4, max_sessions=32, max_wait_ms=100):
+        self.pool = PosePool(pool_size)
+        self.max_sessions = max_sessions
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.rejected = 0
+        self.latency = StageStats()
+        self.rate = RateMeter()
+
+    def stats(self):
+        return {
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "rejected_sessions": self.rejected,
+            "pool": {"size": self.pool.size, "busy": self.pool.busy()},
+            "fps": self.rate.fps(),
+            "latency": self.latency.snapshot(),
+            "per_session": [session.stats() for session in self.sessions.values()],
+        }
+
+    async def handle(self, reader, writer):
+        def send(payload):
+            writer.write((json.dumps(payload) + "\n").encode("utf-8"))
+
+        session = None
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(REQUEST_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                msg_type, length = REQUEST_HEADER.unpack(header)
+                if length > MAX_PAYLOAD:
+                    send({"error": "payload too large"})
+                    break
+                payload = await reader.readexactly(length) if length else b""
+
+                if msg_type == MSG_HELLO:
+                    hello = parse_hello(payload)
+                    if session is not None:
+                        send({"error": "session already started"})
+                    elif len(self.sessions) >= self.max_sessions:
+                        self.rejected += 1
+                        send({"error": "server busy"})
+                        break
+                    elif not isinstance(hello, dict):
+                        send({"error": "HELLO payload must be a JSON object"})
+                    else:
+                        session = Session(next(self.ids), hello.get("exercise_type", "Bench Press"))
+                        self.sessions[session.session_id] = session
+                        send({"event": "ready", "session_id": session.session_id})
+                elif msg_type == MSG_FRAME:
+                    if session is None:
+                        send({"error": "send HELLO first"})
+                    else:
+                        send(await self.process_frame(session, payload))
+                elif msg_type == MSG_STATS:
+                    send(self.stats() if session is None else {"session": session.stats(), "server": self.stats()})
+                elif msg_type == MSG_BYE:
+                    if session is not None:
+                        send({"event": "bye", **session.stats()})
+                    break
+                else:
+                    send({"error": f"unknown message type {msg_type}"})
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"Session error: {e}", file=sys.stderr)
+        finally:
+            if session is not None:
+                self.sessions.pop(session.session_id, None)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+
+    async def process_frame(self, session, jpeg):
+        frame_index = session.frames
+        session.frames += 1
+        started = time.perf_counter()
+        try:
+            landmarks = await self.pool.run(lambda pose: estimate_landmarks(jpeg, pose), self.max_wait_s)
+        except asyncio.TimeoutError:
+            session.dropped += 1
+            return {"frame_index": frame_index, "dropped": True}
+        if landmarks is not None:
+            session.counter.update(landmarks)
+        latency_ms = (time.perf_counter() - started) * 1000
+        session.latency.record(latency_ms)
+        self.latency.record(latency_ms)
+        session.rate.tick()
+        self.rate.tick()
+        return {"frame_index": frame_index, "rep_count": session.counter.rep_count,
+                "pose_detected": landmarks is not None, "latency_ms": round(latency_ms, 2)}
+
+async def main(args):
+    server_state = SessionServer(args.pool_size, args.max_sessions, args.max_wait_ms)
+    server = await asyncio.start_server(server_state.handle, args.host, args.port)
+    print(json.dumps({"event": "listening", "host": args.host, "port": args.port,
+                      "pool_size": args.pool_size}), file=sys.stderr, flush=True)
+    try:
+        async with server:
+            while True:
+                await asyncio.sleep(args.stats_interval)
+                print(json.dumps({"event": "stats", **{k: v for k, v in server_state.stats().items()
+                                                       if k != "per_session"}}), file=sys.stderr, flush=True)
+    finally:
+        server_state.pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve exercise sessions from a shared pool of pose estimators.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5010)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-sessions", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=100)
+    parser.add_argument("--stats-interval", type=float, default=30, help="Seconds between stats lines on stderr")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
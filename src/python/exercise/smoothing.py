@@ -0,0 +1,110 @@
+"""
+Temporal filtering of pose landmarks ahead of rep counting.
+
+The rep state machine reacts to single-frame values, so landmark jitter
+around a threshold double counts unless pose runs at a high FPS.
+LandmarkSmoother applies a One-Euro filter (Casiez et al., 2012) to all 33
+landmarks at once: a low-pass filter whose cutoff rises with speed, so slow
+phases (the top and bottom of a rep, where thresholds sit) are smoothed
+hard, while fast movement is followed with little lag.
+
+Recent raw landmarks are kept in a fixed NumPy ring buffer and the speed is
+estimated across that window rather than between the last two frames, which
+keeps the filter stable when frames are sparse (low sampled FPS). The filter
+is timestamp driven, so any sampling rate, or dropped frames, is handled.
+"""
+import numpy as np
+
+from rep_counter import NUM_LANDMARKS, landmarks_to_array
+
+class LandmarkRing:
+    """Fixed-capacity ring buffer of (33, 2) landmark frames and their timestamps."""
+
+    def __init__(self, capacity=5, num_landmarks=NUM_LANDMARKS):
+        self.points = np.zeros((capacity, num_landmarks, 2), dtype=np.float32)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.capacity = capacity
+        self.count = 0
+        self.head = 0  # slot the next frame goes into
+
+    def push(self, points, timestamp):
+        self.points[self.head] = points
+        self.times[self.head] = timestamp
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def oldest(self):
+        """(points, timestamp) of the oldest frame; points is a view that the next push may overwrite."""
+        slot = (self.head - self.count) % self.capacity
+        return self.points[slot], self.times[slot]
+
+    def clear(self):
+        self.count = 0
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class LandmarkSmoother:
+    def __init__(self, min_cutoff=1.0, beta=0.5, d_cutoff=1.0, window=4, max_gap_s=1.0):
+        """
+        min_cutoff: cutoff frequency (Hz) at rest; lower = smoother, more lag
+        beta:       how fast the cutoff rises with speed (normalized units/s)
+        d_cutoff:   cutoff frequency (Hz) for the speed estimate
+        window:     frames in the ring buffer used to estimate speed
+        max_gap_s:  a longer gap between frames (e.g. pose lost) resets the filter
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_gap_s = max_gap_s
+        self.ring = LandmarkRing(window)
+        self._raw = np.empty((NUM_LANDMARKS, 2), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self.ring.clear()
+        self.value = None
+        self.speed = None
+        self.last_time = None
+
+    def filter(self, points, timestamp):
+        """Smooth one (33, 2) frame observed at `timestamp` seconds; returns the filtered frame."""
+        points = np.asarray(points, dtype=np.float32)
+        if self.last_time is not None and (timestamp <= self.last_time or
+                                           timestamp - self.last_time > self.max_gap_s):
+            self.reset()
+        if self.value is None:
+            self.ring.push(points, timestamp)
+            self.value = points.astype(np.float64)
+            self.speed = np.zeros(points.shape[0], dtype=np.float64)
+            self.last_time = timestamp
+            return self.value.astype(np.float32)
+
+        dt = timestamp - self.last_time
+        old_points, old_time = self.ring.oldest()
+        # Per-landmark speed over the buffered window, itself low-passed. It is
+        # computed before the push: once the ring is full, the push overwrites
+        # the oldest slot that old_points views.
+        span = max(timestamp - old_time, dt)
+        speed = np.linalg.norm(points - old_points, axis=-1) / span
+        self.ring.push(points, timestamp)
+        self.speed += _alpha(self.d_cutoff, dt) * (speed - self.speed)
+
+        cutoff = self.min_cutoff + self.beta * self.speed
+        alpha = _alpha(cutoff, dt)[:, None]
+        self.value += alpha * (points - self.value)
+        self.last_time = timestamp
+        return self.value.astype(np.float32)
+
+    def apply(self, landmarks, timestamp):
+        """Smooth a MediaPipe landmark list; returns a (33, 2) array for RepCounter.update."""
+        return self.filter(landmarks_to_array(landmarks, self._raw), timestamp)
+
+def smooth_sequence(points, timestamps, **params):
+    """Filter a (T, 33, 2) landmark sequence; returns a new (T, 33, 2) array."""
+    smoother = LandmarkSmoother(**params)
+    smoothed = np.empty_like(np.asarray(points, dtype=np.float32))
+    for i, (frame, timestamp) in enumerate(zip(points, timestamps)):
+        smoothed[i] = smoother.filter(frame, timestamp)
+    return smoothed
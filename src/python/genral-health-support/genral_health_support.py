@@ -2,13 +2,31 @@
 import sys
 import os
 import json
-import re
-import tempfile
-import base64
+import time
 from dotenv import load_dotenv
-from deep_translator import GoogleTranslator
-from gtts import gTTS
-import google.generativeai as genai
+# Gemini calls go through the shared gateway (pooled client, retries, metrics).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm-gateway"))
+from gateway import generate, stream_generate, response_text, GatewayError
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import write_ndjson, pop_flag
+# Translation goes through the shared layer (sentence cache, chunking, pluggable backend).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "translation"))
+from translation import translate
+# Speech goes through the shared module (in-memory, per-sentence, cached audio).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "speech"))
+from speech import synthesize_base64
+from staged import write_staged
+# --no-cache forces a fresh Gemini call instead of a cached response.
+BYPASS_CACHE = pop_flag("--no-cache")
+# --stream writes NDJSON: {"type": "chunk", "text": ...} lines as the model
+# produces them, then {"type": "done", "recommendation": ..., "audio": ...}.
+STREAM = pop_flag("--stream")
+# --staged writes NDJSON too: the full text as soon as it exists, then the
+# audio as a follow-up message (see speech/staged.py). With --stream the
+# staged messages follow the chunks in place of the single "done" message.
+STAGED = pop_flag("--staged")
+# Bump when the prompt changes so cached responses for the old prompt are not reused.
+PROMPT_VERSION = "general-health-v1"
 
 # Load environment variables
 load_dotenv()
@@ -17,17 +35,17 @@ if not API_KEY:
     print("GEMINI_API_KEY not found.", file=sys.stderr)
     sys.exit(1)
 
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
-
-def text_to_speech(text, lang):
-    # Remove asterisks and URLs from text
-    text = re.sub(r'\*+', '', text)
-    text = re.sub(r'http\S+', '', text)
-    tts = gTTS(text=text, lang=lang)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-        tts.save(temp_audio.name)
-        return temp_audio.name
+def stream_recommendation(prompt):
+    """Forward model output as NDJSON chunks; returns (full text, first chunk latency in ms)."""
+    started = time.perf_counter()
+    first_chunk_ms = None
+    texts = []
+    for text in stream_generate(prompt, api_key=API_KEY, template=PROMPT_VERSION, bypass_cache=BYPASS_CACHE):
+        if first_chunk_ms is None:
+            first_chunk_ms = round((time.perf_counter() - started) * 1000, 2)
+        texts.append(text)
+        write_ndjson({"type": "chunk", "text": text})
+    return "".join(texts), first_chunk_ms
 
 def main():
     # Expect at least one argument: symptoms text; optionally a second for language ("en" or "hi")
@@ -45,33 +63,60 @@ def main():
         f"Ensure the links are up-to-date and add a disclaimer at the end."
     )
     
-    response = model.generate_content(prompt)
-    recommendation = response.text
+    started = time.perf_counter()
+    try:
+        if STREAM:
+            # Chunks carry the model's English text; for Hindi the translated
+            # recommendation arrives with the final "done" message.
+            recommendation, first_chunk_ms = stream_recommendation(prompt)
+        else:
+            recommendation = response_text(generate(prompt, api_key=API_KEY,
+                                                    template=PROMPT_VERSION, bypass_cache=BYPASS_CACHE))
+    except GatewayError as e:
+        if STREAM or STAGED:
+            write_ndjson({"type": "error", "error": f"Error generating recommendation: {e}"})
+        print(f"Error generating recommendation: {e}", file=sys.stderr)
+        sys.exit(1)
+    if STAGED:
+        try:
+            _, latency = write_staged(recommendation, "hi" if language.lower() == "hi" else "en", write_ndjson,
+                                      "recommendation", translate, started)
+        except Exception as e:
+            write_ndjson({"type": "error", "error": f"Error generating response: {e}"})
+            print(f"Error generating response: {e}", file=sys.stderr)
+            sys.exit(1)
+        if STREAM:
+            latency["first_text_ms"] = first_chunk_ms
+        print(json.dumps({"latency": latency}), file=sys.stderr)
+        return
+
     if language.lower() == "hi":
-        recommendation = GoogleTranslator(source="en", target="hi").translate(recommendation)
+        recommendation = translate(recommendation)
         tts_lang = "hi"
     else:
         tts_lang = "en"
     
-    audio_file = text_to_speech(recommendation, tts_lang)
+    # Asterisks and URLs are stripped before synthesis (see speech.clean_text).
     try:
-        with open(audio_file, "rb") as af:
-            audio_bytes = af.read()
-        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+        audio_base64, audio_mime, speech_stats = synthesize_base64(recommendation, tts_lang)
     except Exception as e:
-        print(f"Error reading audio file: {e}", file=sys.stderr)
+        print(f"Error generating audio: {e}", file=sys.stderr)
         sys.exit(1)
-    finally:
-        try:
-            os.unlink(audio_file)
-        except Exception:
-            pass
+    print(json.dumps({"speech": speech_stats}), file=sys.stderr)
     
     result = {
         "recommendation": recommendation,
-        "audio": audio_base64
+        "audio": audio_base64,
+        "audio_mime": audio_mime
     }
-    print(json.dumps(result))
+    total_ms = round((time.perf_counter() - started) * 1000, 2)
+    if STREAM:
+        write_ndjson({"type": "done", **result, "first_chunk_ms": first_chunk_ms,
+                      "total_ms": total_ms, "speech": speech_stats})
+    else:
+        print(json.dumps(result))
+    print(json.dumps({"latency": {"first_text_ms": first_chunk_ms if STREAM else total_ms, "total_ms": total_ms}}),
+          file=sys.stderr)
     
 if __name__ == "__main__":
     main()
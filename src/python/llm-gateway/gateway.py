@@ -0,0 +1,330 @@
+"""
+Shared Gemini client for every LLM feature (radiology, ai-doctor, report
+inference, report comparison and general health support).
+
+All calls go through one GeminiClient:
+
+  * a pooled keep-alive requests.Session, so repeated calls from the same
+    process reuse the TLS connection,
+  * a concurrency limit (semaphore) on in-flight calls,
+  * retries with exponential backoff and full jitter on 429 and 5xx responses
+    and on connection errors, honouring Retry-After,
+  * per-call latency and token metrics (usageMetadata).
+
+The scripts are short-lived processes, so on their own they still pay a TLS
+handshake per run. Setting LLM_GATEWAY_URL (e.g. http://127.0.0.1:5006)
+points them at gateway_server.py, a resident process exposing the same
+generateContent path over plain local HTTP, which keeps the upstream
+connections warm and applies the concurrency limit and metrics across all
+features. GEMINI_API_BASE overrides the upstream itself, e.g. to test against
+mock_gemini.py.
+
+stream_generate() uses streamGenerateContent (server-sent events) and yields
+text as it is produced, for callers that forward partial output.
+
+Calls that name a prompt template version are answered from the SQLite
+response cache when possible (see response_cache.py); pass
+bypass_cache=True (the scripts' --no-cache flag) to force a fresh call.
+
+Scripts import this module by adding its directory to sys.path:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm-gateway"))
+    from gateway import generate, response_text, GatewayError
+"""
+import os
+import sys
+import json
+import time
+import random
+import base64
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from response_cache import get_cache
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+UPSTREAM_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1")
+GATEWAY_URL = os.getenv("LLM_GATEWAY_URL")
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+REQUEST_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "120"))
+# One JSON line per call on stderr (latency, tokens, retries) when set.
+LOG_CALLS = os.getenv("LLM_METRICS_LOG") == "1"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class GatewayError(Exception):
+    """A call that failed for good (non-retryable status or retries exhausted)."""
+
+    def __init__(self, message, status=None, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+# ----------------- Metrics -----------------
+class CallMetrics:
+    """Thread-safe call counters with a rolling window of recent latencies."""
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.in_flight = 0
+
+    def record(self, latency_ms, ok, retries, usage):
+        with self.lock:
+            self.latencies.append(latency_ms)
+            self.calls += 1
+            self.retries += retries
+            if not ok:
+                self.errors += 1
+            self.prompt_tokens += usage.get("promptTokenCount", 0)
+            self.output_tokens += usage.get("candidatesTokenCount", 0)
+
+    def snapshot(self):
+        with self.lock:
+            values = sorted(self.latencies)
+            summary = {"calls": self.calls, "errors": self.errors, "retries": self.retries,
+                       "in_flight": self.in_flight,
+                       "tokens": {"prompt": self.prompt_tokens, "output": self.output_tokens}}
+        if values:
+            summary["latency_ms"] = {
+                "avg": round(sum(values) / len(values), 2),
+                "p50": round(values[len(values) // 2], 2),
+                "p99": round(values[min(len(values) - 1, int(len(values) * 0.99))], 2),
+                "max": round(values[-1], 2),
+            }
+        return summary
+
+# ----------------- Client -----------------
+class GeminiClient:
+    def __init__(self, api_base=UPSTREAM_BASE, api_key=None, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, backoff_base_s=0.5, backoff_max_s=8.0, timeout_s=REQUEST_TIMEOUT_S):
+        self.api_base = api_base.rstrip("/")
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.timeout_s = timeout_s
+        self.limit = threading.BoundedSemaphore(max_concurrency)
+        self.metrics = CallMetrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def url(self, model, method="generateContent"):
+        return f"{self.api_base}/models/{model}:{method}"
+
+    def backoff(self, attempt, retry_after=None):
+        """Seconds to wait before retry `attempt` (1-based): Retry-After if given, else full jitter."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max_s)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** (attempt - 1)))
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the max_concurrency call slots."""
+        with self.limit:
+            with self.metrics.lock:
+                self.metrics.in_flight += 1
+            try:
+                yield
+            finally:
+                with self.metrics.lock:
+                    self.metrics.in_flight -= 1
+
+    def post(self, url, body, api_key=None, params=None, stream=False):
+        """
+        POST with the retry policy applied (call within slot()). Returns
+        (response, retries); non-retryable failures raise GatewayError.
+        """
+        key = api_key or self.api_key
+        # In a header rather than ?key=, so the key never shows up in access logs.
+        headers = {"x-goog-api-key": key} if key else None
+        retries = 0
+        while True:
+            try:
+                response = self.session.post(url, params=params, json=body, headers=headers,
+                                             timeout=self.timeout_s, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if retries >= self.max_retries:
+                    raise GatewayError(f"Request failed after {retries} retries: {e}") from e
+                retries += 1
+                time.sleep(self.backoff(retries))
+                continue
+            if response.status_code in RETRY_STATUSES and retries < self.max_retries:
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+                retries += 1
+                time.sleep(self.backoff(retries, retry_after))
+                continue
+            if response.status_code >= 400:
+                raise GatewayError(error_message(response), status=response.status_code, body=response.text)
+            return response, retries
+
+    def generate_content(self, body, model=DEFAULT_MODEL, api_key=None):
+        """Call models/{model}:generateContent with a request body; returns the response JSON."""
+        started = time.perf_counter()
+        retries, usage, ok = 0, {}, False
+        try:
+            with self.slot():
+                response, retries = self.post(self.url(model), body, api_key)
+                result = response.json()
+            usage = result.get("usageMetadata", {})
+            ok = True
+            return result
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record(latency_ms, ok, retries, usage)
+            log_call(model, latency_ms, ok, retries, usage)
+
+    def stream_generate_content(self, body, model=DEFAULT_MODEL, api_key=None):
+        """
+        Call models/{model}:streamGenerateContent (server-sent events) and
+        yield each response chunk JSON as it arrives. Retries only apply
+        before the first byte; the call slot is held until the stream ends.
+        """
+        started = time.perf_counter()
+        retries, usage, ok, first_chunk_ms = 0, {}, False, None
+        try:
+            with self.slot():
+                response, retries = self.post(self.url(model, "streamGenerateContent"), body, api_key,
+                                              params={"alt": "sse"}, stream=True)
+                with response:
+                    # chunk_size=None hands over each network chunk as it arrives
+                    # instead of waiting to fill a fixed-size read. Lines are decoded
+                    # here: requests would assume ISO-8859-1 for text/event-stream.
+                    for line in response.iter_lines(chunk_size=None):
+                        if not line.startswith(b"data:"):
+                            continue
+                        chunk = json.loads(line[5:].decode("utf-8"))
+                        if first_chunk_ms is None:
+                            first_chunk_ms = (time.perf_counter() - started) * 1000
+                        usage = chunk.get("usageMetadata", usage)
+                        yield chunk
+            ok = True
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record(latency_ms, ok, retries, usage)
+            log_call(model, latency_ms, ok, retries, usage, first_chunk_ms)
+
+def error_message(response):
+    try:
+        return response.json()["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        return f"HTTP {response.status_code}: {response.text[:200]}"
+
+def log_call(model, latency_ms, ok, retries, usage, first_chunk_ms=None):
+    if LOG_CALLS:
+        call = {"model": model, "latency_ms": round(latency_ms, 2), "ok": ok, "retries": retries,
+                "prompt_tokens": usage.get("promptTokenCount"), "output_tokens": usage.get("candidatesTokenCount")}
+        if first_chunk_ms is not None:
+            call["first_chunk_ms"] = round(first_chunk_ms, 2)
+        print(json.dumps({"llm_call": call}), file=sys.stderr, flush=True)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """The process-wide client: through the resident gateway when LLM_GATEWAY_URL is set."""
+    global _client
+    with _client_lock:
+        if _client is None and GATEWAY_URL:
+            # The gateway already retries upstream; don't multiply its attempts.
+            _client = GeminiClient(api_base=f"{GATEWAY_URL.rstrip('/')}/v1", max_retries=0)
+        elif _client is None:
+            _client = GeminiClient()
+        return _client
+
+# ----------------- Request/Response Helpers -----------------
+def image_part(image_bytes, mime_type="image/png"):
+    return {"inlineData": {"mimeType": mime_type, "data": base64.b64encode(image_bytes).decode("utf-8")}}
+
+def build_body(prompt):
+    """A generateContent body from a prompt string or a list of parts (strings or part dicts)."""
+    parts = [prompt] if isinstance(prompt, str) else prompt
+    return {"contents": [{"role": "user",
+                          "parts": [{"text": part} if isinstance(part, str) else part for part in parts]}]}
+
+def generate(prompt, model=DEFAULT_MODEL, api_key=None, template=None, bypass_cache=False):
+    """
+    Generate content for a prompt (string or list of parts); returns the
+    response JSON. `template` is the caller's prompt template version (e.g.
+    "radiology-v1"); only calls that give one are cached.
+    """
+    body = build_body(prompt)
+    cache = get_cache() if template else None
+    if cache is None:
+        return get_client().generate_content(body, model, api_key)
+
+    key = cache.make_key(model, template, body)
+    if bypass_cache or os.getenv("LLM_CACHE_BYPASS") == "1":
+        cache.record_bypass(template)
+    else:
+        cached = cache.get(key, template)
+        if cached is not None:
+            return cached
+    started = time.perf_counter()
+    response = get_client().generate_content(body, model, api_key)
+    cache.put(key, model, template, response, (time.perf_counter() - started) * 1000)
+    return response
+
+def stream_generate(prompt, model=DEFAULT_MODEL, api_key=None, template=None, bypass_cache=False):
+    """
+    Like generate(), but yields the response text in chunks as they arrive. A
+    cached response is yielded as a single chunk; a completed stream is
+    cached like a generate() response.
+    """
+    body = build_body(prompt)
+    cache = get_cache() if template else None
+    key = cache.make_key(model, template, body) if cache else None
+    if cache is not None:
+        if bypass_cache or os.getenv("LLM_CACHE_BYPASS") == "1":
+            cache.record_bypass(template)
+        else:
+            cached = cache.get(key, template)
+            if cached is not None:
+                yield response_text(cached)
+                return
+
+    started = time.perf_counter()
+    texts, usage = [], {}
+    for chunk in get_client().stream_generate_content(body, model, api_key):
+        usage = chunk.get("usageMetadata", usage)
+        text = chunk_text(chunk)
+        if text:
+            texts.append(text)
+            yield text
+    if cache is not None:
+        response = {"candidates": [{"content": {"role": "model", "parts": [{"text": "".join(texts)}]}}],
+                    "usageMetadata": usage}
+        cache.put(key, model, template, response, (time.perf_counter() - started) * 1000)
+
+def response_text(response_json):
+    """The text of the first candidate, like the SDK's response.text."""
+    try:
+        parts = response_json["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError, TypeError):
+        raise GatewayError("No candidates in response", body=response_json)
+    return "".join(part.get("text", "") for part in parts)
+
+def chunk_text(chunk):
+    """The text in one streamed chunk ("" for chunks that carry only metadata)."""
+    try:
+        return "".join(part.get("text", "") for part in chunk["candidates"][0]["content"]["parts"])
+    except (KeyError, IndexError, TypeError):
+        return ""
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Resident LLM gateway.
+
+A long-running local proxy in front of Gemini. The LLM scripts send their
+generateContent calls here when LLM_GATEWAY_URL is set (see gateway.py), so
+the TLS connections to Google stay warm across the short-lived script
+processes, and concurrency limits, retries and metrics apply to all features
+together.
+
+Usage:
+    python src/python/llm-gateway/gateway_server.py [--host 127.0.0.1] [--port 5006] [--max-concurrency 8]
+
+Endpoints:
+    GET  /health                                -> call, retry, token and latency metrics
+    POST /v1/models/<model>:generateContent     -> forwarded upstream (same body and response)
+    POST /v1/models/<model>:streamGenerateContent?alt=sse -> relayed upstream event by event
+"""
+import os
+import re
+import sys
+import json
+import argparse
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from gateway import GeminiClient, GatewayError, UPSTREAM_BASE, MAX_CONCURRENCY
+
+ROUTE = re.compile(r"^/v1(?:beta)?/models/([\w.\-]+):(\w+)$")
+QUERY = re.compile(r"\?\S*")
+
+CLIENT = None
+# Used when a caller doesn't send an x-goog-api-key header; the scripts always do.
+DEFAULT_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("API_KEY")
+
+# ----------------- HTTP Handler -----------------
+class GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "upstream": CLIENT.api_base, **CLIENT.metrics.snapshot()})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        match = ROUTE.match(url.path)
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        if not match or match.group(2) not in ("generateContent", "streamGenerateContent"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": {"message": f"Invalid request body: {e}"}})
+            return
+        api_key = self.headers.get("x-goog-api-key") or DEFAULT_KEY
+        if match.group(2) == "streamGenerateContent":
+            self._relay_stream(body, match.group(1), api_key)
+            return
+        try:
+            self._send_json(200, CLIENT.generate_content(body, match.group(1), api_key))
+        except GatewayError as e:
+            # Pass the upstream error through unchanged where there is one.
+            if e.body:
+                self._send_json(e.status or 502, e.body.encode("utf-8"))
+            else:
+                self._send_json(e.status or 502, {"error": {"message": str(e)}})
+        except Exception as e:
+            # E.g. an upstream body that isn't JSON; the caller still gets an answer.
+            self._send_json(502, {"error": {"message": f"Bad upstream response: {e}"}})
+
+    def _relay_stream(self, body, model, api_key):
+        """Forward upstream SSE chunks as they arrive; errors before the first chunk keep their status."""
+        chunks = CLIENT.stream_generate_content(body, model, api_key)
+        try:
+            first = next(chunks, None)
+        except GatewayError as e:
+            self._send_json(e.status or 502, e.body.encode("utf-8") if e.body else {"error": {"message": str(e)}})
+            return
+        except Exception as e:
+            self._send_json(502, {"error": {"message": f"Bad upstream response: {e}"}})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            if first is not None:
+                self._write_event(first)
+            for chunk in chunks:
+                self._write_event(chunk)
+            self.wfile.write(b"0\r\n\r\n")
+        except Exception as e:
+            # Drop the connection without the final chunk so the client sees a truncated stream.
+            print(f"Stream relay ended early: {e}", file=sys.stderr)
+            self.close_connection = True
+        finally:
+            chunks.close()
+
+    def _write_event(self, payload):
+        """Send one server-sent event as its own HTTP chunk so clients see it immediately."""
+        data = f"data: {json.dumps(payload, ensure_ascii=False)}\r\n\r\n".encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        # Keep stdout clean; access logs go to stderr only, without query strings.
+        print(format % tuple(QUERY.sub("", arg) if isinstance(arg, str) else arg for arg in args), file=sys.stderr)
+
+# ----------------- Main Entry Point -----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pooled, rate-limited gateway in front of Gemini.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5006)
+    parser.add_argument("--upstream", default=UPSTREAM_BASE, help="Upstream API base (e.g. a mock_gemini.py URL)")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    CLIENT = GeminiClient(api_base=args.upstream, max_concurrency=args.max_concurrency)
+    print(json.dumps({"event": "ready", "upstream": CLIENT.api_base, "port": args.port}), file=sys.stderr, flush=True)
+
+    server = ThreadingHTTPServer((args.host, args.port), GatewayHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
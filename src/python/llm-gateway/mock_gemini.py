@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the Gemini generateContent endpoint.
+
+Answers POST /v1/models/<model>:generateContent with a canned reply in the
+real response shape (candidates + usageMetadata), after an optional delay,
+and can inject 429/503 failures to exercise gateway retries.
+--ms-per-1k-tokens adds delay proportional to the prompt size, like a model's
+prefill time, so long prompts are slower than short ones.
+streamGenerateContent?alt=sse streams the same reply as server-sent events,
+a few words per chunk, --chunk-delay-ms apart; the first chunk arrives after
+--latency-ms, like a model's first-token latency.
+
+Point the scripts or gateway_server.py at it with GEMINI_API_BASE / --upstream:
+
+    python src/python/llm-gateway/mock_gemini.py --port 5007 --latency-ms 300 --fail-rate 0.2
+    GEMINI_API_BASE=http://127.0.0.1:5007/v1 python src/python/report-inference/compare_inference.py '"a"' '"b"'
+
+GET /stats returns how many requests and injected failures it has served and
+the most requests it has had in flight at once; GET /stats?reset=1 also
+resets the counters.
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROUTE = re.compile(r"^/v1(?:beta)?/models/([\w.\-]+):(\w+)")
+
+STATS = {"requests": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0}
+STATS_LOCK = threading.Lock()
+OPTIONS = None
+
+def reply_text(body):
+    """A deterministic reply that echoes the start of the prompt text."""
+    texts = [part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])]
+    images = sum(1 for content in body.get("contents", []) for part in content.get("parts", []) if "inlineData" in part)
+    prompt = " ".join(" ".join(texts).split())
+    return f"Mock response ({images} image(s)) to: {prompt[:80]}"
+
+def generate_response(text, prompt_tokens):
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": len(text.split()),
+                          "totalTokenCount": prompt_tokens + len(text.split())},
+    }
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path in ("/stats", "/stats?reset=1"):
+            with STATS_LOCK:
+                self._send_json(200, dict(STATS))
+                if self.path.endswith("reset=1"):
+                    STATS.update(requests=0, failures=0, max_in_flight=STATS["in_flight"])
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        match = ROUTE.match(self.path)
+        if not match:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+        with STATS_LOCK:
+            STATS["requests"] += 1
+            STATS["in_flight"] += 1
+            STATS["max_in_flight"] = max(STATS["max_in_flight"], STATS["in_flight"])
+            fail = random.random() < OPTIONS.fail_rate
+            if fail:
+                STATS["failures"] += 1
+        try:
+            prompt_tokens = len(json.dumps(body)) // 4
+            time.sleep((OPTIONS.latency_ms + prompt_tokens / 1000.0 * OPTIONS.ms_per_1k_tokens) / 1000.0)
+            if fail:
+                status = random.choice((429, 503))
+                self._send_json(status, {"error": {"code": status, "message": "Injected failure"}},
+                                headers={"Retry-After": "0"} if status == 429 else None)
+                return
+            text = reply_text(body)
+            if match.group(2) == "streamGenerateContent":
+                self._stream(text, prompt_tokens)
+            else:
+                self._send_json(200, generate_response(text, prompt_tokens))
+        finally:
+            with STATS_LOCK:
+                STATS["in_flight"] -= 1
+
+    def _stream(self, text, prompt_tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = text.split(" ")
+        pieces = [" ".join(words[i:i + OPTIONS.words_per_chunk]) + " " for i in range(0, len(words), OPTIONS.words_per_chunk)]
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(OPTIONS.chunk_delay_ms / 1000.0)
+            self._write_event(generate_response(piece, prompt_tokens))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_event(self, payload):
+        """Send one server-sent event as its own HTTP chunk so clients see it immediately."""
+        # Raw UTF-8 like the real API, so clients that mis-decode non-ASCII text show it.
+        data = f"data: {json.dumps(payload, ensure_ascii=False)}\r\n\r\n".encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        print(format % args, file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Gemini generateContent server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5007)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=0, help="Extra delay per 1000 prompt tokens")
+    parser.add_argument("--chunk-delay-ms", type=float, default=50, help="Delay between streamed chunks")
+    parser.add_argument("--words-per-chunk", type=int, default=3)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 429/503")
+    OPTIONS = parser.parse_args()
+
+    server = ThreadingHTTPServer((OPTIONS.host, OPTIONS.port), MockHandler)
+    print(json.dumps({"event": "ready", "port": OPTIONS.port}), file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
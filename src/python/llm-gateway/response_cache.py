@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+SQLite cache for Gemini responses.
+
+Entries are keyed by model name, prompt template version and the SHA-256 of
+the normalized request (prompt text with whitespace collapsed, plus any
+inline image bytes), so the same lab report, symptom string, X-ray or report
+pair is answered from disk instead of calling Gemini again. Bumping a
+template version invalidates that feature's entries.
+
+Entries expire after a TTL and the table is bounded to max_items with LRU
+eviction. Hit/miss counts and the latency saved (the original call's
+latency, credited on every hit) are kept per template in a stats table, so
+they add up across the short-lived script processes.
+
+Configuration (environment variables):
+    LLM_CACHE            "0" disables the cache (default "1")
+    LLM_CACHE_DB         SQLite file (default: the shared cache file, see common/data_paths.py)
+    LLM_CACHE_MAX_ITEMS  entries kept (default 10000)
+    LLM_CACHE_TTL_S      entry lifetime in seconds (default 7 days)
+    LLM_CACHE_BYPASS     "1" skips lookups for every call (fresh responses are still stored)
+
+Usage (report stats, or clear the cache):
+    python src/python/llm-gateway/response_cache.py [--clear]
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from data_paths import cache_db_path
+
+def normalize_body(body):
+    """Canonical JSON of a request body with prompt whitespace collapsed."""
+    def normalize(value):
+        if isinstance(value, dict):
+            return {key: normalize(item) if key != "text" else " ".join(str(item).split())
+                    for key, item in value.items()}
+        if isinstance(value, list):
+            return [normalize(item) for item in value]
+        return value
+    return json.dumps(normalize(body), sort_keys=True, separators=(",", ":"))
+
+class ResponseCache:
+    def __init__(self, db_path=None, max_items=10000, ttl_s=7 * 24 * 3600):
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path or cache_db_path(), check_same_thread=False, timeout=10)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                template TEXT NOT NULL,
+                response TEXT NOT NULL,
+                latency_ms REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_response_cache (last_access)")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS llm_response_cache_stats (
+                template TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                bypassed INTEGER NOT NULL DEFAULT 0,
+                saved_ms REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self.db.commit()
+
+    @staticmethod
+    def make_key(model, template, body):
+        return f"{model}:{template}:{hashlib.sha256(normalize_body(body).encode('utf-8')).hexdigest()}"
+
+    def _count(self, template, column, saved_ms=0.0):
+        self.db.execute("INSERT OR IGNORE INTO llm_response_cache_stats (template) VALUES (?)", (template,))
+        self.db.execute(f"UPDATE llm_response_cache_stats SET {column} = {column} + 1, saved_ms = saved_ms + ? "
+                        "WHERE template = ?", (saved_ms, template))
+
+    def get(self, key, template):
+        """Return the cached response JSON for key, or None (missing or expired)."""
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT response, latency_ms, created_at FROM llm_response_cache "
+                                  "WHERE cache_key = ?", (key,)).fetchone()
+            if row and now - row[2] <= self.ttl_s:
+                self.db.execute("UPDATE llm_response_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+                self._count(template, "hits", row[1])
+                self.db.commit()
+                return json.loads(row[0])
+            if row:
+                self.db.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (key,))
+            self._count(template, "misses")
+            self.db.commit()
+            return None
+
+    def record_bypass(self, template):
+        with self.lock:
+            self._count(template, "bypassed")
+            self.db.commit()
+
+    def put(self, key, model, template, response, latency_ms):
+        """Store a successful response (one with candidates) and enforce TTL and size bounds."""
+        if not response.get("candidates"):
+            return
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO llm_response_cache "
+                "(cache_key, model, template, response, latency_ms, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (key, model, template, json.dumps(response), latency_ms, now, now))
+            self.db.execute("DELETE FROM llm_response_cache WHERE created_at < ?", (now - self.ttl_s,))
+            (count,) = self.db.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()
+            if count > self.max_items:
+                self.db.execute(
+                    "DELETE FROM llm_response_cache WHERE cache_key IN ("
+                    "SELECT cache_key FROM llm_response_cache ORDER BY last_access LIMIT ?)",
+                    (count - self.max_items,))
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            (items,) = self.db.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()
+            rows = self.db.execute("SELECT template, hits, misses, bypassed, saved_ms "
+                                   "FROM llm_response_cache_stats ORDER BY template").fetchall()
+        templates = {}
+        for template, hits, misses, bypassed, saved_ms in rows:
+            lookups = hits + misses
+            templates[template] = {
+                "hits": hits, "misses": misses, "bypassed": bypassed,
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+                "latency_saved_s": round(saved_ms / 1000, 2),
+            }
+        return {"items": items, "max_items": self.max_items, "ttl_s": self.ttl_s, "templates": templates}
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM llm_response_cache")
+            self.db.execute("DELETE FROM llm_response_cache_stats")
+            self.db.commit()
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+def get_cache():
+    """Return the process-wide cache configured from the environment, or None if disabled."""
+    global _CACHE
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache(
+                db_path=os.getenv("LLM_CACHE_DB"),
+                max_items=int(os.getenv("LLM_CACHE_MAX_ITEMS", "10000")),
+                ttl_s=float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600))),
+            )
+        return _CACHE
+
+if __name__ == "__main__":
+    cache = get_cache()
+    if cache is None:
+        print("LLM cache is disabled (LLM_CACHE=0).", file=sys.stderr)
+        sys.exit(1)
+    if "--clear" in sys.argv[1:]:
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
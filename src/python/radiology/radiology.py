@@ -3,14 +3,32 @@ import os
 import sys
 import io
 import json
-import base64
-import requests
+import time
 from PIL import Image
-import fitz  # PyMuPDF
+try:
+    import pymupdf as fitz  # PyMuPDF >= 1.24.3; importing "fitz" there prints a deprecation notice on stdout
+except ImportError:
+    import fitz  # PyMuPDF
 from dotenv import load_dotenv
-from deep_translator import GoogleTranslator
-from gtts import gTTS
-import tempfile
+# Gemini calls go through the shared gateway (pooled client, retries, metrics).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm-gateway"))
+from gateway import generate, image_part, GatewayError
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import write_ndjson, pop_flag
+# Translation goes through the shared layer (sentence cache, chunking, pluggable backend).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "translation"))
+from translation import translate
+# Speech goes through the shared module (in-memory, per-sentence, cached audio).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "speech"))
+from speech import synthesize_base64
+from staged import write_staged
+# --no-cache forces a fresh Gemini call instead of a cached response.
+BYPASS_CACHE = pop_flag("--no-cache")
+# --staged writes NDJSON: the text as soon as it exists, then the audio as a
+# follow-up message (see speech/staged.py).
+STAGED = pop_flag("--staged")
+# Bump when the prompt changes so cached responses for the old prompt are not reused.
+PROMPT_VERSION = "radiology-v1"
 
 # Load environment variables
 load_dotenv()
@@ -18,7 +36,6 @@ API_KEY = os.getenv("GEMINI_API_KEY")
 if not API_KEY:
     print("GEMINI_API_KEY not found in environment.", file=sys.stderr)
     sys.exit(1)
-API_URL = "https://generativelanguage.googleapis.com/v1/models/gemini-1.5-flash:generateContent"
 
 def load_xray(file_path):
     ext = os.path.splitext(file_path)[-1].lower()
@@ -33,39 +50,20 @@ def load_xray(file_path):
     else:
         raise ValueError("Unsupported file format. Please upload PNG, JPEG, or PDF files.")
 
-def image_to_base64(image):
+def image_to_png_bytes(image):
     img_byte_arr = io.BytesIO()
     image.save(img_byte_arr, format='PNG')
-    return base64.b64encode(img_byte_arr.getvalue()).decode("utf-8")
+    return img_byte_arr.getvalue()
 
 def get_gemini_inference(image):
-    image_data = image_to_base64(image)
-    headers = {"Content-Type": "application/json"}
-    
     prompt = ("Analyze the following X-ray image and provide a concise summary (50 to 80 words). "
               "This is not a medical diagnosis.")
     
-    data = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {"text": prompt},
-                    {
-                        "inlineData": {
-                            "mimeType": "image/png",
-                            "data": image_data
-                        }
-                    }
-                ]
-            }
-        ]
-    }
-    response = requests.post(f"{API_URL}?key={API_KEY}", headers=headers, json=data)
-    response_json = response.json()
-    # Debug print (remove or comment out in production)
-    # print("Full API Response:", json.dumps(response_json, indent=2))
-    return response_json
+    try:
+        return generate([prompt, image_part(image_to_png_bytes(image))], api_key=API_KEY,
+                        template=PROMPT_VERSION, bypass_cache=BYPASS_CACHE)
+    except GatewayError as e:
+        return {"error": {"message": str(e)}}
 
 def extract_useful_info(response_json):
     try:
@@ -81,17 +79,12 @@ def extract_useful_info(response_json):
 
 def translate_to_hindi(text):
     try:
-        return GoogleTranslator(source="en", target="hi").translate(text)
+        return translate(text)
     except Exception as e:
         return f"Error translating text: {str(e)}"
 
-def text_to_speech(text, lang):
-    tts = gTTS(text=text, lang=lang)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-        tts.save(temp_audio.name)
-        return temp_audio.name
-
 if __name__ == "__main__":
+    started = time.perf_counter()
     # Expect file path as first argument and language ("en" or "hi") as second (default "en")
     if len(sys.argv) < 2:
         print("No file path provided.", file=sys.stderr)
@@ -107,10 +100,24 @@ if __name__ == "__main__":
     
     inference_json = get_gemini_inference(xray_image)
     if "error" in inference_json:
+        if STAGED:
+            write_ndjson({"type": "error", "error": f"API Error: {inference_json['error']['message']}"})
         print("API Error:", inference_json["error"]["message"], file=sys.stderr)
         sys.exit(1)
     useful_info = extract_useful_info(inference_json)
     
+    if STAGED:
+        # English text goes out now; translation and speech follow as separate messages.
+        try:
+            _, latency = write_staged(useful_info, "hi" if language == "hi" else "en", write_ndjson,
+                                      "inference", translate_to_hindi, started)
+        except Exception as e:
+            write_ndjson({"type": "error", "error": f"Error generating audio: {e}"})
+            print("Error generating audio:", e, file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps({"latency": latency}), file=sys.stderr)
+        sys.exit(0)
+
     if language == "hi":
         useful_info = translate_to_hindi(useful_info)
         audio_lang = "hi"
@@ -118,22 +125,19 @@ if __name__ == "__main__":
         audio_lang = "en"
     
     # Generate TTS audio and convert it to Base64 for transport
-    audio_file = text_to_speech(useful_info, audio_lang)
     try:
-        with open(audio_file, "rb") as af:
-            audio_bytes = af.read()
-        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+        audio_base64, audio_mime, speech_stats = synthesize_base64(useful_info, audio_lang)
     except Exception as e:
-        print("Error reading audio file:", e, file=sys.stderr)
+        print("Error generating audio:", e, file=sys.stderr)
         sys.exit(1)
-    finally:
-        try:
-            os.unlink(audio_file)
-        except Exception:
-            pass
+    print(json.dumps({"speech": speech_stats}), file=sys.stderr)
 
     result = {
         "inference": useful_info,
-        "audio": audio_base64
+        "audio": audio_base64,
+        "audio_mime": audio_mime
     }
     print(json.dumps(result))
+    # Nothing is readable before the single JSON result, so first text and total coincide.
+    total_ms = round((time.perf_counter() - started) * 1000, 2)
+    print(json.dumps({"latency": {"first_text_ms": total_ms, "total_ms": total_ms}}), file=sys.stderr)
\ No newline at end of file
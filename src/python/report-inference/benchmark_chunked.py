@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Single-prompt vs. map-reduce inference on a synthetic long report, against
+mock_gemini.py.
+
+Start the mock with a prefill cost so prompt size matters, then point this
+script at it:
+
+    python src/python/llm-gateway/mock_gemini.py --port 5007 --latency-ms 300 --ms-per-1k-tokens 150
+    GEMINI_API_BASE=http://127.0.0.1:5007/v1 python src/python/report-inference/benchmark_chunked.py \
+        [--pages=40] [--chars-per-page=2500] [--chunk-tokens=4000] [--concurrency=1,2,4,8]
+
+For each concurrency it reports map and reduce latency, the number of chunks,
+the peak number of map calls in flight as seen by the client and by the mock
+(both must stay within the limit), and whether the extracts came back in page
+order (the mock echoes the start of each prompt, which names the pages).
+Caching is disabled so every run makes real calls.
+"""
+import os
+import re
+import sys
+import json
+import time
+
+os.environ["LLM_CACHE"] = "0"
+import requests
+import chunked_inference
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm-gateway"))
+from gateway import generate, response_text, UPSTREAM_BASE
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+def synthetic_report(pages, chars_per_page):
+    rows = ["Hemoglobin 13.2 g/dL 12.0-16.0", "WBC Count 7,400 /cumm 4000-11000",
+            "Platelet Count 2.4 lakhs/cumm 1.5-4.5", "Serum Creatinine 0.9 mg/dL 0.6-1.1",
+            "Methodology: automated analyser; sample verified by the laboratory."]
+    text = ""
+    for page in range(1, pages + 1):
+        body = f"Patient: Test Patient  Age/Sex: 54 Y / M  Page {page}\n"
+        while len(body) < chars_per_page:
+            body += rows[len(body) % len(rows)] + "\n"
+        text += f"\n--- Page {page} ---\n" + body
+    return text
+
+def mock_stats(reset=False):
+    base = UPSTREAM_BASE.rsplit("/v1", 1)[0]
+    return requests.get(f"{base}/stats" + ("?reset=1" if reset else ""), timeout=5).json()
+
+if __name__ == "__main__":
+    flags = parse_flags(sys.argv[1:])
+    pages = int(flags.get("pages", 40))
+    chunk_tokens = int(flags.get("chunk-tokens", chunked_inference.CHUNK_TOKENS))
+    text = synthetic_report(pages, int(flags.get("chars-per-page", 2500)))
+    instructions = "\nPlease provide inferences based on the data, with the sections 'Name of Test', 'Table', 'Inferences', 'Plausible Remedies' and 'Disclaimer'.\n"
+
+    started = time.perf_counter()
+    response_text(generate(text + instructions))
+    single_ms = round((time.perf_counter() - started) * 1000, 2)
+    results = {"pages": pages, "text_tokens": chunked_inference.estimate_tokens(text),
+               "single_prompt_ms": single_ms, "map_reduce": []}
+
+    for concurrency in [int(c) for c in flags.get("concurrency", "1,2,4,8").split(",")]:
+        mock_stats(reset=True)
+        started = time.perf_counter()
+        extracts, stats = chunked_inference.extract_chunks(text, max_tokens=chunk_tokens, concurrency=concurrency)
+        prompt = chunked_inference.reduce_prompt(extracts, instructions)
+        reduce_started = time.perf_counter()
+        response_text(generate(prompt))
+        total_ms = (time.perf_counter() - started) * 1000
+        echoed = [tuple(map(int, m.groups())) for e in extracts for m in [re.search(r"Pages (\d+)-(\d+)", e["extract"])] if m]
+        results["map_reduce"].append({
+            "concurrency": concurrency, "chunks": stats["chunks"], "map_ms": stats["map_ms"],
+            "reduce_ms": round((time.perf_counter() - reduce_started) * 1000, 2), "total_ms": round(total_ms, 2),
+            "reduce_prompt_tokens": chunked_inference.estimate_tokens(prompt),
+            "max_in_flight": stats["max_in_flight"], "mock_max_in_flight": mock_stats()["max_in_flight"],
+            "in_page_order": echoed == [(e["first"], e["last"]) for e in extracts],
+            "speedup": round(single_ms / total_ms, 2),
+        })
+    print(json.dumps(results, indent=2))
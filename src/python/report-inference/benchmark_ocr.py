@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Extraction throughput and memory for lab report PDFs.
+
+Modes: "legacy" (the original convert_from_path + serial OCR), "pipeline"
+(ocr_pipeline's page-streaming OCR on every page) and "hybrid" (text layer
+first, OCR only for pages without one, i.e. what report-inference.py runs).
+
+Each mode runs in its own child process so peak RSS is measured in
+isolation. Reported per mode: pages/sec, the child's own peak RSS and the
+largest peak RSS among its children (pdftoppm and the OCR worker processes).
+Peak RSS uses the resource module and is unavailable on Windows.
+
+Usage:
+    python benchmark_ocr.py <sample.pdf> [--workers=N] [--dpi=N] [--modes=legacy,pipeline,hybrid]
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # ru_maxrss is in KiB on Linux.
+    return (round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1))
+
+def legacy_extract(pdf_path):
+    """The original implementation, kept here as the baseline."""
+    from pdf2image import convert_from_path
+    from pytesseract import image_to_string
+    images = convert_from_path(pdf_path)
+    extracted_text = ""
+    for i, image in enumerate(images):
+        extracted_text += f"\n--- Page {i + 1} ---\n"
+        extracted_text += image_to_string(image)
+    return extracted_text, len(images)
+
+def run_mode(mode, pdf_path, flags):
+    """Child process entry point: run one mode and print its measurements."""
+    started = time.perf_counter()
+    methods = None
+    if mode == "legacy":
+        text, pages = legacy_extract(pdf_path)
+    else:
+        import ocr_pipeline
+        dpi = int(flags.get("dpi", ocr_pipeline.DEFAULT_DPI))
+        workers = int(flags["workers"]) if "workers" in flags else None
+        if mode == "pipeline":
+            pages = ocr_pipeline.page_count(pdf_path)
+            text = "".join(ocr_pipeline.page_marker(n) + page_text
+                           for n, page_text in ocr_pipeline.iter_page_texts(pdf_path, dpi, workers))
+        else:
+            extracted = ocr_pipeline.extract_pages(pdf_path, dpi, workers)
+            pages, text = len(extracted), ocr_pipeline.format_pages(extracted)
+            methods = {method: sum(1 for entry in extracted if entry["method"] == method) for method in ("text", "ocr")}
+    elapsed = time.perf_counter() - started
+    self_rss, child_rss = peak_rss_mb()
+    print(json.dumps({"mode": mode, "pages": pages, "elapsed_s": round(elapsed, 3),
+                      "pages_per_s": round(pages / elapsed, 3) if elapsed > 0 else None,
+                      "peak_rss_mb": self_rss, "max_child_peak_rss_mb": child_rss, "chars": len(text),
+                      "page_methods": methods}))
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        print("Usage: python benchmark_ocr.py <sample.pdf> [--workers=N] [--dpi=N] [--modes=legacy,pipeline,hybrid]", file=sys.stderr)
+        sys.exit(1)
+    flags = parse_flags(sys.argv[1:])
+    if "mode" in flags:
+        run_mode(flags["mode"], args[0], flags)
+        sys.exit(0)
+
+    results = []
+    for mode in flags.get("modes", "legacy,pipeline,hybrid").split(","):
+        output = subprocess.run([sys.executable, __file__, args[0], f"--mode={mode}"] +
+                                [arg for arg in sys.argv[1:] if arg.startswith("--")],
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    baseline = results[0]["pages_per_s"]
+    for result in results[1:]:
+        result["speedup_vs_" + results[0]["mode"]] = (round(result["pages_per_s"] / baseline, 2)
+                                                      if baseline and result["pages_per_s"] else None)
+    print(json.dumps({"pdf": args[0], "results": results}, indent=2))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Map-reduce inference for long lab reports.
+
+Sending a 30+ page OCR dump as one prompt is slow (prefill time grows with
+the prompt) and risks truncation. Instead the extracted text is split on
+its "--- Page N ---" markers into chunks of at most REPORT_CHUNK_TOKENS
+estimated tokens (whole pages where possible), and each chunk gets a short
+extraction prompt ("map"). Map calls run concurrently, at most
+REPORT_CHUNK_CONCURRENCY at a time, on an asyncio pool whose calls run in
+threads through the shared gateway client (whose own LLM_MAX_CONCURRENCY
+limit still applies). Their outputs, in page order, are much smaller than
+the OCR text; report-inference.py then sends them with its usual
+instructions as the final "reduce" call, which writes the five sections.
+
+Map calls are cached per chunk like any other templated call, so re-running
+a report only repeats the reduce step.
+
+Configuration (environment variables):
+    REPORT_CHUNK_TOKENS       token budget per map chunk (default 4000)
+    REPORT_CHUNK_CONCURRENCY  map calls in flight (default 4)
+    REPORT_CHUNK_THRESHOLD    estimated prompt tokens above which report-inference.py
+                              uses map-reduce (default 8000; --chunked forces it)
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm-gateway"))
+from gateway import generate, response_text
+
+CHUNK_TOKENS = int(os.getenv("REPORT_CHUNK_TOKENS", "4000"))
+CHUNK_CONCURRENCY = int(os.getenv("REPORT_CHUNK_CONCURRENCY", "4"))
+CHUNK_THRESHOLD = int(os.getenv("REPORT_CHUNK_THRESHOLD", "8000"))
+MAP_PROMPT_VERSION = "report-inference-map-v1"
+
+PAGE_MARKER = re.compile(r"\n--- Page (\d+) ---\n")
+
+MAP_PROMPT = """Pages {first}-{last} of a lab report (OCR text):
+{text}
+
+Extract from these pages only, without interpreting or summarizing:
+- the type of test(s)
+- patient age and sex, if present
+- every test result, one per line: test | value | unit | reference range | normal/high/low
+Output only the extracted lines, or nothing if these pages have no results.
+"""
+
+def estimate_tokens(text):
+    # About 4 characters per token for English text.
+    return len(text) // 4 + 1
+
+def split_pages(text):
+    """[(page_number, page_text)] from text with page markers; text before the first marker joins page 1."""
+    parts = PAGE_MARKER.split(text)
+    preamble, rest = parts[0], parts[1:]
+    pages = [(int(rest[i]), rest[i + 1]) for i in range(0, len(rest), 2)]
+    if not pages:
+        return [(1, text)]
+    if preamble.strip():
+        pages[0] = (pages[0][0], preamble + pages[0][1])
+    return pages
+
+def chunk_pages(pages, max_tokens=CHUNK_TOKENS):
+    """Pack consecutive pages into chunks within max_tokens; an oversized page is split on line breaks."""
+    chunks = []
+    current, current_tokens = [], 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append({"first": current[0][0], "last": current[-1][0],
+                           "text": "".join(f"\n--- Page {n} ---\n{t}" for n, t in current)})
+        current, current_tokens = [], 0
+
+    for page_number, page_text in pages:
+        pieces = [page_text]
+        if estimate_tokens(page_text) > max_tokens:
+            pieces, piece = [], ""
+            for line in page_text.splitlines(keepends=True):
+                if piece and estimate_tokens(piece + line) > max_tokens:
+                    pieces.append(piece)
+                    piece = ""
+                piece += line
+            pieces.append(piece)
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > max_tokens:
+                flush()
+            current.append((page_number, piece))
+            current_tokens += tokens
+    flush()
+    return chunks
+
+async def _map_chunks(chunks, api_key, concurrency, bypass_cache):
+    limit = asyncio.Semaphore(concurrency)
+    # Sized to the limit: the loop's default executor (min(32, CPUs + 4) threads) would cap it on small machines.
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    loop = asyncio.get_running_loop()
+    in_flight = max_in_flight = 0
+
+    async def extract(chunk):
+        nonlocal in_flight, max_in_flight
+        async with limit:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                prompt = MAP_PROMPT.format(**chunk)
+                return await loop.run_in_executor(executor, lambda: response_text(generate(
+                    prompt, api_key=api_key, template=MAP_PROMPT_VERSION, bypass_cache=bypass_cache)))
+            finally:
+                in_flight -= 1
+
+    # gather keeps results in chunk (page) order whatever order the calls finish in.
+    try:
+        extracts = await asyncio.gather(*(extract(chunk) for chunk in chunks))
+    finally:
+        executor.shutdown(wait=False)
+    return list(extracts), max_in_flight
+
+def extract_chunks(text, api_key=None, max_tokens=CHUNK_TOKENS, concurrency=CHUNK_CONCURRENCY, bypass_cache=False):
+    """
+    Run the map step over the report text. Returns ([{"first", "last",
+    "extract"}] in page order, stats).
+    """
+    chunks = chunk_pages(split_pages(text), max_tokens)
+    started = time.perf_counter()
+    extracts, max_in_flight = asyncio.run(_map_chunks(chunks, api_key, concurrency, bypass_cache))
+    stats = {"chunks": len(chunks), "max_in_flight": max_in_flight, "text_tokens": estimate_tokens(text),
+             "map_ms": round((time.perf_counter() - started) * 1000, 2)}
+    return [{"first": chunk["first"], "last": chunk["last"], "extract": extract}
+            for chunk, extract in zip(chunks, extracts)], stats
+
+def reduce_prompt(extracts, instructions):
+    """The final prompt: the per-chunk extractions in page order, then the report instructions."""
+    sections = [f"[Pages {e['first']}-{e['last']}]\n{e['extract'].strip()}" for e in extracts if e["extract"].strip()]
+    return ("Lab results extracted from each part of a long lab report, in page order:\n\n"
+            + "\n\n".join(sections) + "\n" + instructions)
@@ -3,7 +3,22 @@ import sys
 import json
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
+# Gemini calls go through the shared gateway (pooled client, retries, metrics).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm-gateway"))
+from gateway import generate, response_text
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import pop_flag, pop_option
+from report_history import ReportHistory, trend_summary
+# --no-cache forces a fresh Gemini call instead of a cached response.
+BYPASS_CACHE = pop_flag("--no-cache")
+# --patient=<id> compares the patient's stored reports (the last --reports=N, default 10)
+# from their computed trends; without it, or with fewer than two stored reports,
+# the two inference texts are compared as before.
+PATIENT = pop_option("patient")
+REPORTS = int(pop_option("reports", "10"))
+# Bump when the prompt changes so cached responses for the old prompt are not reused.
+PROMPT_VERSION = "compare-inference-v1"
+TRENDS_PROMPT_VERSION = "compare-trends-v1"
 
 # Load environment variables
 load_dotenv()
@@ -11,7 +26,6 @@ API_KEY = os.getenv("API_KEY")
 if not API_KEY:
     print("API_KEY not found. Please set it in the .env file.", file=sys.stderr)
     sys.exit(1)
-genai.configure(api_key=API_KEY)
 
 def compare_inferences(new_inference, previous_inference):
     # Construct a prompt that guides Gemini to compare the two inferences.
@@ -28,20 +42,46 @@ Based on these inferences, determine if the person's health has improved, degrad
 Identify key differences in data trends and out-of-range values, and provide a concise summary analysis with possible explanations.
 """
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text
+        return response_text(generate(prompt, api_key=API_KEY,
+                                      template=PROMPT_VERSION, bypass_cache=BYPASS_CACHE))
+    except Exception as e:
+        return f"Error generating comparison: {e}"
+
+def compare_trends(summary):
+    # Only the locally computed trend summary is sent, however many reports it covers.
+    prompt = f"""
+Please narrate the following lab value trends for one patient, computed from their stored reports.
+
+{summary}
+
+Based on these trends, determine if the person's health has improved, degraded, or remained stable.
+Highlight values that moved into or out of the normal range and sustained trends, and provide a concise summary analysis with possible explanations.
+"""
+    try:
+        return response_text(generate(prompt, api_key=API_KEY,
+                                      template=TRENDS_PROMPT_VERSION, bypass_cache=BYPASS_CACHE))
     except Exception as e:
         return f"Error generating comparison: {e}"
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Error: Two inference arguments are required.", file=sys.stderr)
-        sys.exit(1)
+    if PATIENT:
+        history = ReportHistory()
+        if history.report_count(PATIENT) >= 2:
+            trends = history.trends(PATIENT, REPORTS)
+            summary = trend_summary(trends)
+            print(json.dumps({"reports": trends["reports"], "summary_chars": len(summary)}), file=sys.stderr)
+            print(compare_trends(summary))
+            sys.exit(0)
     try:
-        # The arguments are expected to be JSON strings. Parse them to get the raw text.
-        new_inference = json.loads(sys.argv[1])
-        previous_inference = json.loads(sys.argv[2])
+        # The inferences come as two JSON-encoded arguments, or as a
+        # {"newInference", "previousInference"} object on stdin (not bounded by argv length).
+        if len(sys.argv) >= 3:
+            new_inference = json.loads(sys.argv[1])
+            previous_inference = json.loads(sys.argv[2])
+        else:
+            payload = json.load(sys.stdin)
+            new_inference = payload["newInference"]
+            previous_inference = payload["previousInference"]
     except Exception as e:
         print(f"Error parsing input arguments: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+"""
+Local lab-value extraction and reference-range flagging.
+
+parse_report() pulls (test, value, unit, reference range) rows out of the
+extracted report text, plus the patient's age and sex where the report
+prints them. Rows are flagged against the range printed on the report;
+known tests without one fall back to REFERENCE_RANGES, whose rules depend
+on age and sex (e.g. ESR and TSH upper limits rise with age, ALP is higher
+in children). markdown_table() then renders the value table deterministically and
+compact_summary() gives the LLM a few lines instead of the whole OCR dump.
+
+A line is only taken as a row when its test name is known or it carries a
+printed reference range, so dates, IDs and addresses are skipped.
+
+Configuration (environment variables):
+    LAB_MIN_ROWS  rows needed before the structured prompt is used (default 3)
+
+Usage (inspect what a report parses to):
+    python src/python/report-inference/lab_values.py <report.pdf|report.txt> [--age=N] [--sex=M|F] [--language=en|hi]
+"""
+import os
+import re
+import sys
+import json
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+MIN_ROWS = int(os.getenv("LAB_MIN_ROWS", "3"))
+
+# key: (display name, panel, canonical unit, {unit: factor to canonical}, aliases, rules)
+# A rule is (sex, min_age, max_age, low, high); the first rule matching the
+# patient applies. Ages are [min_age, max_age) in years and None means
+# unbounded. When the age or sex is unknown only rules that don't depend on
+# it can match, so sex-specific tests end with a combined range.
+REFERENCE_RANGES = {
+    "hemoglobin": ("Hemoglobin", "Complete Blood Count", "g/dl", {"g/l": 0.1},
+                   ("hb", "hgb", "haemoglobin", "hemoglobin hb", "haemoglobin hb"),
+                   [(None, None, 12, 11.5, 15.5), (None, 12, 18, 12.0, 16.0),
+                    ("M", 18, None, 13.0, 17.0), ("F", 18, None, 12.0, 15.5), (None, None, None, 12.0, 17.0)]),
+    "rbc": ("RBC Count", "Complete Blood Count", "10^6/ul", {"10^6/mm3": 1, "million/mm3": 1, "10^12/l": 1},
+            ("rbc", "red blood cells", "total rbc count", "red blood cell count", "rbc count"),
+            [("M", 18, None, 4.5, 5.9), ("F", 18, None, 4.1, 5.1), (None, None, None, 4.1, 5.9)]),
+    "wbc": ("WBC Count", "Complete Blood Count", "10^3/ul", {"10^3/mm3": 1, "/mm3": 0.001, "/ul": 0.001, "cells/mm3": 0.001, "cells/ul": 0.001, "10^9/l": 1},
+            ("wbc", "tlc", "total leucocyte count", "total leukocyte count", "white blood cells", "total wbc count", "wbc count"),
+            [(None, None, 12, 5.0, 14.5), (None, None, None, 4.0, 11.0)]),
+    "platelets": ("Platelet Count", "Complete Blood Count", "10^3/ul", {"10^3/mm3": 1, "/mm3": 0.001, "/ul": 0.001, "lakh/mm3": 100, "lakhs/mm3": 100, "10^9/l": 1},
+                  ("platelet count", "platelets", "plt", "platelet"),
+                  [(None, None, None, 150, 450)]),
+    "hematocrit": ("Hematocrit (PCV)", "Complete Blood Count", "%", {},
+                   ("hct", "pcv", "packed cell volume", "haematocrit", "packed cell volume pcv"),
+                   [("M", 18, None, 40, 50), ("F", 18, None, 36, 46), (None, None, None, 36, 50)]),
+    "mcv": ("MCV", "Complete Blood Count", "fl", {}, ("mean corpuscular volume", "mean corpuscular volume mcv"),
+            [(None, None, None, 80, 100)]),
+    "mch": ("MCH", "Complete Blood Count", "pg", {}, ("mean corpuscular hemoglobin", "mean corpuscular hemoglobin mch"),
+            [(None, None, None, 27, 33)]),
+    "mchc": ("MCHC", "Complete Blood Count", "g/dl", {}, ("mean corpuscular hemoglobin concentration",),
+             [(None, None, None, 32, 36)]),
+    "esr": ("ESR", "Complete Blood Count", "mm/hr", {"mm/h": 1, "mm/1sthr": 1},
+            ("erythrocyte sedimentation rate", "esr westergren"),
+            [("M", None, 50, 0, 15), ("M", 50, None, 0, 20), ("F", None, 50, 0, 20), ("F", 50, None, 0, 30)]),
+    "glucose_fasting": ("Fasting Glucose", "Blood Sugar", "mg/dl", {"mmol/l": 18.016},
+                        ("fasting blood sugar", "fbs", "fasting plasma glucose", "glucose fasting", "blood sugar fasting", "fasting glucose"),
+                        [(None, None, None, 70, 99)]),
+    "glucose_random": ("Random Glucose", "Blood Sugar", "mg/dl", {"mmol/l": 18.016},
+                       ("random blood sugar", "rbs", "glucose random", "blood sugar random", "random glucose"),
+                       [(None, None, None, 70, 140)]),
+    "hba1c": ("HbA1c", "Blood Sugar", "%", {}, ("glycated hemoglobin", "glycosylated hemoglobin", "hba1c glycated hemoglobin"),
+              [(None, None, None, 4.0, 5.6)]),
+    "cholesterol_total": ("Total Cholesterol", "Lipid Profile", "mg/dl", {"mmol/l": 38.67},
+                          ("cholesterol total", "serum cholesterol", "cholesterol", "total cholesterol"),
+                          [(None, None, 18, None, 170), (None, None, None, None, 200)]),
+    "ldl": ("LDL Cholesterol", "Lipid Profile", "mg/dl", {"mmol/l": 38.67},
+            ("ldl", "ldl cholesterol", "ldl cholesterol direct", "cholesterol ldl", "ldl c"),
+            [(None, None, 18, None, 110), (None, None, None, None, 100)]),
+    "hdl": ("HDL Cholesterol", "Lipid Profile", "mg/dl", {"mmol/l": 38.67},
+            ("hdl", "hdl cholesterol", "cholesterol hdl", "hdl c", "hdl cholesterol direct"),
+            [("M", None, None, 40, None), ("F", None, None, 50, None), (None, None, None, 40, None)]),
+    "triglycerides": ("Triglycerides", "Lipid Profile", "mg/dl", {"mmol/l": 88.57},
+                      ("triglyceride", "tg", "serum triglycerides"),
+                      [(None, None, 10, None, 75), (None, 10, 18, None, 90), (None, None, None, None, 150)]),
+    "creatinine": ("Creatinine", "Kidney Function", "mg/dl", {"umol/l": 0.0113},
+                   ("serum creatinine", "creatinine serum"),
+                   [(None, None, 12, 0.3, 0.7), ("M", 12, None, 0.7, 1.3), ("F", 12, None, 0.6, 1.1), (None, None, None, 0.6, 1.3)]),
+    "urea": ("Urea", "Kidney Function", "mg/dl", {}, ("blood urea", "serum urea"),
+             [(None, None, None, 17, 43)]),
+    "bun": ("Blood Urea Nitrogen", "Kidney Function", "mg/dl", {}, ("bun", "urea nitrogen"),
+            [(None, 60, None, 8, 23), (None, None, None, 7, 20)]),
+    "uric_acid": ("Uric Acid", "Kidney Function", "mg/dl", {}, ("serum uric acid",),
+                  [("M", None, None, 3.4, 7.0), ("F", None, None, 2.4, 6.0), (None, None, None, 2.4, 7.0)]),
+    "sodium": ("Sodium", "Electrolytes", "mmol/l", {"meq/l": 1}, ("na", "serum sodium", "sodium na"),
+               [(None, None, None, 135, 145)]),
+    "potassium": ("Potassium", "Electrolytes", "mmol/l", {"meq/l": 1}, ("k", "serum potassium", "potassium k"),
+                  [(None, None, None, 3.5, 5.1)]),
+    "alt": ("ALT (SGPT)", "Liver Function", "u/l", {"iu/l": 1}, ("sgpt", "alt", "alt sgpt", "sgpt alt", "alanine aminotransferase"),
+            [(None, None, None, 7, 56)]),
+    "ast": ("AST (SGOT)", "Liver Function", "u/l", {"iu/l": 1}, ("sgot", "ast", "ast sgot", "sgot ast", "aspartate aminotransferase"),
+            [(None, None, None, 10, 40)]),
+    "alp": ("Alkaline Phosphatase", "Liver Function", "u/l", {"iu/l": 1}, ("alp", "alkaline phosphatase alp"),
+            [(None, None, 18, 100, 390), (None, None, None, 44, 147)]),
+    "bilirubin_total": ("Total Bilirubin", "Liver Function", "mg/dl", {"umol/l": 0.0585},
+                        ("bilirubin total", "serum bilirubin total", "total bilirubin"),
+                        [(None, None, None, 0.1, 1.2)]),
+    "albumin": ("Albumin", "Liver Function", "g/dl", {"g/l": 0.1}, ("serum albumin",),
+                [(None, None, None, 3.5, 5.0)]),
+    "tsh": ("TSH", "Thyroid Profile", "uiu/ml", {"miu/l": 1, "uiu/l": 0.001}, ("thyroid stimulating hormone", "tsh ultrasensitive", "tsh 3rd generation"),
+            [(None, 70, None, 0.4, 6.0), (None, None, None, 0.4, 4.0)]),
+    "t4_free": ("Free T4", "Thyroid Profile", "ng/dl", {}, ("ft4", "free t4", "free thyroxine"),
+                [(None, None, None, 0.8, 1.8)]),
+    "vitamin_d": ("Vitamin D (25-OH)", "Vitamins", "ng/ml", {"nmol/l": 0.4}, ("vitamin d", "25 oh vitamin d", "vitamin d 25 hydroxy", "vitamin d total"),
+                  [(None, None, None, 30, 100)]),
+    "vitamin_b12": ("Vitamin B12", "Vitamins", "pg/ml", {"pmol/l": 1.355}, ("vitamin b12", "b12", "cyanocobalamin"),
+                    [(None, None, None, 200, 900)]),
+    "ferritin": ("Ferritin", "Iron Studies", "ng/ml", {"ug/l": 1}, ("serum ferritin",),
+                 [("M", None, None, 24, 336), ("F", None, None, 11, 307), (None, None, None, 11, 336)]),
+}
+
+def _name_key(name):
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+ALIASES = {}
+for _key, (_display, _panel, _unit, _units, _aliases, _rules) in REFERENCE_RANGES.items():
+    for _alias in (_key.replace("_", " "), _display) + _aliases:
+        ALIASES[_name_key(_alias)] = _key
+
+NUMBER = r"\d[\d,]*(?:\.\d+)?"
+# Test name, optional separator and H/L flag, value, optional unit, optional range (possibly before the unit).
+ROW = re.compile(
+    r"^\s*(?P<name>[A-Za-z][A-Za-z0-9 ()./,%+\-]*?[A-Za-z0-9)])\s*[:\-]?\s*(?:\b[HL]\b\s*)?"
+    r"(?P<qualifier>[<>]=?)?\s*(?P<value>" + NUMBER + r")(?![\d/\-])\s*(?:\b[HL]\b\s*)?"
+    r"(?P<unit>(?:[x×*]?\s?10\s?\^?\s?\d+\s?/\s?[A-Za-zµμ]+\d?)|[A-Za-zµμ%/][^\s\d(<>]*(?:\s?/\s?[A-Za-zµμ0-9]+)?)?\s*"
+    r"(?P<range>\(?\s*(?:" + NUMBER + r"\s*(?:-|–|to)\s*" + NUMBER + r"|(?:<=?|>=?|≤|≥|up\s?to)\s*" + NUMBER + r")\s*\)?)?"
+    r"\s*(?P<unit_after>[A-Za-zµμ%][^\s]*)?\s*$")
+RANGE = re.compile(r"(" + NUMBER + r")\s*(?:-|–|to)\s*(" + NUMBER + r")|(<=?|>=?|≤|≥|up\s?to)\s*(" + NUMBER + r")")
+AGE = re.compile(r"\bAge\b(?:\s*/\s*(?:Sex|Gender))?\s*[:\-]?\s*(\d{1,3})\s*(?:Y|Yr|Yrs|Years?)?\b", re.IGNORECASE)
+SEX = re.compile(r"\b(?:Sex|Gender)\b\s*[:\-]?\s*(Male|Female|M|F)\b"
+                 r"|\bAge\s*/\s*(?:Sex|Gender)\s*[:\-]?\s*\d{1,3}\s*[A-Za-z]*\s*/\s*(Male|Female|M|F)\b", re.IGNORECASE)
+
+def _number(text):
+    return float(text.replace(",", ""))
+
+def normalize_unit(unit):
+    unit = (unit or "").lower().replace(" ", "").replace("µ", "u").replace("μ", "u").replace("×", "x").replace("*", "x")
+    unit = re.sub(r"^x?10\^?(\d+)", r"10^\1", unit)
+    return (unit.replace("cumm", "mm3").replace("cu.mm", "mm3").replace("thou/", "10^3/")
+                .replace("mill/", "10^6/").replace("/hour", "/hr").replace("lacs/", "lakh/"))
+
+def parse_range(text):
+    """Return (low, high) from a printed range such as "12.0 - 16.0", "< 200" or ">= 40"."""
+    match = RANGE.search(text or "")
+    if not match:
+        return None
+    if match.group(1):
+        return _number(match.group(1)), _number(match.group(2))
+    bound = _number(match.group(4))
+    return (bound, None) if match.group(3).startswith((">", "≥")) else (None, bound)
+
+def lookup_test(name):
+    key = _name_key(name)
+    if key in ALIASES:
+        return ALIASES[key]
+    # "Hemoglobin (Hb)", "Glucose - Fasting (Plasma)": retry without the parenthetical / method suffix.
+    stripped = _name_key(re.sub(r"\(.*?\)", " ", name))
+    return ALIASES.get(stripped)
+
+def reference_rule(key, age, sex):
+    for rule_sex, min_age, max_age, low, high in REFERENCE_RANGES[key][5]:
+        if rule_sex is not None and rule_sex != sex:
+            continue
+        if (min_age is not None or max_age is not None) and age is None:
+            continue
+        if (min_age is not None and age < min_age) or (max_age is not None and age >= max_age):
+            continue
+        return low, high
+    return None
+
+def patient_details(text):
+    age_match, sex_match = AGE.search(text), SEX.search(text)
+    age = int(age_match.group(1)) if age_match else None
+    sex = (sex_match.group(1) or sex_match.group(2))[0].upper() if sex_match else None
+    return {"age": age if age is not None and age < 120 else None, "sex": sex}
+
+def parse_rows(text):
+    """Yield raw {"name", "value", "qualifier", "unit", "range"} rows from report lines."""
+    for line in text.splitlines():
+        match = ROW.match(line)
+        if not match:
+            continue
+        name = match.group("name").strip(" .:-")
+        printed_range = parse_range(match.group("range"))
+        if not lookup_test(name) and not printed_range:
+            continue
+        yield {"name": name, "value": _number(match.group("value")), "qualifier": match.group("qualifier") or "",
+               "unit": (match.group("unit") or match.group("unit_after") or "").strip(), "range": printed_range}
+
+def classify(value, low, high):
+    if low is not None and value < low:
+        return "low"
+    if high is not None and value > high:
+        return "high"
+    return "normal"
+
+def flag_row(row, age, sex):
+    """
+    Attach the test key, panel, applicable range and status to a parsed row.
+    The printed range is used when there is one, else the local rule for the patient.
+    """
+    key = lookup_test(row["name"])
+    flagged = dict(row, test=key, panel=None, low=None, high=None, ref_source=None, status="unknown",
+                   canonical_unit=None, unit_factor=None)
+    factor = None
+    if key:
+        display, panel, unit, units, _, _ = REFERENCE_RANGES[key]
+        flagged.update(name=display, panel=panel)
+        # The local range applies when the unit is the table's (or convertible to it); a missing unit is taken as canonical.
+        given_unit = normalize_unit(row["unit"])
+        factor = 1 if given_unit in ("", unit) else units.get(given_unit)
+        if factor:
+            # value * unit_factor is the value in the table's unit, which report history compares across reports.
+            flagged.update(canonical_unit=unit, unit_factor=factor)
+    if row["range"]:
+        # The range the lab printed matches its own method and units, so it always wins.
+        flagged.update(low=row["range"][0], high=row["range"][1], ref_source="report")
+    elif key and factor:
+        rule = reference_rule(key, age, sex)
+        if rule:
+            low, high = rule
+            # Keep the range in the report's unit so it reads next to the value.
+            flagged.update(low=low / factor if low is not None else None, high=high / factor if high is not None else None,
+                           ref_source="local")
+    if flagged["ref_source"]:
+        flagged["status"] = classify(row["value"], flagged["low"], flagged["high"])
+    return flagged
+
+def parse_report(text, age=None, sex=None):
+    """Rows from the report text, flagged for the patient (age/sex override what the report prints)."""
+    patient = patient_details(text)
+    patient.update({name: value for name, value in (("age", age), ("sex", sex)) if value is not None})
+    rows, seen = [], set()
+    for row in parse_rows(text):
+        flagged = flag_row(row, patient["age"], patient["sex"])
+        # Multi-page reports often repeat a row in a summary; keep the first.
+        identity = (flagged["test"] or _name_key(flagged["name"]), flagged["value"])
+        if identity not in seen:
+            seen.add(identity)
+            rows.append(flagged)
+    return {"patient": patient, "rows": rows}
+
+def panels(rows):
+    return list(dict.fromkeys(row["panel"] for row in rows if row["panel"]))
+
+def _format_number(value):
+    return f"{round(value, 2):g}"
+
+def format_range(low, high):
+    if low is not None and high is not None:
+        return f"{_format_number(low)} - {_format_number(high)}"
+    if high is not None:
+        return f"< {_format_number(high)}"
+    if low is not None:
+        return f"> {_format_number(low)}"
+    return "-"
+
+def format_value(row):
+    return row["qualifier"] + _format_number(row["value"])
+
+STATUS_LABELS = {
+    "en": {"normal": "Normal", "low": "Low", "high": "High", "unknown": "-"},
+    "hi": {"normal": "सामान्य", "low": "कम", "high": "अधिक", "unknown": "-"},
+}
+TABLE_HEADERS = {
+    "en": ("Parameter", "Value", "Unit", "Reference Range", "Status"),
+    "hi": ("पैरामीटर", "मान", "इकाई", "सामान्य सीमा", "स्थिति"),
+}
+
+def markdown_table(rows, language="en"):
+    """The value table with out-of-range parameters (and their status) in bold."""
+    labels = STATUS_LABELS.get(language, STATUS_LABELS["en"])
+    headers = TABLE_HEADERS.get(language, TABLE_HEADERS["en"])
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    for row in rows:
+        name, status = row["name"], labels[row["status"]]
+        if row["status"] in ("low", "high"):
+            name, status = f"**{name}**", f"**{status}**"
+        lines.append(f"| {name} | {format_value(row)} | {row['unit'] or '-'} | {format_range(row['low'], row['high'])} | {status} |")
+    return "\n".join(lines)
+
+def compact_summary(report):
+    """A few lines for the LLM: patient, panels, out-of-range values in full, the rest as name/value pairs."""
+    patient, rows = report["patient"], report["rows"]
+    lines = [f"Patient: age {patient['age'] if patient['age'] is not None else 'unknown'}, "
+             f"sex {({'M': 'male', 'F': 'female'}).get(patient['sex'], 'unknown')}"]
+    if panels(rows):
+        lines.append("Tests: " + ", ".join(panels(rows)))
+    abnormal = [row for row in rows if row["status"] in ("low", "high")]
+    if abnormal:
+        lines.append("Out of range:")
+        lines.extend(f"- {row['name']}: {format_value(row)} {row['unit']} ({row['status']}; ref {format_range(row['low'], row['high'])})"
+                     for row in abnormal)
+    for label, status in (("Within range", "normal"), ("No reference range", "unknown")):
+        selected = [f"{row['name']} {format_value(row)} {row['unit']}".strip() for row in rows if row["status"] == status]
+        if selected:
+            lines.append(f"{label}: " + ", ".join(selected))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        print("Usage: python lab_values.py <report.pdf|report.txt> [--age=N] [--sex=M|F] [--language=en|hi]", file=sys.stderr)
+        sys.exit(1)
+    flags = parse_flags(sys.argv[1:])
+    if args[0].lower().endswith(".pdf"):
+        import ocr_pipeline
+        text = ocr_pipeline.extract_text_from_pdf(args[0])
+    else:
+        with open(args[0], encoding="utf-8") as f:
+            text = f.read()
+    report = parse_report(text, age=int(flags["age"]) if "age" in flags else None,
+                          sex=flags["sex"][0].upper() if "sex" in flags else None)
+    summary = compact_summary(report)
+    print(json.dumps({"patient": report["patient"], "rows": report["rows"],
+                      "text_chars": len(text), "summary_chars": len(summary)}, indent=2, ensure_ascii=False))
+    print(markdown_table(report["rows"], flags.get("language", "en")))
+    print(summary)
@@ -0,0 +1,99 @@
+"""
+Text extraction for lab report PDFs.
+
+Most reports are digitally generated and already carry a text layer, so
+extract_pages() first reads each page's text directly with PyMuPDF and only
+OCRs pages with fewer than OCR_MIN_TEXT_CHARS characters (scans, or pages
+that are just an embedded image), recording which path every page took.
+
+For the OCR fallback, instead of rasterizing the whole PDF up front (every
+page image held in memory) and OCRing pages one after another, each page is
+rasterized lazily inside a worker process, in grayscale and at a capped DPI,
+OCRed there and dropped. At most `workers * 2` pages are in flight, so memory
+stays bounded regardless of page count, and page texts are joined in order
+with the same "--- Page N ---" markers as before.
+
+Configuration (environment variables):
+    OCR_DPI             rasterization DPI (default 200, capped at MAX_OCR_DPI)
+    OCR_WORKERS         worker processes (default: CPU count)
+    OCR_MIN_TEXT_CHARS  text-layer characters below which a page is OCRed (default 40)
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pymupdf as fitz  # PyMuPDF >= 1.24.3; importing "fitz" there prints a deprecation notice on stdout
+except ImportError:
+    import fitz  # PyMuPDF
+from pdf2image import convert_from_path, pdfinfo_from_path
+from pytesseract import image_to_string
+
+MAX_OCR_DPI = 300
+DEFAULT_DPI = int(os.getenv("OCR_DPI", "200"))
+DEFAULT_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or None
+MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", "40"))
+
+def page_count(pdf_path):
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+def page_marker(page_number):
+    return f"\n--- Page {page_number} ---\n"
+
+def _init_worker():
+    # One Tesseract thread per process; the pool already uses every core.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+def ocr_page(args):
+    """Worker: rasterize a single page (1-based) in grayscale and OCR it."""
+    pdf_path, page_number, dpi = args
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=True)
+    return page_number, image_to_string(images[0]) if images else ""
+
+def iter_page_texts(pdf_path, dpi=DEFAULT_DPI, workers=DEFAULT_WORKERS, pages=None):
+    """Yield (page_number, text) in page order while later pages are still being OCRed."""
+    dpi = min(dpi, MAX_OCR_DPI)
+    pages = list(pages) if pages is not None else list(range(1, page_count(pdf_path) + 1))
+    workers = min(workers or os.cpu_count() or 1, max(len(pages), 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        in_flight = deque()
+        remaining = iter(pages)
+        for page_number in remaining:
+            in_flight.append(pool.submit(ocr_page, (pdf_path, page_number, dpi)))
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            yield in_flight.popleft().result()
+            next_page = next(remaining, None)
+            if next_page is not None:
+                in_flight.append(pool.submit(ocr_page, (pdf_path, next_page, dpi)))
+
+def extract_pages(pdf_path, dpi=DEFAULT_DPI, workers=DEFAULT_WORKERS, min_text_chars=MIN_TEXT_CHARS):
+    """
+    Return [{"page", "method": "text" | "ocr", "chars", "text"}] in page order,
+    using the PDF's text layer where it has enough text and OCR elsewhere.
+    """
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for index, page in enumerate(doc):
+            text = page.get_text("text")
+            method = "text" if len(text.strip()) >= min_text_chars else "ocr"
+            pages.append({"page": index + 1, "method": method, "text": text if method == "text" else ""})
+
+    ocr_pages = [entry["page"] for entry in pages if entry["method"] == "ocr"]
+    if ocr_pages:
+        for page_number, text in iter_page_texts(pdf_path, dpi, workers, pages=ocr_pages):
+            pages[page_number - 1]["text"] = text
+    for entry in pages:
+        entry["chars"] = len(entry["text"])
+    return pages
+
+def format_pages(pages):
+    return "".join(page_marker(entry["page"]) + entry["text"] for entry in pages)
+
+def page_methods(pages):
+    """The per-page extraction summary, without the text."""
+    return [{"page": entry["page"], "method": entry["method"], "chars": entry["chars"]} for entry in pages]
+
+def extract_text_from_pdf(pdf_path, dpi=DEFAULT_DPI, workers=DEFAULT_WORKERS):
+    return format_pages(extract_pages(pdf_path, dpi, workers))
@@ -1,80 +1,35 @@
-# #!/usr/bin/env python
-# import sys
-# sys.stdout.reconfigure(encoding='utf-8')
-# import os
-# from pdf2image import convert_from_path
-# from pytesseract import image_to_string
-# import google.generativeai as genai
-# from dotenv import load_dotenv
-# from deep_translator import GoogleTranslator
-
-# # Load environment variables
-# load_dotenv()
-# API_KEY = os.getenv("API_KEY")
-# if not API_KEY:
-#     print("API_KEY not found. Please set it in the .env file.", file=sys.stderr)
-#     sys.exit(1)
-# genai.configure(api_key=API_KEY)
-
-# def extract_text_from_pdf(pdf_path):
-#     try:
-#         images = convert_from_path(pdf_path)
-#         extracted_text = ""
-#         for i, image in enumerate(images):
-#             extracted_text += f"\n--- Page {i + 1} ---\n"
-#             extracted_text += image_to_string(image)
-#         return extracted_text
-#     except Exception as e:
-#         return f"Error extracting text from PDF: {e}"
-
-# def generate_inference(prompt):
-#     try:
-#         model = genai.GenerativeModel("gemini-1.5-flash")
-#         response = model.generate_content(prompt)
-#         return response.text
-#     except Exception as e:
-#         return f"Error generating inference: {e}"
-
-# def translate_to_hindi(text):
-#     try:
-#         return GoogleTranslator(source="en", target="hi").translate(text)
-#     except Exception as e:
-#         return f"Error translating text: {e}"
-
-# if __name__ == "__main__":
-#     if len(sys.argv) < 2:
-#         print("No PDF file path provided", file=sys.stderr)
-#         sys.exit(1)
-#     pdf_path = sys.argv[1]
-#     language = sys.argv[2] if len(sys.argv) > 2 else "en"
-
-#     extracted_text = extract_text_from_pdf(pdf_path)
-    
-#     prompt = extracted_text + """
-    
-# Provide inferences and plausible remedies based on the data.
-# - List the type of test.
-# - Do not include the doctor's name; just provide concise, data point-wise information.
-# - Indicate if the person is healthy, moderately healthy, or unhealthy.
-# - Summarize key values in a tabular format and mark those out of the normal range.
-# - Include three segments: 'Inferences', 'Plausible Remedies', and 'Disclaimer'.
-# """
-#     result = generate_inference(prompt)
-#     if language.lower() == "hi":
-#         result = translate_to_hindi(result)
-#     print(result)
-
-
-
-
 #!/usr/bin/env python
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 import os
-from pdf2image import convert_from_path
-from pytesseract import image_to_string
-import google.generativeai as genai
+import json
+import time
 from dotenv import load_dotenv
+import ocr_pipeline
+import lab_values
+import report_history
+import chunked_inference
+# Gemini calls go through the shared gateway (pooled client, retries, metrics).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm-gateway"))
+from gateway import generate, stream_generate, response_text
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import write_ndjson, pop_flag, pop_option
+# --no-cache forces a fresh Gemini call instead of a cached response.
+BYPASS_CACHE = pop_flag("--no-cache")
+# --stream writes NDJSON: {"type": "chunk", "text": ...} lines as the model
+# produces them, then {"type": "done", ...} (or {"type": "error", ...}).
+STREAM = pop_flag("--stream")
+# --json prints {"result": ..., "pages": [...]} instead of the bare text when not streaming.
+JSON_OUTPUT = pop_flag("--json")
+# --patient=<id> saves the parsed values to the report history (see report_history.py).
+PATIENT = pop_option("patient")
+# --chunked forces map-reduce inference over the extracted text (see chunked_inference.py);
+# reports that don't parse into lab values and exceed REPORT_CHUNK_THRESHOLD tokens use it automatically.
+CHUNKED = pop_flag("--chunked")
+# Bump when the prompt changes so cached responses for the old prompt are not reused.
+PROMPT_VERSION = "report-inference-v1"
+STRUCTURED_PROMPT_VERSION = "report-inference-structured-v1"
+REDUCE_PROMPT_VERSION = "report-inference-reduce-v1"
 
 # Load environment variables
 load_dotenv()
@@ -82,27 +37,78 @@ API_KEY = os.getenv("API_KEY")
 if not API_KEY:
     print("API_KEY not found. Please set it in the .env file.", file=sys.stderr)
     sys.exit(1)
-genai.configure(api_key=API_KEY)
 
 def extract_text_from_pdf(pdf_path):
+    """The report text and which path (text layer or OCR) each page took."""
     try:
-        images = convert_from_path(pdf_path)
-        extracted_text = ""
-        for i, image in enumerate(images):
-            extracted_text += f"\n--- Page {i + 1} ---\n"
-            extracted_text += image_to_string(image)
-        return extracted_text
+        # Pages with a text layer are read directly; the rest are rasterized
+        # lazily and OCRed in a process pool (see ocr_pipeline.py).
+        pages = ocr_pipeline.extract_pages(pdf_path)
+        page_methods = ocr_pipeline.page_methods(pages)
+        print(json.dumps({"extraction": page_methods}), file=sys.stderr)
+        return ocr_pipeline.format_pages(pages), page_methods
     except Exception as e:
-        return f"Error extracting text from PDF: {e}"
+        return f"Error extracting text from PDF: {e}", []
 
-def generate_inference(prompt):
+def generate_inference(prompt, template=PROMPT_VERSION):
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text
+        return response_text(generate(prompt, api_key=API_KEY,
+                                      template=template, bypass_cache=BYPASS_CACHE))
     except Exception as e:
         return f"Error generating inference: {e}"
 
+def stream_inference(prompt, template=PROMPT_VERSION, header="", page_methods=()):
+    started = time.perf_counter()
+    first_chunk_ms = None
+    # The locally built name/table sections go out before the model starts.
+    if header:
+        write_ndjson({"type": "chunk", "text": header})
+    try:
+        for text in stream_generate(prompt, api_key=API_KEY, template=template, bypass_cache=BYPASS_CACHE):
+            if first_chunk_ms is None:
+                first_chunk_ms = round((time.perf_counter() - started) * 1000, 2)
+            write_ndjson({"type": "chunk", "text": text})
+    except Exception as e:
+        write_ndjson({"type": "error", "error": f"Error generating inference: {e}"})
+        return
+    write_ndjson({"type": "done", "first_chunk_ms": first_chunk_ms,
+                  "total_ms": round((time.perf_counter() - started) * 1000, 2), "pages": list(page_methods),
+                  "structured": bool(header)})
+
+HEADINGS = {
+    "en": ("Name of Test", "Table", "Laboratory Report"),
+    "hi": ("परीक्षण का नाम", "तालिका", "प्रयोगशाला रिपोर्ट"),
+}
+
+def structured_header(report, language):
+    """The 'Name of Test' and 'Table' sections, built locally from the parsed values."""
+    language = "en" if language == "en" else "hi"
+    name_heading, table_heading, fallback_name = HEADINGS[language]
+    test_names = ", ".join(lab_values.panels(report["rows"])) or fallback_name
+    return (f"## {name_heading}\n{test_names}\n\n"
+            f"## {table_heading}\n{lab_values.markdown_table(report['rows'], language)}\n\n")
+
+def structured_prompt(report, language):
+    """Ask only for the narrative sections; the model sees the compact summary, not the OCR text."""
+    summary = lab_values.compact_summary(report)
+    if language == "en":
+        return summary + """
+
+The test name and the table of values above are already shown to the user. Based on these lab results:
+- Is the person healthy, moderately healthy, or unhealthy?
+- Keep the inferences in accordance with the patient's age; values that are optimal for the young may not be for the older generation.
+- Keep it concise, data point-wise, and summarized. Do not repeat the table.
+- The generated text must include exactly 3 segments in this order with these headings: 'Inferences', 'Plausible Remedies', 'Disclaimer'
+"""
+    return summary + """
+
+परीक्षण का नाम और मानों की तालिका उपयोगकर्ता को पहले ही दिखाई जा चुकी है। इन परिणामों के आधार पर:
+- क्या व्यक्ति स्वस्थ, मध्यम रूप से स्वस्थ, या अस्वस्थ है?
+- उम्र के अनुसार अनुमान रखें, जो मूल्य युवाओं के लिए इष्टतम हो सकते हैं, वे पुरानी पीढ़ी के लिए नहीं हो सकते हैं
+- इसे संक्षिप्त, डेटा बिंदु-वार, और सारांशित रखें। तालिका को दोहराएं नहीं।
+- उत्तर हिंदी में दें और उसमें इसी क्रम में ठीक 3 शीर्षक हों: 'निष्कर्ष', 'संभावित उपचार', 'अस्वीकरण'
+"""
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("No PDF file path provided", file=sys.stderr)
@@ -110,11 +116,28 @@ if __name__ == "__main__":
     pdf_path = sys.argv[1]
     language = sys.argv[2] if len(sys.argv) > 2 else "en"
 
-    extracted_text = extract_text_from_pdf(pdf_path)
-    
-    # Prepare prompt based on selected language
-    if language == "en":
-        prompt = extracted_text + """
+    extracted_text, page_methods = extract_text_from_pdf(pdf_path)
+
+    # Values, ranges and flags are extracted locally when the report parses;
+    # the model then only writes the narrative from a compact summary.
+    report = lab_values.parse_report(extracted_text)
+    if PATIENT and report["rows"]:
+        try:
+            report_id = report_history.ReportHistory().add_report(
+                PATIENT, report_history.parse_report_date(extracted_text), report["rows"],
+                ", ".join(lab_values.panels(report["rows"])) or None)
+            print(json.dumps({"history_report_id": report_id}), file=sys.stderr)
+        except Exception as e:
+            print(f"Could not save report history: {e}", file=sys.stderr)
+    header = ""
+    template = PROMPT_VERSION
+    if len(report["rows"]) >= lab_values.MIN_ROWS and not CHUNKED:
+        header = structured_header(report, language)
+        prompt = structured_prompt(report, language)
+        template = STRUCTURED_PROMPT_VERSION
+    # Otherwise fall back to sending the extracted text, based on selected language
+    elif language == "en":
+        instructions = """
         
 Please provide inferences based on the data:
 - Include the type of test
@@ -132,7 +155,7 @@ Please provide inferences based on the data:
 - The generated Text must include 5 segments in the following order with the 5 headings,'Name of Test' 'Table', 'Inferences', 'Plausible Remedies', 'Disclaimer'
 """
     else:
-        prompt = extracted_text + """
+        instructions = """
 कृपया डेटा के आधार पर निष्कर्ष प्रदान करें:
 
 -परीक्षण के प्रकार को शामिल करें
@@ -150,5 +173,26 @@ Please provide inferences based on the data:
 - उत्पन्न पाठ में 5 शीर्षकों के साथ निम्नलिखित क्रम में 5 खंड शामिल होने चाहिए, 'परीक्षण का नाम' 'तालिका', 'निष्कर्ष', 'संभावित उपचार', 'अस्वीकरण'
 """
 
-    result = generate_inference(prompt)
-    print(result)
\ No newline at end of file
+    if not header:
+        prompt = extracted_text + instructions
+        if CHUNKED or chunked_inference.estimate_tokens(prompt) > chunked_inference.CHUNK_THRESHOLD:
+            try:
+                extracts, chunk_stats = chunked_inference.extract_chunks(
+                    extracted_text, api_key=API_KEY, bypass_cache=BYPASS_CACHE)
+                prompt = chunked_inference.reduce_prompt(extracts, instructions)
+                template = REDUCE_PROMPT_VERSION
+                print(json.dumps({"chunked": chunk_stats}), file=sys.stderr)
+            except Exception as e:
+                print(f"Chunked inference failed, sending the full text: {e}", file=sys.stderr)
+
+    print(json.dumps({"lab_rows": len(report["rows"]), "structured": bool(header),
+                      "text_chars": len(extracted_text), "prompt_chars": len(prompt)}), file=sys.stderr)
+
+    if STREAM:
+        stream_inference(prompt, template, header, page_methods)
+    else:
+        result = generate_inference(prompt, template)
+        if JSON_OUTPUT:
+            print(json.dumps({"result": header + result, "pages": page_methods}, ensure_ascii=False))
+        else:
+            print(header + result)
\ No newline at end of file
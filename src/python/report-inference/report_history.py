@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+"""
+Per-patient lab report history and trend computation.
+
+Every report that report-inference.py parses (see lab_values.py) can be
+saved here: one row per report in lab_reports, indexed by (patient_id,
+report_date), and one row per value in lab_values, indexed by (patient_id,
+test, report_date). Re-saving the same report is a no-op.
+
+Known tests are stored in their canonical unit (REFERENCE_RANGES), so a
+platelet count printed as 250000 /cumm in one report and 2.4 lakhs/cumm in
+the next compares as 250 and 240; a known test printed in a unit that can't
+be converted is left out of the history. Other tests are keyed by their
+printed name and unit.
+
+trends() loads a patient's last N reports in a single indexed query, lays
+the values out as a tests x reports matrix and computes, with numpy over all
+tests at once: first/previous/latest values, the latest delta and percent
+change, a least-squares slope per 30 days and the previous -> latest
+normal/low/high transition. trend_summary() turns that into one line per
+test, so the text sent to the LLM grows with the number of tests, not with
+the number of reports compared.
+
+Configuration (environment variables):
+    REPORT_HISTORY_DB  SQLite file (default "lab_history.sqlite" in the gitignored data
+                       directory, see common/data_paths.py)
+
+Usage (print a patient's trends):
+    python src/python/report-inference/report_history.py <patient_id> [--reports=10]
+"""
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+from datetime import date, datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from data_paths import data_path
+from lab_values import normalize_unit
+
+STATUS_CODES = {"low": -1, "normal": 0, "high": 1}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+UNKNOWN = 9
+# Normal tests that moved less than this (percent) are listed together in the summary.
+STABLE_PCT = 5
+
+MONTHS = {name: i + 1 for i, name in enumerate(("jan", "feb", "mar", "apr", "may", "jun",
+                                                "jul", "aug", "sep", "oct", "nov", "dec"))}
+NUMERIC_DATE = re.compile(r"\b(?:Collect\w*|Report\w*|Sample|Receiv\w*)?\s*(?:Date|On)\b[^\n\d]{0,20}?"
+                          r"(\d{1,2})[/\-.](\d{1,2})[/\-.](\d{2,4})", re.IGNORECASE)
+NAMED_DATE = re.compile(r"\b(?:Date|On)\b[^\n\d]{0,20}?(\d{1,2})[\s\-/]([A-Za-z]{3})[A-Za-z]*[\s\-/,]*(\d{4})", re.IGNORECASE)
+
+def parse_report_date(text, default=None):
+    """The report's date as YYYY-MM-DD (day-first, as Indian labs print it), else default or today."""
+    for pattern in (NUMERIC_DATE, NAMED_DATE):
+        match = pattern.search(text or "")
+        if not match:
+            continue
+        day, month, year = match.groups()
+        month = int(month) if month.isdigit() else MONTHS.get(month.lower())
+        year = int(year) + 2000 if len(year) == 2 else int(year)
+        try:
+            return date(year, month, int(day)).isoformat()
+        except (TypeError, ValueError):
+            continue
+    return default or date.today().isoformat()
+
+def fingerprint(rows):
+    return hashlib.sha256(json.dumps(sorted((row["test"] or row["name"], row["value"]) for row in rows)).encode("utf-8")).hexdigest()
+
+def stored_value(row):
+    """(test, name, value, unit, low, high, status) as saved, or None for a value that can't be compared."""
+    if row["test"] is None:
+        # Unrecognised tests are keyed by printed name and unit, so they only line up with the same unit.
+        unit = normalize_unit(row["unit"])
+        return ("name:" + row["name"].lower() + (f" [{unit}]" if unit else ""), row["name"],
+                row["value"], row["unit"], row["low"], row["high"], row["status"])
+    factor = row.get("unit_factor")
+    if not factor:
+        return None
+
+    def scaled(value):
+        return None if value is None else value * factor
+    return (row["test"], row["name"], row["value"] * factor, row["canonical_unit"],
+            scaled(row["low"]), scaled(row["high"]), row["status"])
+
+class ReportHistory:
+    def __init__(self, db_path=None):
+        self.db = sqlite3.connect(db_path or os.getenv("REPORT_HISTORY_DB") or data_path("lab_history.sqlite"),
+                                  timeout=10)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS lab_reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                patient_id TEXT NOT NULL,
+                report_date TEXT NOT NULL,
+                test_type TEXT,
+                fingerprint TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                UNIQUE (patient_id, fingerprint)
+            );
+            CREATE INDEX IF NOT EXISTS idx_lab_reports_patient_date ON lab_reports (patient_id, report_date);
+            CREATE TABLE IF NOT EXISTS lab_values (
+                report_id INTEGER NOT NULL REFERENCES lab_reports (id) ON DELETE CASCADE,
+                patient_id TEXT NOT NULL,
+                report_date TEXT NOT NULL,
+                test TEXT NOT NULL,
+                name TEXT NOT NULL,
+                value REAL NOT NULL,
+                unit TEXT,
+                low REAL,
+                high REAL,
+                status TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lab_values_report ON lab_values (report_id);
+            CREATE INDEX IF NOT EXISTS idx_lab_values_patient_test_date ON lab_values (patient_id, test, report_date);
+        """)
+        self.db.commit()
+
+    def add_report(self, patient_id, report_date, rows, test_type=None):
+        """Store a parsed report; returns its id, or the existing id when the same report was saved before."""
+        patient_id = str(patient_id)
+        key = fingerprint(rows)
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO lab_reports (patient_id, report_date, test_type, fingerprint, created_at) "
+                "VALUES (?, ?, ?, ?, ?)", (patient_id, report_date, test_type, key, time.time()))
+            if not cursor.rowcount:
+                return self.db.execute("SELECT id FROM lab_reports WHERE patient_id = ? AND fingerprint = ?",
+                                       (patient_id, key)).fetchone()[0]
+            report_id = cursor.lastrowid
+            self.db.executemany(
+                "INSERT INTO lab_values (report_id, patient_id, report_date, test, name, value, unit, low, high, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(report_id, patient_id, report_date, *stored) for stored in map(stored_value, rows) if stored])
+        return report_id
+
+    def report_count(self, patient_id):
+        return self.db.execute("SELECT COUNT(*) FROM lab_reports WHERE patient_id = ?", (str(patient_id),)).fetchone()[0]
+
+    def load(self, patient_id, reports=10):
+        """([(report_id, report_date)], value rows) for the patient's last `reports` reports, oldest first."""
+        recent = self.db.execute(
+            "SELECT id, report_date FROM lab_reports WHERE patient_id = ? "
+            "ORDER BY report_date DESC, id DESC LIMIT ?", (str(patient_id), reports)).fetchall()[::-1]
+        if not recent:
+            return [], []
+        ids = [report_id for report_id, _ in recent]
+        values = self.db.execute(
+            f"SELECT report_id, test, name, value, unit, status FROM lab_values "
+            f"WHERE report_id IN ({','.join('?' * len(ids))})", ids).fetchall()
+        return recent, values
+
+    def trends(self, patient_id, reports=10):
+        recent, values = self.load(patient_id, reports)
+        return compute_trends(recent, values)
+
+def compute_trends(recent, values):
+    """Per-test trends over the given reports; see the module docstring."""
+    if not recent:
+        return {"reports": 0, "dates": [], "tests": []}
+    column = {report_id: i for i, (report_id, _) in enumerate(recent)}
+    tests = list(dict.fromkeys(test for _, test, *_ in values))
+    row_of = {test: i for i, test in enumerate(tests)}
+    shape = (len(tests), len(recent))
+    matrix = np.full(shape, np.nan)
+    statuses = np.full(shape, UNKNOWN, dtype=np.int8)
+    names, units = {}, {}
+    for report_id, test, name, value, unit, status in values:
+        r, c = row_of[test], column[report_id]
+        matrix[r, c] = value
+        statuses[r, c] = STATUS_CODES.get(status, UNKNOWN)
+        names[test], units[test] = name, unit
+
+    dates = [report_date for _, report_date in recent]
+    days = np.array([(datetime.fromisoformat(d) - datetime.fromisoformat(dates[0])).days for d in dates], dtype=float)
+    present = ~np.isnan(matrix)
+    count = present.sum(axis=1)
+    rows = np.arange(len(tests))
+    last = len(recent) - 1 - np.argmax(present[:, ::-1], axis=1)
+    first = np.argmax(present, axis=1)
+    # The previous reading is the last one before `last`.
+    before = present.copy()
+    before[rows, last] = False
+    has_previous = before.any(axis=1)
+    previous = np.where(has_previous, len(recent) - 1 - np.argmax(before[:, ::-1], axis=1), last)
+
+    latest_value, previous_value, first_value = matrix[rows, last], matrix[rows, previous], matrix[rows, first]
+    delta = np.where(has_previous, latest_value - previous_value, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = np.where(has_previous & (previous_value != 0), delta / np.abs(previous_value) * 100, np.nan)
+        # Least-squares slope over each test's own readings (masked means).
+        x = np.where(present, days, np.nan)
+        x_centered = x - np.nanmean(x, axis=1, keepdims=True)
+        y_centered = matrix - np.nanmean(matrix, axis=1, keepdims=True)
+        slope = np.nansum(x_centered * y_centered, axis=1) / np.nansum(x_centered ** 2, axis=1)
+    slope = np.where((count >= 2) & np.isfinite(slope), slope * 30, np.nan)
+    out_of_range = ((statuses == -1) | (statuses == 1)).sum(axis=1)
+
+    results = []
+    for i, test in enumerate(tests):
+        status_latest = STATUS_NAMES.get(int(statuses[i, last[i]]), "unknown")
+        status_previous = STATUS_NAMES.get(int(statuses[i, previous[i]]), "unknown") if has_previous[i] else None
+        results.append({
+            "test": test, "name": names[test], "unit": units[test], "readings": int(count[i]),
+            "first": float(first_value[i]), "previous": float(previous_value[i]) if has_previous[i] else None,
+            "latest": float(latest_value[i]), "latest_date": dates[last[i]],
+            "delta": None if np.isnan(delta[i]) else round(float(delta[i]), 3),
+            "change_pct": None if np.isnan(change_pct[i]) else round(float(change_pct[i]), 1),
+            "slope_per_30d": None if np.isnan(slope[i]) else round(float(slope[i]), 3),
+            "status_previous": status_previous, "status_latest": status_latest,
+            "transition": f"{status_previous} -> {status_latest}"
+                          if status_previous and status_previous != status_latest else None,
+            "out_of_range_reports": int(out_of_range[i]),
+        })
+    # Status changes first, then tests currently out of range, then the rest.
+    results.sort(key=lambda t: (t["transition"] is None, t["status_latest"] not in ("low", "high")))
+    return {"reports": len(recent), "dates": dates, "tests": results}
+
+def _number(value):
+    return f"{round(value, 2):g}"
+
+def trend_summary(trends):
+    """Compact text for the LLM: one line per test, independent of how many reports were compared."""
+    if not trends["reports"]:
+        return "No stored reports."
+    lines = [f"Reports compared: {trends['reports']} ({trends['dates'][0]} to {trends['dates'][-1]})"]
+    stable = []
+    for t in trends["tests"]:
+        value = f"{_number(t['latest'])} {t['unit'] or ''}".strip()
+        if t["previous"] is None:
+            lines.append(f"- {t['name']}: {value} ({t['status_latest']}; single reading)")
+            continue
+        if (t["status_latest"] == "normal" and not t["transition"] and not t["out_of_range_reports"]
+                and abs(t["change_pct"] or 0) < STABLE_PCT):
+            stable.append(f"{t['name']} {value}")
+            continue
+        parts = [f"previous {_number(t['previous'])}"]
+        if t["delta"]:
+            parts.append(f"change {t['delta']:+g}" + (f" ({t['change_pct']:+g}%)" if t["change_pct"] is not None else ""))
+        if t["readings"] > 2 and t["slope_per_30d"]:
+            parts.append(f"first {_number(t['first'])}, trend {t['slope_per_30d']:+g}/30 days over {t['readings']} readings")
+        parts.append(t["transition"] or t["status_latest"])
+        if t["out_of_range_reports"]:
+            parts.append(f"out of range in {t['out_of_range_reports']}/{t['readings']} reports")
+        lines.append(f"- {t['name']}: {value} ({'; '.join(parts)})")
+    if stable:
+        lines.append("Stable within range: " + ", ".join(stable))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        print("Usage: python report_history.py <patient_id> [--reports=10]", file=sys.stderr)
+        sys.exit(1)
+    reports = next((int(arg.split("=", 1)[1]) for arg in sys.argv[1:] if arg.startswith("--reports=")), 10)
+    trends = ReportHistory().trends(args[0], reports)
+    print(json.dumps(trends, indent=2))
+    print(trend_summary(trends))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Speech latency per engine: the previous gTTS-to-temp-file path vs. the
+speech module, cold and with a warm audio cache.
+
+Usage:
+    python src/python/speech/benchmark_speech.py [sample.txt] [--engines=gtts,espeak] [--lang=en] [--repeat=3]
+
+Reports time-to-first-audio (when the first segment is playable) and total
+synthesis time. The old path has no first segment before the whole clip is
+done, so its time-to-first-audio equals its total. The cache is written to
+a temporary database, so runs never touch the app's cache.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import tempfile
+
+os.environ["SPEECH_CACHE_DB"] = os.path.join(tempfile.mkdtemp(), "speech-benchmark.sqlite")
+import speech
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+SAMPLE = (
+    "With what I see, the scan shows mild inflammation around the joint. "
+    "Rest the area, apply a cold compress twice a day, and avoid heavy lifting for a week. "
+    "If the swelling or pain increases, see an orthopaedic specialist. "
+    "Disclaimer: This is an AI-generated summary and not a medical diagnosis. Consult a radiologist."
+)
+
+def old_path(text, lang):
+    """The previous text_to_speech + read + base64 + unlink sequence."""
+    from gtts import gTTS
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
+        gTTS(text=text, lang=lang).save(temp_audio.name)
+    try:
+        with open(temp_audio.name, "rb") as af:
+            return base64.b64encode(af.read()).decode("utf-8")
+    finally:
+        os.unlink(temp_audio.name)
+
+def median(values):
+    return round(sorted(values)[len(values) // 2], 2) if values else None
+
+def run_module(text, lang, engine, repeat, cache):
+    os.environ["SPEECH_CACHE"] = "1" if cache else "0"
+    runs = []
+    try:
+        if cache:
+            speech.synthesize(text, lang, engine)  # fill the cache
+        for _ in range(repeat):
+            audio, mime, stats = speech.synthesize(text, lang, engine)
+            runs.append(stats)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {"mime": mime, "bytes": len(audio), "segments": runs[-1]["segments"], "cached": runs[-1]["cached"],
+            "first_audio_ms": median([r["first_audio_ms"] for r in runs]),
+            "total_ms": median([r["total_ms"] for r in runs])}
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = parse_flags(sys.argv[1:])
+    if args:
+        with open(args[0], encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = SAMPLE
+    lang = flags.get("lang", "en")
+    repeat = int(flags.get("repeat", 3))
+    results = {"chars": len(text), "engines": {}}
+
+    for engine in flags.get("engines", "gtts,espeak").split(","):
+        entry = {}
+        if engine == "gtts":
+            timings = []
+            try:
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    old_path(text, lang)
+                    timings.append((time.perf_counter() - started) * 1000)
+                entry["temp_file"] = {"first_audio_ms": median(timings), "total_ms": median(timings)}
+            except Exception as e:
+                entry["temp_file"] = {"error": f"{type(e).__name__}: {e}"}
+        entry["cold"] = run_module(text, lang, engine, repeat, cache=False)
+        entry["warm_cache"] = run_module(text, lang, engine, repeat, cache=True)
+        results["engines"][engine] = entry
+    print(json.dumps(results, indent=2))
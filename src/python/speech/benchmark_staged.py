@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Time-to-first-text and end-to-end latency for the radiology, ai-doctor and
+general health support scripts: the single JSON result vs. --staged output.
+
+Usage:
+    python src/python/speech/benchmark_staged.py [--scripts=radiology,ai-doctor,general-health]
+        [--languages=en,hi] [--repeat=3] [--image=xray.png] [--symptoms="fever, cough"]
+
+Each script is run as the routes run it, and timed from spawn: first text is
+when the first stdout line carrying text arrives (the whole JSON result in
+the old mode, the first "text" message with --staged), total is process
+exit. Point GEMINI_API_BASE at mock_gemini.py for stable model latency, and
+set SPEECH_ENGINE / TRANSLATION_BACKEND as for the app. Without --image a
+blank PNG is used.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+PYTHON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPTS = {
+    "radiology": os.path.join(PYTHON_DIR, "radiology", "radiology.py"),
+    "ai-doctor": os.path.join(PYTHON_DIR, "ai-doctor", "ai_doctor.py"),
+    "general-health": os.path.join(PYTHON_DIR, "genral-health-support", "genral_health_support.py"),
+}
+
+def blank_image():
+    from PIL import Image
+    path = os.path.join(tempfile.mkdtemp(), "blank.png")
+    Image.new("RGB", (256, 256)).save(path)
+    return path
+
+def run_once(args, staged):
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable] + args + (["--staged"] if staged else []),
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    first_text_ms, audio_ms = None, None
+    for line in process.stdout:
+        if not line.strip():
+            continue
+        message = json.loads(line)
+        kind = message.get("type") if staged else "text"
+        if kind == "text" and first_text_ms is None:
+            first_text_ms = (time.perf_counter() - started) * 1000
+        if (kind == "audio" or not staged) and audio_ms is None:
+            audio_ms = (time.perf_counter() - started) * 1000
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(stderr.strip().splitlines()[-1] if stderr.strip() else f"exit {process.returncode}")
+    return {"first_text_ms": first_text_ms, "first_audio_ms": audio_ms,
+            "total_ms": (time.perf_counter() - started) * 1000}
+
+def median(values):
+    values = [v for v in values if v is not None]
+    return round(sorted(values)[len(values) // 2], 2) if values else None
+
+def measure(args, staged, repeat):
+    runs = []
+    try:
+        for _ in range(repeat):
+            runs.append(run_once(args, staged))
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {key: median([run[key] for run in runs]) for key in runs[0]}
+
+if __name__ == "__main__":
+    flags = parse_flags(sys.argv[1:])
+    repeat = int(flags.get("repeat", 3))
+    image = flags.get("image") or blank_image()
+    symptoms = flags.get("symptoms", "fever, cough and a sore throat")
+    results = {}
+
+    for script in flags.get("scripts", ",".join(SCRIPTS)).split(","):
+        results[script] = {}
+        for language in flags.get("languages", "en,hi").split(","):
+            target = symptoms if script == "general-health" else image
+            args = [SCRIPTS[script], target, language]
+            results[script][language] = {"json": measure(args, False, repeat),
+                                         "staged": measure(args, True, repeat)}
+    print(json.dumps(results, indent=2))
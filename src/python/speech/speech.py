@@ -0,0 +1,217 @@
+"""
+Shared text-to-speech for the LLM features (radiology, ai-doctor and general
+health support).
+
+Text is cleaned for reading aloud (markdown emphasis, headings and links
+removed) and split into sentence segments. iter_speech() yields segments in
+order as soon as each is synthesized: segments are synthesized in parallel,
+and the first one is ready after a single short synthesis rather than the
+whole text. Audio is produced in memory (no temp files) and cached per
+segment in SQLite, so the fixed disclaimer sentences are synthesized once.
+synthesize() joins the segments into one clip and reports time-to-first-audio
+and total synthesis time.
+
+Engines:
+    gtts    Google Translate's TTS through gTTS (network; MP3; the default)
+    espeak  espeak-ng run locally (offline; WAV)
+
+Configuration (environment variables):
+    SPEECH_ENGINE            "gtts" or "espeak" (default "gtts")
+    SPEECH_WORKERS           segments synthesized in parallel (default 4)
+    SPEECH_ESPEAK_BINARY     espeak executable (default "espeak-ng")
+    SPEECH_CACHE             "0" disables the audio cache (default "1")
+    SPEECH_CACHE_DB          SQLite file (default: the shared cache file, see common/data_paths.py)
+    SPEECH_CACHE_MAX_ITEMS   cached segments kept (default 5000)
+
+Scripts import this module by adding its directory to sys.path:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "speech"))
+    from speech import synthesize
+"""
+import io
+import os
+import re
+import sys
+import time
+import wave
+import base64
+import sqlite3
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from data_paths import cache_db_path
+
+ENGINE = os.getenv("SPEECH_ENGINE", "gtts").lower()
+WORKERS = int(os.getenv("SPEECH_WORKERS", "4"))
+
+SENTENCE_BREAKS = re.compile(r"(?<=[.!?।])\s+|\n+")
+# Short sentences are merged up to this length so a list of fragments isn't one request each.
+MIN_SEGMENT_CHARS = 60
+
+class GttsEngine:
+    name = "gtts"
+    mime = "audio/mpeg"
+
+    def synthesize(self, text, lang):
+        from gtts import gTTS
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def join(clips):
+        # MP3 frames are self-contained; gTTS itself concatenates them this way.
+        return b"".join(clips)
+
+class EspeakEngine:
+    name = "espeak"
+    mime = "audio/wav"
+    voices = {"en": "en-us", "hi": "hi"}
+
+    def __init__(self):
+        self.binary = os.getenv("SPEECH_ESPEAK_BINARY", "espeak-ng")
+
+    def synthesize(self, text, lang):
+        result = subprocess.run([self.binary, "--stdout", "--stdin", "-v", self.voices.get(lang, lang)],
+                                input=text.encode("utf-8"), capture_output=True, check=True)
+        return result.stdout
+
+    @staticmethod
+    def join(clips):
+        if len(clips) == 1:
+            return clips[0]
+        output = io.BytesIO()
+        with wave.open(output, "wb") as joined:
+            for i, clip in enumerate(clips):
+                with wave.open(io.BytesIO(clip), "rb") as part:
+                    if i == 0:
+                        joined.setparams(part.getparams())
+                    joined.writeframes(part.readframes(part.getnframes()))
+        return output.getvalue()
+
+ENGINES = {"gtts": GttsEngine, "espeak": EspeakEngine}
+
+class SpeechCache:
+    def __init__(self, db_path=None, max_items=5000):
+        self.max_items = max_items
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path or cache_db_path(), check_same_thread=False, timeout=10)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS speech_cache (
+                cache_key TEXT PRIMARY KEY,
+                audio BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_speech_cache_last_access ON speech_cache (last_access)")
+        self.db.commit()
+
+    @staticmethod
+    def make_key(engine, lang, text):
+        return f"{engine}:{lang}:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT audio FROM speech_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row:
+                self.db.execute("UPDATE speech_cache SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+                self.db.commit()
+            return bytes(row[0]) if row else None
+
+    def put(self, key, audio):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO speech_cache (cache_key, audio, last_access) VALUES (?, ?, ?)",
+                            (key, audio, time.time()))
+            self.db.execute("DELETE FROM speech_cache WHERE cache_key IN (SELECT cache_key FROM speech_cache "
+                            "ORDER BY last_access DESC LIMIT -1 OFFSET ?)", (self.max_items,))
+            self.db.commit()
+
+_engines = {}
+_cache = None
+_lock = threading.Lock()
+
+def get_engine(name=None):
+    name = (name or ENGINE).lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown speech engine '{name}'. Use one of: {', '.join(ENGINES)}.")
+    with _lock:
+        if name not in _engines:
+            _engines[name] = ENGINES[name]()
+        return _engines[name]
+
+def get_cache():
+    global _cache
+    if os.getenv("SPEECH_CACHE", "1") == "0":
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = SpeechCache(os.getenv("SPEECH_CACHE_DB"),
+                                 int(os.getenv("SPEECH_CACHE_MAX_ITEMS", "5000")))
+        return _cache
+
+def clean_text(text):
+    """Drop what shouldn't be read aloud: markdown emphasis, heading/list markers, table rules and links."""
+    text = re.sub(r"http\S+", "", text)
+    text = re.sub(r"\*+|`+|^#+\s*|^\s*[-+]\s+|^\|?[\s:|-]+\|?$", "", text, flags=re.MULTILINE)
+    return text.replace("|", ", ")
+
+def split_segments(text):
+    segments = []
+    for sentence in SENTENCE_BREAKS.split(clean_text(text)):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        if segments and len(segments[-1]) < MIN_SEGMENT_CHARS:
+            segments[-1] += " " + sentence
+        else:
+            segments.append(sentence)
+    return segments
+
+def _synthesize_segment(engine, cache, text, lang):
+    started = time.perf_counter()
+    key = SpeechCache.make_key(engine.name, lang, text)
+    audio = cache.get(key) if cache else None
+    cached = audio is not None
+    if not cached:
+        audio = engine.synthesize(text, lang)
+        if cache:
+            cache.put(key, audio)
+    return {"text": text, "audio": audio, "cached": cached, "ms": round((time.perf_counter() - started) * 1000, 2)}
+
+def iter_speech(text, lang="en", engine=None):
+    """Yield {"index", "text", "audio", "mime", "cached", "ms"} per segment, in order, as each is ready."""
+    engine = get_engine(engine)
+    cache = get_cache()
+    segments = split_segments(text)
+    if not segments:
+        return
+    with ThreadPoolExecutor(max_workers=min(WORKERS, len(segments))) as pool:
+        futures = [pool.submit(_synthesize_segment, engine, cache, segment, lang) for segment in segments]
+        for index, future in enumerate(futures):
+            yield {"index": index, "mime": engine.mime, **future.result()}
+
+def synthesize(text, lang="en", engine=None):
+    """
+    Speech for the whole text. Returns (audio bytes, mime type, stats) where
+    stats has the engine, segment and cache-hit counts, first_audio_ms and
+    total_ms.
+    """
+    started = time.perf_counter()
+    engine = get_engine(engine)
+    clips, first_audio_ms, cached = [], None, 0
+    for segment in iter_speech(text, lang, engine.name):
+        if first_audio_ms is None:
+            first_audio_ms = round((time.perf_counter() - started) * 1000, 2)
+        clips.append(segment["audio"])
+        cached += segment["cached"]
+    stats = {"engine": engine.name, "segments": len(clips), "cached": cached, "first_audio_ms": first_audio_ms,
+             "total_ms": round((time.perf_counter() - started) * 1000, 2)}
+    return engine.join(clips) if clips else b"", engine.mime, stats
+
+def synthesize_base64(text, lang="en", engine=None):
+    """synthesize() with the audio base64-encoded for the scripts' JSON output."""
+    audio, mime, stats = synthesize(text, lang, engine)
+    return base64.b64encode(audio).decode("utf-8"), mime, stats
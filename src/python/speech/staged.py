@@ -0,0 +1,62 @@
+"""
+Staged output for the scripts that answer with text and speech (radiology,
+ai-doctor and general health support).
+
+Instead of one JSON blob printed after translation and the whole of speech
+synthesis, the answer is written as NDJSON messages as each part is ready:
+
+    {"type": "text", "lang": "en", <field>: ..., "final": false, "ms": ...}
+        the English text, as soon as the model's answer exists
+    {"type": "text", "lang": "hi", <field>: ..., "final": true, "ms": ...}
+        the translation, for a Hindi answer
+    {"type": "audio", "lang": ..., "audio": <base64>, "audio_mime": ..., "speech": {...}, "ms": ...}
+        one per language, once its speech is synthesized
+    {"type": "done", "lang": ..., "first_text_ms": ..., "total_ms": ...}
+
+For a Hindi answer the English speech is synthesized while the translation
+is in flight, and the Hindi speech starts as soon as the translation
+arrives, so the two languages' work overlaps instead of running back to
+back. "ms" is measured from the `started` time the script passes in.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from speech import synthesize_base64
+
+def write_staged(text, language, write, field, translate, started=None):
+    """
+    Write the staged messages for an English answer through write() (one
+    message per call). translate(text) is called for languages other than
+    English. Returns (final text, {"first_text_ms", "total_ms", "speech"}).
+    Errors from translate() or synthesis propagate after the messages
+    already written.
+    """
+    started = started or time.perf_counter()
+
+    def elapsed():
+        return round((time.perf_counter() - started) * 1000, 2)
+
+    def write_audio(lang, future):
+        audio_base64, audio_mime, speech_stats = future.result()
+        write({"type": "audio", "lang": lang, "audio": audio_base64, "audio_mime": audio_mime,
+               "speech": speech_stats, "ms": elapsed()})
+        return speech_stats
+
+    bilingual = language != "en"
+    first_text_ms = elapsed()
+    write({"type": "text", "lang": "en", field: text, "final": not bilingual, "ms": first_text_ms})
+    speech = {}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        english_audio = pool.submit(synthesize_base64, text, "en")
+        final_text = text
+        if bilingual:
+            # Runs here while the English speech is synthesized in the pool.
+            final_text = translate(text)
+            write({"type": "text", "lang": language, field: final_text, "final": True, "ms": elapsed()})
+            translated_audio = pool.submit(synthesize_base64, final_text, language)
+        speech["en"] = write_audio("en", english_audio)
+        if bilingual:
+            speech[language] = write_audio(language, translated_audio)
+    timings = {"first_text_ms": first_text_ms, "total_ms": elapsed()}
+    write({"type": "done", "lang": language, **timings})
+    return final_text, {**timings, "speech": speech}
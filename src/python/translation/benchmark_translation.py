@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Translation latency per backend: one request per text (the old
+GoogleTranslator(...).translate call) vs. the translation layer, cold and
+with a warm sentence cache.
+
+Usage:
+    python src/python/translation/benchmark_translation.py [sample.txt] [--backends=google,marian]
+        [--repeat=3] [--workers=1,4] [--target=hi]
+
+Without a sample file a synthetic response is used: a few paragraphs of
+varied sentences plus the stock disclaimers, repeated to about 12000
+characters so the old path exceeds Google's single-request limit. The cache
+is written to a temporary database, so runs never touch the app's cache.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+
+os.environ["TRANSLATION_CACHE_DB"] = os.path.join(tempfile.mkdtemp(), "translation-benchmark.sqlite")
+import translation
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from cli_flags import parse_flags
+
+DISCLAIMER = ("Disclaimer: This is an AI-generated summary and not a medical diagnosis. "
+              "Consult a qualified doctor before starting any treatment.")
+
+def synthetic_text(target_chars=12000):
+    paragraphs = []
+    i = 0
+    while sum(len(p) for p in paragraphs) < target_chars:
+        i += 1
+        paragraphs.append(
+            f"Finding {i}: the chest radiograph shows no focal consolidation in zone {i}. "
+            f"Heart size is within normal limits for a patient of {20 + i} years. "
+            f"Drink at least {6 + i % 4} glasses of water a day and rest for {i % 3 + 1} days.\n{DISCLAIMER}")
+    return "\n\n".join(paragraphs)
+
+def old_path(text, target):
+    """The previous call sites: a new translator and one request for the whole text."""
+    from deep_translator import GoogleTranslator
+    return GoogleTranslator(source="en", target=target).translate(text)
+
+def timed(fn, repeat):
+    timings, error = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(sorted(timings)[len(timings) // 2], 2) if timings else None, "error": error}
+
+def run_layer(text, target, backend):
+    try:
+        return translation.translate_with_stats(text, target, backend=backend)[1]
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = parse_flags(sys.argv[1:])
+    if args:
+        with open(args[0], encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_text()
+    target = flags.get("target", "hi")
+    repeat = int(flags.get("repeat", 3))
+    results = {"chars": len(text), "backends": {}}
+
+    for backend in flags.get("backends", "google,marian").split(","):
+        entry = {}
+        if backend == "google":
+            entry["single_request"] = timed(lambda: old_path(text, target), repeat)
+        # Cold: no cache, so every distinct sentence is translated.
+        os.environ["TRANSLATION_CACHE"] = "0"
+        for workers in [int(w) for w in flags.get("workers", "1,4").split(",")]:
+            translation.WORKERS = workers
+            entry[f"cold_workers_{workers}"] = run_layer(text, target, backend)
+        os.environ["TRANSLATION_CACHE"] = "1"
+        entry["cache_fill"] = run_layer(text, target, backend)
+        entry["warm_cache"] = run_layer(text, target, backend)
+        results["backends"][backend] = entry
+    print(json.dumps(results, indent=2, ensure_ascii=False))
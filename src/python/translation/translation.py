@@ -0,0 +1,249 @@
+"""
+Shared translation layer for the LLM features (radiology, ai-doctor and
+general health support).
+
+Text is split into sentences, keeping line breaks and whitespace, and each
+sentence is looked up in a SQLite cache first, so stock phrases such as the
+disclaimers are translated once and then served locally. The remaining
+sentences are grouped into chunks under the backend's request-size limit
+(a single Google request fails above 5000 characters; a longer sentence is
+split at whitespace first) and the chunks are translated in parallel, before
+the text is reassembled in order.
+
+Backends:
+    google  deep_translator's GoogleTranslator (network; the default)
+    marian  a local MarianMT model through transformers (offline once the
+            model is downloaded; Helsinki-NLP/opus-mt-<source>-<target>)
+
+Configuration (environment variables):
+    TRANSLATION_BACKEND       "google" or "marian" (default "google")
+    TRANSLATION_WORKERS       chunks translated in parallel (default 4)
+    TRANSLATION_MARIAN_MODEL  model name or local path overriding the default for the language pair
+    TRANSLATION_CACHE         "0" disables the sentence cache (default "1")
+    TRANSLATION_CACHE_DB      SQLite file (default: the shared cache file, see common/data_paths.py)
+
+Scripts import this module by adding its directory to sys.path:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "translation"))
+    from translation import translate
+"""
+import os
+import re
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from data_paths import cache_db_path
+
+BACKEND = os.getenv("TRANSLATION_BACKEND", "google").lower()
+WORKERS = int(os.getenv("TRANSLATION_WORKERS", "4"))
+
+LINE_BREAKS = re.compile(r"(\s*\n\s*)")
+SENTENCE_BREAKS = re.compile(r"((?<=[.!?।])\s+)")
+# Kept as-is: links (the health support answer carries purchase links) and list/heading markers.
+VERBATIM = re.compile(r"(https?://\S+|^\s*(?:[-*+]|\d+\.|#+)\s+)")
+TRANSLATABLE = re.compile(r"[^\W\d_]", re.UNICODE)
+WHITESPACE = re.compile(r"(\s+)")
+
+class GoogleBackend:
+    name = "google"
+    max_chars = 4500
+    parallel = True
+
+    def __init__(self, source, target):
+        from deep_translator import GoogleTranslator
+        self.source, self.target = source, target
+        self.local = threading.local()
+        self._translator_class = GoogleTranslator
+
+    def _translator(self):
+        # One translator per worker thread, reused across chunks.
+        if not hasattr(self.local, "translator"):
+            self.local.translator = self._translator_class(source=self.source, target=self.target)
+        return self.local.translator
+
+    def translate_batch(self, sentences):
+        # One request per chunk: sentences joined by line breaks, which the service keeps.
+        translated = self._translator().translate("\n".join(sentences))
+        lines = translated.split("\n")
+        if len(lines) == len(sentences):
+            return lines
+        if len(sentences) == 1:
+            return [translated]
+        # A line was merged or split, so lines no longer match sentences. Retry
+        # each half; only the half holding the odd line keeps splitting.
+        print(f"Translation chunk of {len(sentences)} sentences came back as {len(lines)} lines; "
+              f"retrying in halves", file=sys.stderr)
+        half = len(sentences) // 2
+        return self.translate_batch(sentences[:half]) + self.translate_batch(sentences[half:])
+
+class MarianBackend:
+    name = "marian"
+    max_chars = 2000
+    # One model instance; batching inside the model is faster than threads.
+    parallel = False
+    batch_size = 16
+
+    def __init__(self, source, target):
+        from transformers import MarianMTModel, MarianTokenizer
+        model_name = os.getenv("TRANSLATION_MARIAN_MODEL") or f"Helsinki-NLP/opus-mt-{source}-{target}"
+        self.tokenizer = MarianTokenizer.from_pretrained(model_name)
+        self.model = MarianMTModel.from_pretrained(model_name)
+        self.model.eval()
+
+    def translate_batch(self, sentences):
+        results = []
+        for i in range(0, len(sentences), self.batch_size):
+            batch = self.tokenizer(sentences[i:i + self.batch_size], return_tensors="pt", padding=True, truncation=True)
+            output = self.model.generate(**batch, max_new_tokens=512)
+            results.extend(self.tokenizer.batch_decode(output, skip_special_tokens=True))
+        return results
+
+BACKENDS = {"google": GoogleBackend, "marian": MarianBackend}
+
+class TranslationCache:
+    def __init__(self, db_path=None):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path or cache_db_path(), check_same_thread=False, timeout=10)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS translation_cache (
+                cache_key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    @staticmethod
+    def make_key(backend, source, target, sentence):
+        return f"{backend}:{source}:{target}:" + hashlib.sha256(sentence.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """{key: translation} for the keys that are cached."""
+        found = {}
+        keys = list(keys)
+        with self.lock:
+            # Stay under SQLite's bound-parameter limit.
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                found.update(self.db.execute(
+                    f"SELECT cache_key, translation FROM translation_cache "
+                    f"WHERE cache_key IN ({','.join('?' * len(batch))})", batch).fetchall())
+        return found
+
+    def put_many(self, items):
+        with self.lock:
+            now = time.time()
+            self.db.executemany("INSERT OR REPLACE INTO translation_cache (cache_key, translation, created_at) "
+                                "VALUES (?, ?, ?)", [(key, translation, now) for key, translation in items])
+            self.db.commit()
+
+_backends = {}
+_cache = None
+_lock = threading.Lock()
+
+def get_backend(source, target, name=None):
+    """The process-wide backend instance for a language pair (models load once)."""
+    name = (name or BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translation backend '{name}'. Use one of: {', '.join(BACKENDS)}.")
+    with _lock:
+        if (name, source, target) not in _backends:
+            _backends[(name, source, target)] = BACKENDS[name](source, target)
+        return _backends[(name, source, target)]
+
+def get_cache():
+    global _cache
+    if os.getenv("TRANSLATION_CACHE", "1") == "0":
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = TranslationCache(os.getenv("TRANSLATION_CACHE_DB"))
+        return _cache
+
+def split_long(piece, max_chars):
+    """
+    Split a piece longer than max_chars at whitespace into parts of at most
+    max_chars, keeping the whitespace between them as separate parts. A single
+    word longer than max_chars is cut at max_chars.
+    """
+    if not max_chars or len(piece) <= max_chars:
+        return [piece]
+    parts, current = [], ""
+    tokens = WHITESPACE.split(piece)
+    for i in range(0, len(tokens), 2):
+        space, word = tokens[i - 1] if i else "", tokens[i]
+        if current.strip() and len(current) + len(space) + len(word) > max_chars:
+            parts.extend([current, space])
+            current = word
+        else:
+            current += space + word
+        while len(current) > max_chars:
+            parts.append(current[:max_chars])
+            current = current[max_chars:]
+    parts.append(current)
+    return [part for part in parts if part]
+
+def segment(text, max_chars=None):
+    """
+    Split text into pieces; returns (pieces, indexes of the pieces to translate).
+    With max_chars, sentences longer than that are split at whitespace so every
+    piece fits in one request.
+    """
+    pieces = []
+    for line in LINE_BREAKS.split(text):
+        if LINE_BREAKS.fullmatch(line) or not line:
+            pieces.append(line)
+        else:
+            for sentence in SENTENCE_BREAKS.split(line):
+                for piece in VERBATIM.split(sentence):
+                    pieces.extend(split_long(piece, max_chars) if piece else [])
+    translatable = [i for i, piece in enumerate(pieces)
+                    if not piece.isspace() and TRANSLATABLE.search(piece) and not VERBATIM.fullmatch(piece)]
+    return pieces, translatable
+
+def make_chunks(sentences, max_chars):
+    chunks, current, size = [], [], 0
+    for sentence in sentences:
+        if current and size + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+def translate_with_stats(text, target="hi", source="en", backend=None):
+    """Translate text; returns (translation, {"backend", "sentences", "cached", "chunks", "ms"})."""
+    started = time.perf_counter()
+    engine = get_backend(source, target, backend)
+    pieces, indexes = segment(text, engine.max_chars)
+    unique = list(dict.fromkeys(pieces[i] for i in indexes))
+    cache = get_cache()
+    keys = {sentence: TranslationCache.make_key(engine.name, source, target, sentence) for sentence in unique}
+    cached = cache.get_many(keys.values()) if cache else {}
+    translations = {sentence: cached[keys[sentence]] for sentence in unique if keys[sentence] in cached}
+
+    missing = [sentence for sentence in unique if sentence not in translations]
+    chunks = make_chunks(missing, engine.max_chars)
+    if chunks:
+        workers = min(WORKERS, len(chunks)) if engine.parallel else 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for chunk, result in zip(chunks, pool.map(engine.translate_batch, chunks)):
+                translations.update(zip(chunk, result))
+        if cache:
+            cache.put_many((keys[sentence], translations[sentence]) for sentence in missing)
+
+    for i in indexes:
+        pieces[i] = translations[pieces[i]]
+    stats = {"backend": engine.name, "sentences": len(unique), "cached": len(unique) - len(missing),
+             "chunks": len(chunks), "ms": round((time.perf_counter() - started) * 1000, 2)}
+    return "".join(pieces), stats
+
+def translate(text, target="hi", source="en", backend=None):
+    return translate_with_stats(text, target, source, backend)[0]
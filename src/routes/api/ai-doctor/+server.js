@@ -6,6 +6,7 @@
     import { tmpdir } from 'os';
     import { fileURLToPath } from 'url';
     import { pathToPyhton } from '../../../python/path.helper';
+    import { ndjsonResponse } from '$lib/server/ndjson';
 
     const __filename = fileURLToPath(import.meta.url);
     const __dirname = path.dirname(__filename);
@@ -21,6 +22,8 @@
 
             // Also get the language selection (default to "en")
             const languageField = formData.get('language') || "en";
+            // staged=true returns NDJSON: the text first, then the audio as a separate message.
+            const stagedOutput = formData.get('staged') === 'true';
 
             // Convert the file data (ArrayBuffer) to a Node Buffer
             const arrayBuffer = await fileField.arrayBuffer();
@@ -35,10 +38,16 @@
             // Compute the absolute path to the Python script.
             // Adjust the relative path as needed.
             // const scriptPath = path.join(__dirname, '../../../python/ai-doctor/ai_doctor.py');
-            const scriptPath = `${path}/ai-doctor/ai_doctor.py`
+            const scriptPath = `${pathToPyhton}/ai-doctor/ai_doctor.py`
 
             // Spawn the Python process, passing the file path and language as arguments
-            const pythonProcess = spawn('python', [scriptPath, filePath, languageField]);
+            const args = [scriptPath, filePath, languageField];
+            if (stagedOutput) args.push('--staged');
+            const pythonProcess = spawn('python', args);
+
+            if (stagedOutput) {
+                return ndjsonResponse(pythonProcess, () => fs.unlink(filePath));
+            }
 
             let output = '';
             let errorOutput = '';
@@ -5,6 +5,19 @@ import path from 'path';
 import { tmpdir } from 'os';
 import { pathToPyhton } from '../../../python/path.helper';
 
+// When set (e.g. http://127.0.0.1:5005), predictions go to the long-lived
+// classifier_server.py instead of spawning a fresh Python process per upload.
+const classifierUrl = process.env.CLASSIFIER_URL;
+
+async function classifyWithServer(filePath, modelType) {
+    const response = await fetch(`${classifierUrl}/predict`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ image_path: filePath, model_type: modelType })
+    });
+    return response.json();
+}
+
 export async function POST({ request }) {
     try {
         // Parse the multipart form data
@@ -27,6 +40,14 @@ export async function POST({ request }) {
         const filePath = path.join(tempDir, fileName);
         await fs.writeFile(filePath, buffer);
 
+        if (classifierUrl) {
+            try {
+                return json(await classifyWithServer(filePath, modelType));
+            } finally {
+                await fs.unlink(filePath);
+            }
+        }
+
         // Compute the absolute path to the Python script
         const scriptPath = `${pathToPyhton}/classifier/classifier.py`;
 
@@ -13,8 +13,9 @@ const comparisonScript = path.join(__dirname, '../../../python/report-inference/
 
 export async function POST({ request, locals }) {
     try {
-        // Expect JSON with: newInference and previousReportId
-        const { newInference, previousReportId } = await request.json();
+        // Expect JSON with: newInference and previousReportId, and optionally
+        // trends: true to compare the user's stored report history instead.
+        const { newInference, previousReportId, trends } = await request.json();
         const userId = locals.user?.id;
 
 
@@ -30,8 +31,13 @@ export async function POST({ request, locals }) {
         }
         const previousInference = row.inference;
 
-        // Spawn a Python process to compare inferences
-        const pythonProcess = spawn('python', [comparisonScript, JSON.stringify(newInference), JSON.stringify(previousInference)]);
+        // Spawn a Python process to compare the two inferences, which are sent on stdin
+        // rather than as arguments. When the client asks for trends and the user has two
+        // or more stored reports, their value trends are compared instead.
+        const args = [comparisonScript];
+        if (trends === true) args.push(`--patient=${userId}`);
+        const pythonProcess = spawn('python', args);
+        pythonProcess.stdin.end(JSON.stringify({ newInference, previousInference }));
         let output = '';
         let errorOutput = '';
 
@@ -6,11 +6,41 @@ import { tmpdir } from 'os';
 import { Readable } from 'stream';
 import { fileURLToPath } from 'url';
 import { pathToPyhton } from '../../../../python/path.helper';
+import { readFrames } from '$lib/server/frames';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 const pythonExecutable = "python";
-const scriptPath = `${pathToPyhton}/exercise/exercise.py`
+const scriptPath = `${pathToPyhton}/exercise/exercise_stream.py`
+
+// Run the offline analysis to completion and return its summary.
+async function analyzeVideo(args, filePath) {
+    const pythonProcess = spawn(pythonExecutable, args);
+
+    let output = '';
+    let errorOutput = '';
+
+    pythonProcess.stdout.on('data', (data) => {
+        output += data.toString();
+    });
+    pythonProcess.stderr.on('data', (data) => {
+        errorOutput += data.toString();
+    });
+
+    const exitCode = await new Promise((resolve) => {
+        pythonProcess.on('close', resolve);
+    });
+
+    // Clean up the temporary file.
+    await fs.unlink(filePath);
+
+    if (exitCode !== 0) {
+        console.error(`Python error: ${errorOutput}`);
+        return new Response(`Python script error: ${errorOutput}`, { status: 500 });
+    }
+
+    return json(JSON.parse(output));
+}
 
 export async function POST({ request }) {
     try {
@@ -29,18 +59,27 @@ export async function POST({ request }) {
         const filePath = path.join(tempDir, fileName);
         await fs.writeFile(filePath, buffer);
 
+        // analyze=true skips the annotated frames and answers with one JSON summary
+        // (rep count and per-rep timestamps; see offline_analysis.py).
+        if (formData.get('analyze') === 'true') {
+            const args = [scriptPath, exerciseType, filePath, '--analyze'];
+            const stride = formData.get('stride');
+            if (stride) args.push(`--stride=${parseInt(stride, 10) || 1}`);
+            return analyzeVideo(args, filePath);
+        }
+
         // Spawn the Python process, passing exerciseType and the video file path.
-        const pythonProcess = spawn(pythonExecutable, [scriptPath, exerciseType, filePath]);
+        // --binary sends raw JPEGs with a small header instead of base64 JSON lines.
+        const pythonProcess = spawn(pythonExecutable, [scriptPath, exerciseType, filePath, '--binary']);
 
         const stream = new Readable({
             read() { }
         });
 
-        pythonProcess.stdout.on('data', (data) => {
-            const lines = data.toString().split('\n').filter(Boolean);
-            for (const line of lines) {
-                stream.push(`data: ${line}\n\n`);
-            }
+        // Each complete frame becomes one event, in the same { rep_count, frame } shape as before.
+        readFrames(pythonProcess, ({ rep_count, frame_index, timestamp, jpeg }) => {
+            const event = { rep_count, frame_index, timestamp, frame: jpeg.toString('base64') };
+            stream.push(`data: ${JSON.stringify(event)}\n\n`);
         });
 
         pythonProcess.stdout.on('end', () => {
@@ -4,6 +4,7 @@ import { tmpdir } from 'os';
 import fs from 'fs/promises';
 import path from 'path';
 import { pathToPyhton } from '../../../python/path.helper';
+import { ndjsonResponse } from '$lib/server/ndjson';
 
 export async function POST({ request }) {
     try {
@@ -11,6 +12,10 @@ export async function POST({ request }) {
         const formData = await request.formData();
         const symptoms = formData.get('symptoms');
         const language = formData.get('language') || "en";
+        // stream=true returns NDJSON chunks as the model generates them.
+        const streamOutput = formData.get('stream') === 'true';
+        // staged=true returns NDJSON: the text first, then the audio as a separate message.
+        const stagedOutput = formData.get('staged') === 'true';
         if (!symptoms || typeof symptoms !== 'string') {
             return new Response("No symptoms provided", { status: 400 });
         }
@@ -20,7 +25,14 @@ export async function POST({ request }) {
         const scriptPath = `${pathToPyhton}/genral-health-support/genral_health_support.py`
 
         // Spawn the Python process with the symptoms and language as arguments.
-        const pythonProcess = spawn('python', [scriptPath, symptoms, language]);
+        const args = [scriptPath, symptoms, language];
+        if (streamOutput) args.push('--stream');
+        if (stagedOutput) args.push('--staged');
+        const pythonProcess = spawn('python', args);
+
+        if (streamOutput || stagedOutput) {
+            return ndjsonResponse(pythonProcess);
+        }
 
         let output = "";
         let errorOutput = "";
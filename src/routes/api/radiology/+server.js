@@ -6,6 +6,7 @@ import path from 'path';
 import { tmpdir } from 'os';
 import { fileURLToPath } from 'url';
 import { pathToPyhton } from '../../../python/path.helper';
+import { ndjsonResponse } from '$lib/server/ndjson';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -21,6 +22,8 @@ export async function POST({ request }) {
 
         // Get the language field; default to "en"
         const languageField = formData.get('language') || "en";
+        // staged=true returns NDJSON: the text first, then the audio as a separate message.
+        const stagedOutput = formData.get('staged') === 'true';
 
         // Convert uploaded file (ArrayBuffer) to a Buffer
         const arrayBuffer = await fileField.arrayBuffer();
@@ -37,7 +40,13 @@ export async function POST({ request }) {
         const scriptPath = `${pathToPyhton}/radiology/radiology.py`;
 
         // Spawn the Python process, passing the file path and language as arguments
-        const pythonProcess = spawn('python', [scriptPath, filePath, languageField]);
+        const args = [scriptPath, filePath, languageField];
+        if (stagedOutput) args.push('--staged');
+        const pythonProcess = spawn('python', args);
+
+        if (stagedOutput) {
+            return ndjsonResponse(pythonProcess, () => fs.unlink(filePath));
+        }
 
         let output = '';
         let errorOutput = '';
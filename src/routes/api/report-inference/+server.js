@@ -5,11 +5,12 @@ import path from 'path';
 import { tmpdir } from 'os';
 import { fileURLToPath } from 'url';
 import { pathToPyhton } from '../../../python/path.helper';
+import { ndjsonResponse } from '$lib/server/ndjson';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-export async function POST({ request }) {
+export async function POST({ request, locals }) {
     try {
         // Parse the multipart form data
         const formData = await request.formData();
@@ -20,6 +21,8 @@ export async function POST({ request }) {
 
         // Get language from form data; default to "en"
         const languageField = formData.get('language') || "en";
+        // stream=true returns NDJSON chunks as the model generates them.
+        const streamOutput = formData.get('stream') === 'true';
 
         // Convert file data (ArrayBuffer) to Buffer
         const arrayBuffer = await fileField.arrayBuffer();
@@ -36,7 +39,16 @@ export async function POST({ request }) {
         const scriptPath = `${pathToPyhton}/report-inference/report-inference.py`
 
         // Spawn the Python process, passing filePath and language as arguments
-        const pythonProcess = spawn('python', [scriptPath, filePath, languageField]);
+        const args = [scriptPath, filePath, languageField];
+        // Non-streamed results come back as JSON so the page methods travel with the text.
+        args.push(streamOutput ? '--stream' : '--json');
+        // Save the parsed values to the user's report history for trend comparison.
+        if (locals.user?.id) args.push(`--patient=${locals.user.id}`);
+        const pythonProcess = spawn('python', args);
+
+        if (streamOutput) {
+            return ndjsonResponse(pythonProcess, () => fs.unlink(filePath));
+        }
 
         let output = '';
         let errorOutput = '';
@@ -60,7 +72,9 @@ export async function POST({ request }) {
             return new Response(`Python script error: ${errorOutput}`, { status: 500 });
         }
 
-        return json({ result: output.trim() });
+        // { result: the inference text, pages: the text-layer / OCR method per page }
+        const { result, pages } = JSON.parse(output);
+        return json({ result: result.trim(), pages });
     } catch (err) {
         console.error(err);
         return new Response(`Internal Server Error: ${err}`, { status: 500 });